@@ -7,22 +7,79 @@ app_license = "gpl-2.0"
 
 # Document Events
 doc_events = {
+    "Room Rate Plan": {
+        "on_update": "hospitality_core.hospitality_core.api.rate_calendar.on_rate_plan_update",
+        "after_rename": "hospitality_core.hospitality_core.api.rate_calendar.on_rate_plan_rename",
+        "on_trash": "hospitality_core.hospitality_core.api.rate_calendar.on_rate_plan_trash"
+    },
+    "Hotel Room Type": {
+        "on_update": "hospitality_core.hospitality_core.api.rate_calendar.on_room_type_update",
+        "on_trash": "hospitality_core.hospitality_core.api.rate_calendar.on_room_type_trash"
+    },
     "Guest Folio": {
-        "on_update": "hospitality_core.hospitality_core.api.folio.sync_folio_balance"
+        "on_update": [
+            "hospitality_core.hospitality_core.api.folio.on_folio_update",
+            "hospitality_core.hospitality_core.api.master_folio.on_folio_change"
+        ],
+        "on_trash": "hospitality_core.hospitality_core.api.master_folio.on_folio_change"
+    },
+    "Hotel Reservation": {
+        "on_update": [
+            "hospitality_core.hospitality_core.api.availability.on_reservation_change",
+            "hospitality_core.hospitality_core.api.inventory.on_reservation_change",
+            "hospitality_core.hospitality_core.api.report_cache.on_reservation_change"
+        ],
+        "on_trash": [
+            "hospitality_core.hospitality_core.api.availability.on_reservation_change",
+            "hospitality_core.hospitality_core.api.inventory.on_reservation_change",
+            "hospitality_core.hospitality_core.api.report_cache.on_reservation_change"
+        ]
+    },
+    "Hotel Room": {
+        "on_update": [
+            "hospitality_core.hospitality_core.api.inventory.on_room_change",
+            "hospitality_core.hospitality_core.api.availability.on_room_change"
+        ],
+        "on_trash": [
+            "hospitality_core.hospitality_core.api.inventory.on_room_change",
+            "hospitality_core.hospitality_core.api.availability.on_room_change"
+        ]
+    },
+    "Hotel Group Booking": {
+        "on_update": "hospitality_core.hospitality_core.api.master_folio.on_group_booking_change",
+        "on_trash": "hospitality_core.hospitality_core.api.master_folio.on_group_booking_change"
     },
     "Folio Transaction": {
-        "after_save": "hospitality_core.hospitality_core.api.folio.sync_folio_balance",
-        "on_trash": "hospitality_core.hospitality_core.api.folio.sync_folio_balance"
+        "on_update": "hospitality_core.hospitality_core.api.folio.on_transaction_update",
+        "on_trash": "hospitality_core.hospitality_core.api.folio.on_transaction_trash"
+    },
+    "GL Entry": {
+        "on_submit": "hospitality_core.hospitality_core.api.credit_exposure.on_gl_entry_change",
+        "on_cancel": "hospitality_core.hospitality_core.api.credit_exposure.on_gl_entry_change"
+    },
+    "Customer": {
+        "on_update": "hospitality_core.hospitality_core.api.credit_exposure.on_customer_update"
     },
     "POS Invoice": {
         "on_submit": "hospitality_core.hospitality_core.api.pos_bridge.process_room_charge"
     },
     "Payment Entry": {
-        "on_submit": "hospitality_core.hospitality_core.api.payment_bridge.process_payment_entry"
+        "on_submit": [
+            "hospitality_core.hospitality_core.api.payment_bridge.process_payment_entry",
+            "hospitality_core.hospitality_core.api.report_cache.on_payment_change"
+        ],
+        "on_cancel": "hospitality_core.hospitality_core.api.report_cache.on_payment_change"
     }
 }
 
+# Large Guest Folios open without their transactions table, archived records open read-only
+# (see api/folio.getdoc)
+override_whitelisted_methods = {
+    "frappe.desk.form.load.getdoc": "hospitality_core.hospitality_core.api.folio.getdoc"
+}
+
 after_install = "hospitality_core.setup.after_install"
+after_migrate = "hospitality_core.hospitality_core.api.archive.sync_archive_tables"
 
 # Scheduled Tasks
 # changed daily audit to run at 2 PM (14:00) per requirements
@@ -31,11 +88,21 @@ scheduler_events = {
         "0 14 * * *": [
             "hospitality_core.hospitality_core.api.night_audit.run_daily_audit"
         ]
-    }
+    },
+    "daily": [
+        "hospitality_core.hospitality_core.api.rate_calendar.roll_rate_calendar",
+        "hospitality_core.hospitality_core.api.inventory.extend_inventory_horizon",
+        "hospitality_core.hospitality_core.api.reservation_lock.prune_room_night_locks",
+        "hospitality_core.hospitality_core.api.folio.verify_folio_balances",
+        "hospitality_core.hospitality_core.api.archive.schedule_archive"
+    ],
+    "monthly": [
+        "hospitality_core.hospitality_core.api.rollover.roll_master_folios"
+    ]
 }
 
 # Fixtures
 fixtures = [
     {"dt": "Custom Field", "filters": [["module", "=", "Hospitality Core"]]},
     {"dt": "Property Setter", "filters": [["module", "=", "Hospitality Core"]]}
-]
\ No newline at end of file
+]
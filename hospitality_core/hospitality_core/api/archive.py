@@ -0,0 +1,267 @@
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, getdate, nowdate
+
+# Doctypes with an archive tier: rows move from `tab<doctype>` to `tab<doctype> Archive`
+ARCHIVED_DOCTYPES = ["Hotel Reservation", "Reservation Routing", "Guest Folio", "Folio Transaction"]
+DEFAULT_BATCH_SIZE = 500
+
+def get_archive_table(doctype):
+    return f"tab{doctype} Archive"
+
+def get_columns(doctype):
+    """
+    Columns of the live table. The archive tables are kept a superset of them (sync_archive_tables).
+    """
+    return frappe.db.get_table_columns(doctype)
+
+# --- Reading ---
+
+def get_archive_boundary():
+    """
+    Every archived row is dated before this date. None while nothing has been archived.
+    """
+    boundary = frappe.db.get_single_value("Hospitality Settings", "archived_before")
+    return getdate(boundary) if boundary else None
+
+def needs_archive(from_date=None):
+    """
+    True when a query starting at from_date (None: unbounded) can reach archived rows.
+    """
+    boundary = get_archive_boundary()
+    if not boundary:
+        return False
+    return not from_date or getdate(from_date) < boundary
+
+def get_source(doctype, from_date=None):
+    """
+    FROM-clause source for a date-filtered query on doctype: the live table, or live
+    UNION ALL archive when the range starts before the archive boundary.
+    Usage: f"SELECT ... FROM {get_source('Folio Transaction', from_date)} ft WHERE ..."
+    """
+    if not needs_archive(from_date):
+        return f"`tab{doctype}`"
+
+    columns = ", ".join(f"`{column}`" for column in get_columns(doctype))
+    return f"""(
+        SELECT {columns} FROM `tab{doctype}`
+        UNION ALL
+        SELECT {columns} FROM `{get_archive_table(doctype)}`
+    )"""
+
+# --- Desk read path ---
+
+def get_archived_doc(doctype, name):
+    """
+    An archived record rebuilt from the archive tables with its (archived) child rows, flagged
+    read-only through __onload.archived. None when name is not in the archive.
+    """
+    if doctype not in ARCHIVED_DOCTYPES or not get_archive_boundary():
+        return None
+
+    row = frappe.db.sql(f"SELECT * FROM `{get_archive_table(doctype)}` WHERE name = %s", (name,), as_dict=True)
+    if not row:
+        return None
+
+    doc = frappe.get_doc(dict(row[0], doctype=doctype))
+    for df in doc.meta.get_table_fields():
+        if df.options in ARCHIVED_DOCTYPES:
+            doc.set(df.fieldname, frappe.db.sql(f"""
+                SELECT * FROM `{get_archive_table(df.options)}`
+                WHERE parent = %s AND parenttype = %s AND parentfield = %s
+                ORDER BY idx
+            """, (name, doctype, df.fieldname), as_dict=True))
+
+    doc.set_onload("archived", True)
+    return doc
+
+def load_archived_doc(doctype, name):
+    """
+    Serves an archived record to the desk form (see folio.getdoc), so links to it from live
+    records (Guest Balance Ledger, Comments, report drill-downs) keep opening it, read-only.
+    A save is refused by frappe itself: the record no longer exists in the live table.
+    Returns False when name is not in the archive.
+    """
+    from frappe.desk.form.load import get_docinfo
+
+    doc = get_archived_doc(doctype, name)
+    if not doc:
+        return False
+
+    doc.check_permission("read")
+    doc.apply_fieldlevel_read_permissions()
+
+    if not frappe.response.get("docs"):
+        frappe.response.docs = []
+    frappe.response.docs.append(doc)
+    get_docinfo(doc)
+    return True
+
+# --- Schema ---
+
+def sync_archive_tables():
+    """
+    Hook: after_migrate. Creates missing archive tables as copies of the live ones and adds
+    any column the live table gained since (archive rows get the column default / NULL).
+    """
+    for doctype in ARCHIVED_DOCTYPES:
+        archive_table = get_archive_table(doctype)
+        frappe.db.sql_ddl(f"CREATE TABLE IF NOT EXISTS `{archive_table}` LIKE `tab{doctype}`")
+
+        definitions = get_column_definitions(f"tab{doctype}")
+        existing = get_column_definitions(archive_table)
+        for column, column_type in definitions.items():
+            if column not in existing:
+                frappe.db.sql_ddl(f"ALTER TABLE `{archive_table}` ADD COLUMN `{column}` {column_type} NULL")
+
+def get_column_definitions(table):
+    return dict(frappe.db.sql("""
+        SELECT column_name, column_type
+        FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,)))
+
+# --- Archiving ---
+
+def get_archive_cutoff():
+    """
+    Records closed / departed before this date are archived. None when archiving is disabled.
+    """
+    days = cint(frappe.db.get_single_value("Hospitality Settings", "archive_after_days"))
+    return getdate(add_days(nowdate(), -days)) if days > 0 else None
+
+def schedule_archive():
+    """
+    Scheduled Job (daily): advances the archive boundary and starts the batched archive jobs.
+    """
+    cutoff = get_archive_cutoff()
+    if not cutoff:
+        return
+
+    sync_archive_tables()
+
+    # The boundary moves before any row does, so reports never miss rows in flight
+    boundary = get_archive_boundary()
+    if not boundary or cutoff > boundary:
+        frappe.db.set_single_value("Hospitality Settings", "archived_before", cutoff)
+    frappe.db.commit()
+
+    enqueue_archive_batch(cutoff)
+
+@frappe.whitelist()
+def run_archive():
+    """
+    Manual trigger for the archive jobs (same as the daily schedule).
+    """
+    frappe.only_for("System Manager")
+
+    if not get_archive_cutoff():
+        frappe.throw(_("Set 'Archive After (Days)' in Hospitality Settings first."))
+
+    schedule_archive()
+
+def enqueue_archive_batch(cutoff):
+    frappe.enqueue(
+        "hospitality_core.hospitality_core.api.archive.archive_batch",
+        queue="long",
+        cutoff=cutoff,
+        enqueue_after_commit=True
+    )
+
+def archive_batch(cutoff, batch_size=None):
+    """
+    Background Job: archives one batch of reservations and closed folios (with their
+    transactions and routing rows) in one transaction, then enqueues the next batch
+    until nothing older than the cutoff is left.
+    """
+    cutoff = getdate(cutoff)
+    batch_size = cint(batch_size or frappe.db.get_single_value("Hospitality Settings", "archive_batch_size")) or DEFAULT_BATCH_SIZE
+
+    reservations = get_archivable_reservations(cutoff, batch_size)
+    folios = get_archivable_folios(cutoff, reservations, batch_size)
+
+    if not reservations and not folios:
+        return
+
+    try:
+        move_to_archive("Folio Transaction", folios, key="parent")
+        move_to_archive("Guest Folio", folios)
+        move_to_archive("Reservation Routing", reservations, key="parent")
+        move_to_archive("Hotel Reservation", reservations)
+        frappe.db.commit()
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(title=_("Archive Batch Failed"), message=frappe.get_traceback())
+        return
+
+    if len(reservations) >= batch_size or len(folios) >= batch_size:
+        enqueue_archive_batch(cutoff)
+
+def get_archivable_reservations(cutoff, limit):
+    """
+    Checked Out / Cancelled reservations that departed before the cutoff and whose folios
+    are all Closed or Cancelled (and closed before the cutoff).
+    """
+    return frappe.db.sql_list("""
+        SELECT res.name
+        FROM `tabHotel Reservation` res
+        WHERE res.status IN ('Checked Out', 'Cancelled')
+        AND res.departure_date < %(cutoff)s
+        AND NOT EXISTS (
+            SELECT 1 FROM `tabGuest Folio` gf
+            WHERE gf.reservation = res.name
+            AND (
+                gf.status NOT IN ('Closed', 'Cancelled')
+                OR gf.close_date >= %(cutoff)s
+                OR gf.is_company_master = 1
+                OR EXISTS (SELECT 1 FROM `tabHotel Group Booking` gb WHERE gb.master_folio = gf.name)
+            )
+        )
+        ORDER BY res.departure_date
+        LIMIT %(limit)s
+    """, {"cutoff": cutoff, "limit": limit})
+
+def get_archivable_folios(cutoff, reservations, limit):
+    """
+    The folios of the archived reservations, plus Closed folios without a reservation
+    (walk-ins) closed before the cutoff. Master Folios always stay live: Folio Statements,
+    group bookings and the City Ledger point at them.
+    """
+    folios = []
+    if reservations:
+        folios = frappe.db.sql_list("""
+            SELECT name FROM `tabGuest Folio` WHERE reservation IN %(reservations)s
+        """, {"reservations": reservations})
+
+    folios += frappe.db.sql_list("""
+        SELECT gf.name
+        FROM `tabGuest Folio` gf
+        WHERE IFNULL(gf.reservation, '') = ''
+        AND gf.status = 'Closed'
+        AND gf.close_date < %(cutoff)s
+        AND gf.is_company_master = 0
+        AND NOT EXISTS (SELECT 1 FROM `tabHotel Group Booking` gb WHERE gb.master_folio = gf.name)
+        AND NOT EXISTS (SELECT 1 FROM `tabFolio Statement` fs WHERE fs.master_folio = gf.name OR fs.next_folio = gf.name)
+        ORDER BY gf.close_date
+        LIMIT %(limit)s
+    """, {"cutoff": cutoff, "limit": limit})
+
+    return folios
+
+def move_to_archive(doctype, names, key="name"):
+    """
+    Copies the rows of doctype whose key is in names to its archive table, then deletes them.
+    INSERT IGNORE keeps a re-run after a partial failure idempotent.
+    """
+    if not names:
+        return
+
+    columns = ", ".join(f"`{column}`" for column in get_columns(doctype))
+    frappe.db.sql(f"""
+        INSERT IGNORE INTO `{get_archive_table(doctype)}` ({columns})
+        SELECT {columns} FROM `tab{doctype}` WHERE `{key}` IN %(names)s
+    """, {"names": names})
+
+    frappe.db.sql(f"""
+        DELETE FROM `tab{doctype}` WHERE `{key}` IN %(names)s
+    """, {"names": names})
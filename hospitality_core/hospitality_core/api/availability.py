@@ -0,0 +1,263 @@
+import re
+
+import frappe
+from frappe.utils import date_diff, getdate, nowdate
+
+# Bit i of a room's bitmap is set when night from_date + i is taken by a Reserved / Checked In reservation
+ACTIVE_STATUSES = ("Reserved", "Checked In")
+
+# Redis hashes, field = room:
+#   BITMAP_KEY  -> {"version", "from_date", "bits"}
+#   VERSION_KEY -> token replaced after every committed change to the room's reservations
+BITMAP_KEY = "hospitality_room_availability"
+VERSION_KEY = "hospitality_room_availability_version"
+
+# Picker cache: ranked free-room list per (arrival, departure, room type, ignored reservation),
+# kept for FREE_ROOMS_TTL seconds. Keys embed the token under FREE_ROOMS_VERSION_KEY, which is
+# replaced after every committed reservation or room change, so stale lists are never read again.
+FREE_ROOMS_KEY = "hospitality_free_rooms"
+FREE_ROOMS_VERSION_KEY = "hospitality_free_rooms_version"
+FREE_ROOMS_TTL = 60
+
+def get_range_mask(arrival_date, departure_date, from_date):
+    """
+    Bitmask of the nights [arrival_date, departure_date) in a bitmap starting at from_date.
+    Nights before from_date are left out.
+    """
+    arrival_date = max(getdate(arrival_date), getdate(from_date))
+    nights = date_diff(departure_date, arrival_date)
+    if nights <= 0:
+        return 0
+    return ((1 << nights) - 1) << date_diff(arrival_date, from_date)
+
+# --- Index ---
+
+def get_room_bitmaps(rooms):
+    """
+    {room: {"from_date", "bits"}} for the given rooms. A bitmap answers for nights from its
+    from_date on (the day it was built) to any date in the future.
+    Lookup order: frappe.local -> Redis (only if built at the room's current version) -> one
+    query for everything still missing. Rooms changed in the current transaction are always
+    read from the database (which sees the uncommitted rows) and are not cached in Redis.
+    """
+    local = getattr(frappe.local, "room_bitmaps", None)
+    if local is None:
+        local = frappe.local.room_bitmaps = {}
+    changed = getattr(frappe.local, "changed_room_bitmaps", None) or set()
+    missing = [room for room in set(rooms) if room and room not in local]
+
+    if missing:
+        cache = frappe.cache()
+        versions = get_hash(VERSION_KEY)
+        cached = get_hash(BITMAP_KEY)
+
+        not_cached = []
+        for room in missing:
+            bitmap = cached.get(room)
+            if room not in changed and bitmap and bitmap["version"] == versions.get(room):
+                local[room] = bitmap
+            else:
+                not_cached.append(room)
+
+        if not_cached:
+            # The version is read before the rows: a change committed in between makes
+            # this bitmap stale on arrival, and readers will rebuild it
+            for room, bitmap in load_room_bitmaps(not_cached, versions).items():
+                if room not in changed:
+                    cache.hset(BITMAP_KEY, room, bitmap)
+                local[room] = bitmap
+
+    return {room: local[room] for room in rooms if room in local}
+
+def get_hash(key):
+    # RedisWrapper.hgetall returns the raw (bytes) field names
+    return {frappe.safe_decode(field): value for field, value in (frappe.cache().hgetall(key) or {}).items()}
+
+def load_room_bitmaps(rooms, versions):
+    from_date = getdate(nowdate())
+    bitmaps = {room: {"version": versions.get(room), "from_date": from_date, "bits": 0} for room in rooms}
+
+    for res in frappe.db.sql("""
+        SELECT room, arrival_date, departure_date
+        FROM `tabHotel Reservation`
+        WHERE room IN %(rooms)s
+        AND status IN %(statuses)s
+        AND departure_date > %(from_date)s
+    """, {"rooms": rooms, "statuses": ACTIVE_STATUSES, "from_date": from_date}, as_dict=True):
+        bitmaps[res.room]["bits"] |= get_range_mask(res.arrival_date, res.departure_date, from_date)
+
+    return bitmaps
+
+# --- Queries ---
+
+def is_room_free(room, arrival_date, departure_date, ignore_reservation=None):
+    """
+    True / False from the index, or None when the index cannot answer (range starts
+    before the bitmap was built) and the caller has to query the reservations.
+    """
+    bitmap = get_room_bitmaps([room]).get(room)
+    if not bitmap or getdate(arrival_date) < bitmap["from_date"]:
+        return None
+
+    mask = get_range_mask(arrival_date, departure_date, bitmap["from_date"])
+    bits = bitmap["bits"]
+
+    if bits & mask and ignore_reservation:
+        # The reservation being edited does not conflict with itself
+        own = frappe.db.get_value("Hotel Reservation", ignore_reservation,
+            ["room", "arrival_date", "departure_date", "status"], as_dict=True)
+        if own and own.room == room and own.status in ACTIVE_STATUSES:
+            bits &= ~get_range_mask(own.arrival_date, own.departure_date, bitmap["from_date"])
+
+    return not bits & mask
+
+def get_taken_rooms(rooms, arrival_date, departure_date, ignore_reservation=None):
+    """
+    The subset of rooms that is not known to be free: taken according to the index,
+    or outside what it can answer. Callers look up the actual conflicts for these only.
+    """
+    return [
+        room for room in rooms
+        if is_room_free(room, arrival_date, departure_date, ignore_reservation) is not True
+    ]
+
+def get_free_rooms(arrival_date, departure_date, room_type=None, ignore_reservation=None):
+    """
+    Enabled rooms (not Out of Order) of room_type, or of every type, that are free for
+    [arrival_date, departure_date), in room order, as frappe._dict(name, room_type, status, floor).
+    One query for the rooms, bitwise checks for the nights.
+    """
+    filters = {"is_enabled": 1, "status": ["!=", "Out of Order"]}
+    if room_type:
+        filters["room_type"] = room_type
+
+    rooms = frappe.get_all("Hotel Room",
+        filters=filters,
+        fields=["name", "room_type", "status", "floor"],
+        order_by="name asc"
+    )
+
+    taken = set(get_taken_rooms([r.name for r in rooms], arrival_date, departure_date, ignore_reservation))
+    if taken:
+        # Whatever the index could not clear is settled against the reservations
+        taken = set(frappe.db.sql_list("""
+            SELECT room FROM `tabHotel Reservation`
+            WHERE room IN %(rooms)s
+            AND status IN %(statuses)s
+            AND name != %(ignore)s
+            AND arrival_date < %(departure)s
+            AND departure_date > %(arrival)s
+        """, {
+            "rooms": list(taken),
+            "statuses": ACTIVE_STATUSES,
+            "ignore": ignore_reservation or "",
+            "arrival": arrival_date,
+            "departure": departure_date
+        }))
+
+    return [r for r in rooms if r.name not in taken]
+
+def get_ranked_free_rooms(arrival_date, departure_date, room_type=None, ignore_reservation=None):
+    """
+    get_free_rooms as (name, room_type, status, floor) tuples ranked by floor, then room number,
+    computed once per date range / room type and served from Redis for the next FREE_ROOMS_TTL
+    seconds (every keystroke of a room picker asks again). Not cached while the current
+    transaction has changed reservations.
+    """
+    if getattr(frappe.local, "changed_room_bitmaps", None):
+        return rank_rooms(get_free_rooms(arrival_date, departure_date, room_type, ignore_reservation))
+
+    cache = frappe.cache()
+    version = cache.get_value(FREE_ROOMS_VERSION_KEY) or ""
+    key = "|".join([
+        FREE_ROOMS_KEY, version, str(getdate(arrival_date)), str(getdate(departure_date)),
+        room_type or "", ignore_reservation or ""
+    ])
+
+    rooms = cache.get_value(key)
+    if rooms is None:
+        # As for the bitmaps, the version is read first: a change committed meanwhile retires this list
+        rooms = rank_rooms(get_free_rooms(arrival_date, departure_date, room_type, ignore_reservation))
+        cache.set_value(key, rooms, expires_in_sec=FREE_ROOMS_TTL)
+
+    return rooms
+
+def rank_rooms(rooms):
+    """
+    Floor, then room number, both in natural order ("2" before "10"); rooms without a floor last.
+    """
+    ranked = sorted(rooms, key=lambda r: (not r.floor, natural_key(r.floor), natural_key(r.name)))
+    return [(r.name, r.room_type, r.status, r.floor) for r in ranked]
+
+def natural_key(value):
+    return [(0, int(part), "") if part.isdigit() else (1, 0, part.lower()) for part in re.split(r"(\d+)", value or "") if part]
+
+# --- Maintenance ---
+
+def invalidate_rooms(rooms):
+    """
+    Marks rooms as changed in the current transaction and, once it commits, replaces
+    their version token so every cached bitmap of theirs is rebuilt on next read.
+    """
+    rooms = {room for room in rooms if room}
+    if not rooms:
+        return
+
+    local = getattr(frappe.local, "room_bitmaps", None) or {}
+    changed = getattr(frappe.local, "changed_room_bitmaps", None)
+    if changed is None:
+        changed = frappe.local.changed_room_bitmaps = set()
+        frappe.db.after_commit.add(publish_changed_rooms)
+        frappe.db.after_rollback.add(discard_changed_rooms)
+
+    changed.update(rooms)
+    for room in rooms:
+        local.pop(room, None)
+
+def publish_changed_rooms():
+    changed = getattr(frappe.local, "changed_room_bitmaps", None) or set()
+    cache = frappe.cache()
+    for room in changed:
+        cache.hset(VERSION_KEY, room, frappe.generate_hash(length=10))
+        cache.hdel(BITMAP_KEY, room)
+
+    if changed:
+        invalidate_free_rooms()
+
+    discard_changed_rooms()
+
+def discard_changed_rooms():
+    # after_commit / after_rollback callbacks run once: the next change registers them again
+    local = getattr(frappe.local, "room_bitmaps", None) or {}
+    for room in getattr(frappe.local, "changed_room_bitmaps", None) or set():
+        local.pop(room, None)
+    frappe.local.changed_room_bitmaps = None
+
+def on_reservation_change(doc, method=None):
+    """
+    Hook: Hotel Reservation on_update / on_trash. Covers reserve, check-out, room moves and
+    date changes; status changes written with db_set / set_value call invalidate_rooms directly.
+    """
+    before = doc.get_doc_before_save() if method != "on_trash" else None
+    invalidate_rooms({doc.room, before.room if before else None})
+
+def invalidate_free_rooms():
+    frappe.cache().set_value(FREE_ROOMS_VERSION_KEY, frappe.generate_hash(length=10))
+
+def on_room_change(doc, method=None):
+    """
+    Hook: Hotel Room on_update / on_trash. Enabling, disabling or taking a room out of order
+    changes every cached picker list once committed.
+    """
+    frappe.db.after_commit.add(invalidate_free_rooms)
+
+@frappe.whitelist()
+def rebuild_availability_index():
+    """
+    Drops every cached bitmap; they are rebuilt from the reservations on next read.
+    """
+    frappe.only_for("System Manager")
+
+    frappe.cache().delete_key(BITMAP_KEY)
+    frappe.cache().delete_key(VERSION_KEY)
+    invalidate_free_rooms()
@@ -0,0 +1,100 @@
+import frappe
+from frappe.utils import flt
+
+# Cached credit profile per Customer: {"company", "credit_limit", "erp_balance"}
+CACHE_PREFIX = "hospitality_credit_profile"
+# Safety net only: GL Entry and Customer hooks invalidate the profile as soon as it changes
+CREDIT_PROFILE_TTL = 15 * 60
+
+def get_credit_profile(customer):
+    """
+    Credit limit and ERP (GL) balance of a Customer for the hotel company.
+    Served from frappe.local / Redis; the GL is only aggregated on a cache miss.
+    Returns None when no hotel company is configured.
+    """
+    hotel_company = get_hotel_company()
+    if not hotel_company:
+        return None
+
+    local = getattr(frappe.local, "credit_profiles", None)
+    if local is None:
+        local = frappe.local.credit_profiles = {}
+    profile = local.get(customer)
+    if profile and profile.company == hotel_company:
+        return profile
+
+    cache_key = get_cache_key(customer)
+    profile = frappe.cache().get_value(cache_key)
+    if not profile or profile.get("company") != hotel_company:
+        profile = load_credit_profile(customer, hotel_company)
+        frappe.cache().set_value(cache_key, profile, expires_in_sec=CREDIT_PROFILE_TTL)
+
+    profile = frappe._dict(profile)
+    local[customer] = profile
+    return profile
+
+def get_hotel_company():
+    return frappe.defaults.get_user_default("Company") or frappe.db.get_single_value("Global Defaults", "default_company")
+
+def load_credit_profile(customer, hotel_company):
+    credit_limit = 0.0
+
+    # 1. Try Child Table (v15+)
+    if frappe.db.get_value("DocType", "Customer Credit Limit", "name"):
+        credit_limit = frappe.db.get_value("Customer Credit Limit",
+            {"parent": customer, "company": hotel_company},
+            "credit_limit"
+        )
+
+    # 2. Fallback to main field
+    if not credit_limit:
+        credit_limit = frappe.db.get_value("Customer", customer, "credit_limit")
+
+    # Only customers with a limit need their GL balance
+    erp_balance = 0.0
+    if flt(credit_limit) > 0:
+        try:
+            from erpnext.accounts.utils import get_balance_on
+            erp_balance = get_balance_on(party_type="Customer", party=customer)
+        except ImportError:
+            erp_balance = frappe.db.get_value("Customer", customer, "total_unpaid") or 0.0
+        except Exception:
+            pass
+
+    return {
+        "company": hotel_company,
+        "credit_limit": flt(credit_limit),
+        "erp_balance": flt(erp_balance)
+    }
+
+def get_cache_key(customer):
+    return f"{CACHE_PREFIX}::{customer}"
+
+def invalidate_credit_profile(customer):
+    """
+    Drops a Customer's profile now and again after commit.
+    """
+    if not customer:
+        return
+
+    def clear():
+        frappe.cache().delete_value(get_cache_key(customer))
+        (getattr(frappe.local, "credit_profiles", None) or {}).pop(customer, None)
+
+    clear()
+    frappe.db.after_commit.add(clear)
+
+# --- Document Events ---
+
+def on_gl_entry_change(doc, method=None):
+    """
+    Hook: GL Entry on_submit / on_cancel. Any ledger movement for a Customer changes its ERP balance.
+    """
+    if doc.party_type == "Customer":
+        invalidate_credit_profile(doc.party)
+
+def on_customer_update(doc, method=None):
+    """
+    Hook: Customer on_update (credit limits may have changed).
+    """
+    invalidate_credit_profile(doc.name)
@@ -0,0 +1,361 @@
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, date_diff, flt, getdate, now, nowdate
+
+from hospitality_core.hospitality_core.api.archive import get_source
+from hospitality_core.hospitality_core.api.inventory import get_room_counts
+from hospitality_core.hospitality_core.api.report_cache import invalidate_dates
+from hospitality_core.hospitality_core.api.stay_counts import count_nights
+
+# Hotel Daily Statistics: one pre-aggregated row per business date, written by the night audit
+# (the previous, now complete, date and a provisional row for the audited date) and backfilled
+# for history. Reports read these rows for past dates and compute only today live.
+# A change to a closed date (void, back-dated posting, moved transaction, changed stay) flags
+# its row, and every later one (closing ledger balances carry forward), as stale in the same
+# transaction; stale rows are never served and are rewritten by a background job.
+
+OCCUPIED_STATUSES = ("Checked In", "Checked Out")
+DEFAULT_FNB_ITEM_GROUPS = ("Food", "Beverage", "Food & Beverage")
+BACKFILL_BATCH_DAYS = 31
+
+STATISTICS_FIELDS = [
+    "rooms_available", "out_of_order", "occupied_rooms", "arrivals", "departures",
+    "room_revenue", "fnb_revenue", "other_revenue", "total_revenue", "discounts", "voids",
+    "payments", "guest_ledger_balance", "city_ledger_balance",
+    "revenue_by_item_group", "payments_by_mode"
+]
+
+# --- Reading ---
+
+def get_daily_statistics(from_date, to_date):
+    """
+    {date: row} of the final statistics in [from_date, to_date]. A row computed on its own
+    business date (the provisional row of the last audit) is not served: the date is still open.
+    """
+    to_date = min(getdate(to_date), getdate(add_days(nowdate(), -1)))
+    if getdate(from_date) > to_date:
+        return {}
+
+    return {
+        getdate(row.business_date): row
+        for row in frappe.db.sql(f"""
+            SELECT business_date, {", ".join(STATISTICS_FIELDS)}
+            FROM `tabHotel Daily Statistics`
+            WHERE business_date BETWEEN %(from_date)s AND %(to_date)s
+            AND DATE(computed_on) > business_date
+            AND is_stale = 0
+        """, {"from_date": getdate(from_date), "to_date": to_date}, as_dict=True)
+    }
+
+# --- Writing ---
+
+def record_after_audit(posting_date, from_date=None):
+    """
+    Night audit hook: finalises the previous business date (or every date from from_date, for a
+    catch-up) and writes a provisional row for the audited one. Committed on its own; a failure
+    is logged and never fails the audit.
+    """
+    posting_date = getdate(posting_date)
+    try:
+        write_daily_statistics(from_date or add_days(posting_date, -1), posting_date)
+        frappe.db.commit()
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(title=_("Hotel Daily Statistics Failed"), message=frappe.get_traceback())
+
+def write_daily_statistics(from_date, to_date):
+    """
+    Computes and (re)writes the statistics rows of [from_date, to_date].
+    """
+    rows = compute_daily_statistics(from_date, to_date)
+    if not rows:
+        return
+
+    frappe.db.delete("Hotel Daily Statistics", {"business_date": ["between", [getdate(from_date), getdate(to_date)]]})
+
+    timestamp = now()
+    user = frappe.session.user
+    fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus", "business_date", "computed_on", "is_stale"]
+    frappe.db.bulk_insert("Hotel Daily Statistics",
+        fields=fields + STATISTICS_FIELDS,
+        values=[
+            (
+                str(row["business_date"]), timestamp, timestamp, user, user, 0, row["business_date"], timestamp, 0,
+                *(row[field] for field in STATISTICS_FIELDS),
+            )
+            for row in rows
+        ]
+    )
+    # Hotel Performance Analytics reads these rows (the rows themselves are fresh)
+    invalidate_dates((row["business_date"] for row in rows), statistics=False)
+
+# --- Refreshing ---
+
+def queue_statistics_refresh(dates):
+    """
+    Called by report_cache.invalidate_dates for closed business dates changed in the current
+    transaction. Their rows are flagged stale just before it commits.
+    """
+    pending = getattr(frappe.local, "stale_statistics_dates", None)
+    if pending is None:
+        pending = frappe.local.stale_statistics_dates = set()
+        frappe.db.before_commit.add(mark_statistics_stale)
+        frappe.db.after_rollback.add(discard_stale_statistics)
+
+    pending.update(dates)
+
+def mark_statistics_stale():
+    dates = getattr(frappe.local, "stale_statistics_dates", None)
+    # before_commit / after_rollback callbacks run once: the next change registers them again
+    frappe.local.stale_statistics_dates = None
+    if not dates:
+        return
+
+    # Closing ledger balances carry forward: every later row is stale too
+    first = min(dates)
+    if not frappe.db.sql("SELECT 1 FROM `tabHotel Daily Statistics` WHERE business_date >= %s LIMIT 1", first):
+        return
+
+    frappe.db.sql("UPDATE `tabHotel Daily Statistics` SET is_stale = 1 WHERE business_date >= %s", first)
+    frappe.enqueue(
+        "hospitality_core.hospitality_core.api.daily_statistics.refresh_stale_statistics",
+        queue="long",
+        enqueue_after_commit=True
+    )
+
+def discard_stale_statistics():
+    frappe.local.stale_statistics_dates = None
+
+def refresh_stale_statistics():
+    """
+    Background Job: rewrites the earliest stale rows (at most BACKFILL_BATCH_DAYS days) and
+    commits, then enqueues itself again while stale rows remain. The rows are locked first, so a
+    change committing meanwhile waits for the rewrite and then flags them again.
+    """
+    stale = [getdate(row[0]) for row in frappe.db.sql("""
+        SELECT business_date FROM `tabHotel Daily Statistics`
+        WHERE is_stale = 1
+        ORDER BY business_date
+        LIMIT %(limit)s
+        FOR UPDATE
+    """, {"limit": BACKFILL_BATCH_DAYS})]
+    if not stale:
+        return
+
+    write_daily_statistics(stale[0], min(stale[-1], getdate(add_days(stale[0], BACKFILL_BATCH_DAYS - 1))))
+    frappe.db.commit()
+
+    if frappe.db.exists("Hotel Daily Statistics", {"is_stale": 1}):
+        frappe.enqueue(
+            "hospitality_core.hospitality_core.api.daily_statistics.refresh_stale_statistics",
+            queue="long",
+            enqueue_after_commit=True
+        )
+
+def compute_daily_statistics(from_date, to_date):
+    """
+    Statistics of every date in [from_date, to_date], in a fixed number of grouped queries
+    whatever the length of the range (archived history included when the range reaches it).
+    Room counts are the current room master: there is no dated history of rooms / Out of Order.
+    """
+    from_date, to_date = getdate(from_date), getdate(to_date)
+    days = date_diff(to_date, from_date) + 1
+    if days <= 0:
+        return []
+
+    dates = [getdate(add_days(from_date, i)) for i in range(days)]
+    rows = {
+        date: dict({field: 0 for field in STATISTICS_FIELDS}, business_date=date, revenue_by_item_group={}, payments_by_mode={})
+        for date in dates
+    }
+
+    # 1. Rooms
+    room_counts = get_room_counts()
+    for row in rows.values():
+        row["rooms_available"] = sum(total for total, _out_of_order in room_counts.values())
+        row["out_of_order"] = sum(out_of_order for _total, out_of_order in room_counts.values())
+
+    # 2. Stays: occupied nights (swept), arrivals and departures
+    stays = frappe.db.sql(f"""
+        SELECT arrival_date, departure_date
+        FROM {get_source("Hotel Reservation", from_date)} res
+        WHERE status IN %(statuses)s
+        AND arrival_date <= %(to_date)s AND departure_date >= %(from_date)s
+    """, {"statuses": OCCUPIED_STATUSES, "from_date": from_date, "to_date": to_date}, as_dict=True)
+
+    occupied = count_nights((("", stay.arrival_date, stay.departure_date) for stay in stays), from_date, to_date).get("")
+    for i, date in enumerate(dates):
+        rows[date]["occupied_rooms"] = occupied[i] if occupied else 0
+    for stay in stays:
+        if getdate(stay.arrival_date) in rows:
+            rows[getdate(stay.arrival_date)]["arrivals"] += 1
+        if getdate(stay.departure_date) in rows:
+            rows[getdate(stay.departure_date)]["departures"] += 1
+
+    # 3. Postings: revenue by item group, discounts, voids, payments
+    add_posting_totals(rows, from_date, to_date)
+
+    # 4. Payments by mode (the Payment Entries of the Daily Payment Collection)
+    for entry in frappe.db.sql("""
+        SELECT pe.posting_date, IFNULL(pe.mode_of_payment, '') as mode_of_payment, SUM(pe.paid_amount) as amount
+        FROM `tabPayment Entry` pe
+        WHERE pe.docstatus = 1
+        AND pe.posting_date BETWEEN %(from_date)s AND %(to_date)s
+        AND (
+            pe.reference_no LIKE 'FOLIO%%'
+            OR pe.reference_no LIKE 'MASTER%%'
+            OR pe.remarks LIKE '%%Hotel%%'
+            OR EXISTS (SELECT 1 FROM `tabGuest Folio` gf WHERE gf.name = pe.reference_no)
+        )
+        GROUP BY pe.posting_date, pe.mode_of_payment
+    """, {"from_date": from_date, "to_date": to_date}, as_dict=True):
+        rows[getdate(entry.posting_date)]["payments_by_mode"][entry.mode_of_payment or _("Unspecified")] = flt(entry.amount, 2)
+
+    # 5. Guest / City Ledger balances at the end of each date
+    add_ledger_balances(rows, dates, from_date, to_date)
+
+    result = []
+    for date in dates:
+        row = rows[date]
+        row["revenue_by_item_group"] = json.dumps(row["revenue_by_item_group"], sort_keys=True)
+        row["payments_by_mode"] = json.dumps(row["payments_by_mode"], sort_keys=True)
+        result.append(row)
+    return result
+
+def add_posting_totals(rows, from_date, to_date):
+    from hospitality_core.hospitality_core.api.night_audit import get_room_rent_item_codes
+
+    room_items = get_room_rent_item_codes() or [""]
+    fnb_groups = get_fnb_item_groups()
+
+    # By posting category (see folio.get_transaction_category): Master Folio mirrors are copies,
+    # transfers and balance transfers only move a receivable; none is revenue or payment.
+    # Room revenue is net of credits on room rent items, the definition of the live KPI engine
+    # (performance.get_revenue); such credits are therefore not counted as discounts.
+    for total in frappe.db.sql(f"""
+        SELECT
+            ft.posting_date,
+            IFNULL(item.item_group, '') as item_group,
+            ft.item IN %(room_items)s as is_room,
+            SUM(CASE WHEN ft.is_void = 0 AND (ft.item IN %(room_items)s OR (ft.category = 'Charge' AND ft.amount > 0))
+                THEN ft.amount ELSE 0 END) as charges,
+            SUM(CASE WHEN ft.is_void = 0 AND ft.category IN ('Discount', 'Complimentary') AND ft.item NOT IN %(room_items)s
+                THEN -ft.amount ELSE 0 END) as discounts,
+            SUM(CASE WHEN ft.is_void = 0 AND ft.category = 'Payment' THEN -ft.amount ELSE 0 END) as payments,
+            SUM(CASE WHEN ft.is_void = 1 THEN ABS(ft.amount) ELSE 0 END) as voids
+        FROM {get_source("Folio Transaction", from_date)} ft
+        LEFT JOIN `tabItem` item ON item.name = ft.item
+        WHERE ft.posting_date BETWEEN %(from_date)s AND %(to_date)s
+        AND ft.category IN ('Charge', 'Payment', 'Discount', 'Complimentary')
+        GROUP BY ft.posting_date, item.item_group, is_room
+    """, {
+        "room_items": room_items,
+        "from_date": from_date,
+        "to_date": to_date
+    }, as_dict=True):
+        row = rows[getdate(total.posting_date)]
+        charges = flt(total.charges)
+
+        if cint(total.is_room):
+            row["room_revenue"] += charges
+        elif total.item_group in fnb_groups:
+            row["fnb_revenue"] += charges
+        else:
+            row["other_revenue"] += charges
+
+        row["total_revenue"] += charges
+        row["discounts"] += flt(total.discounts)
+        row["payments"] += flt(total.payments)
+        row["voids"] += flt(total.voids)
+        if charges:
+            group = total.item_group or _("Unspecified")
+            row["revenue_by_item_group"][group] = flt(row["revenue_by_item_group"].get(group, 0) + charges, 2)
+
+def get_fnb_item_groups():
+    groups = frappe.db.get_single_value("Hospitality Settings", "fnb_item_groups")
+    if not groups:
+        return set(DEFAULT_FNB_ITEM_GROUPS)
+    return {group.strip() for group in groups.splitlines() if group.strip()}
+
+def add_ledger_balances(rows, dates, from_date, to_date):
+    """
+    Balance of the folios still receivable at the end of each date: everything posted up to it
+    on non-cancelled folios, split as in the Folio Balance Summary (City Ledger: folios with a
+    Company). One grouped query for the range plus one for the opening balance, then a running sum.
+    """
+    folios = get_source("Guest Folio", from_date)
+    transactions = get_source("Folio Transaction", None)
+    ledger_sql = "IF(IFNULL(gf.company, '') = '', 'guest', 'city')"
+
+    opening = dict(frappe.db.sql(f"""
+        SELECT {ledger_sql} as ledger, SUM(ft.amount)
+        FROM {transactions} ft
+        INNER JOIN {folios} gf ON gf.name = ft.parent
+        WHERE ft.is_void = 0 AND gf.status != 'Cancelled'
+        AND ft.posting_date < %(from_date)s
+        GROUP BY ledger
+    """, {"from_date": from_date}))
+
+    movements = {}
+    for date, ledger, amount in frappe.db.sql(f"""
+        SELECT ft.posting_date, {ledger_sql} as ledger, SUM(ft.amount)
+        FROM {transactions} ft
+        INNER JOIN {folios} gf ON gf.name = ft.parent
+        WHERE ft.is_void = 0 AND gf.status != 'Cancelled'
+        AND ft.posting_date BETWEEN %(from_date)s AND %(to_date)s
+        GROUP BY ft.posting_date, ledger
+    """, {"from_date": from_date, "to_date": to_date}):
+        movements[(getdate(date), ledger)] = flt(amount)
+
+    balances = {"guest": flt(opening.get("guest")), "city": flt(opening.get("city"))}
+    for date in dates:
+        for ledger in balances:
+            balances[ledger] += movements.get((date, ledger), 0.0)
+        rows[date]["guest_ledger_balance"] = flt(balances["guest"], 2)
+        rows[date]["city_ledger_balance"] = flt(balances["city"], 2)
+
+# --- Backfill ---
+
+@frappe.whitelist()
+def backfill_daily_statistics(from_date=None, to_date=None):
+    """
+    Rebuilds the statistics of [from_date (default: first posting), to_date (default: yesterday)]
+    in background batches of BACKFILL_BATCH_DAYS days.
+    """
+    frappe.only_for("System Manager")
+    enqueue_backfill(from_date, to_date)
+
+def enqueue_backfill(from_date=None, to_date=None):
+    from_date = from_date or get_first_business_date()
+    to_date = getdate(to_date or add_days(nowdate(), -1))
+    if not from_date or getdate(from_date) > to_date:
+        return
+
+    frappe.enqueue(
+        "hospitality_core.hospitality_core.api.daily_statistics.backfill_batch",
+        queue="long",
+        from_date=getdate(from_date),
+        to_date=to_date,
+        enqueue_after_commit=True
+    )
+
+def backfill_batch(from_date, to_date):
+    """
+    Background Job: writes one batch of dates and commits, then enqueues the rest.
+    """
+    from_date, to_date = getdate(from_date), getdate(to_date)
+    batch_end = min(getdate(add_days(from_date, BACKFILL_BATCH_DAYS - 1)), to_date)
+
+    write_daily_statistics(from_date, batch_end)
+    frappe.db.commit()
+
+    if batch_end < to_date:
+        enqueue_backfill(add_days(batch_end, 1), to_date)
+
+def get_first_business_date():
+    first = frappe.db.sql(f"""
+        SELECT MIN(posting_date) FROM {get_source("Folio Transaction", None)} ft
+    """)[0][0]
+    return getdate(first) if first else None
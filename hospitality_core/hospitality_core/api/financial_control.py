@@ -1,14 +1,15 @@
 import frappe
 from frappe import _
 
+
 @frappe.whitelist()
 def void_transaction(folio_transaction_name, reason_code):
     """
     Marks a transaction as Void.
     """
     # 1. Fetch Transaction
-    trans = frappe.get_doc("Folio Transaction", folio_transaction_name)
-    
+    trans = frappe.get_doc("Folio Transaction", folio_transaction_name, for_update=True)
+
     if trans.is_invoiced:
         frappe.throw(_("Cannot void this transaction because it has already been invoiced (Sales Invoice generated). Create a Credit Note instead."))
 
@@ -25,13 +26,15 @@ def void_transaction(folio_transaction_name, reason_code):
     frappe.db.set_value("Folio Transaction", trans.name, {
         "is_void": 1,
         "void_reason": reason_code,
-        "amount": 0 # Zero out amount so it doesn't affect balance, OR keep amount but exclude in SQL. 
-                    # Logic in 'sync_folio_balance' handles 'is_void=1' by ignoring it.
+        "amount": 0 # Zero out amount so it doesn't affect balance, OR keep amount but exclude in SQL.
+                    # Folio totals ignore rows with 'is_void=1'.
                     # Best practice: Keep the amount for audit, ignore in sum.
     })
 
-    # 4. Trigger Recalculation
-    from hospitality_core.hospitality_core.api.folio import sync_folio_balance
-    sync_folio_balance(frappe.get_doc("Guest Folio", trans.parent))
+    # 4. Remove the original amount from the folio totals
+    from hospitality_core.hospitality_core.api.folio import apply_transaction_deltas
+    from hospitality_core.hospitality_core.api.report_cache import invalidate_posting_dates
+    apply_transaction_deltas([trans], sign=-1)
+    invalidate_posting_dates([trans])
 
-    frappe.msgprint(_("Transaction Voided Successfully."))
\ No newline at end of file
+    frappe.msgprint(_("Transaction Voided Successfully."))
@@ -1,11 +1,80 @@
 import frappe
 from frappe import _
-from frappe.utils import flt
+from frappe.utils import cint, flt, getdate
+
+from hospitality_core.hospitality_core.api.archive import load_archived_doc
+from hospitality_core.hospitality_core.api.credit_exposure import get_credit_profile
+from hospitality_core.hospitality_core.api.master_folio import get_company_master, get_group_master
+from hospitality_core.hospitality_core.api.report_cache import invalidate_posting_dates
+
+# Folios with more transactions than this open in the desk without their child table;
+# the form pages through get_folio_transactions instead (see getdoc)
+DEFAULT_LAZY_THRESHOLD = 500
+MAX_PAGE_LENGTH = 500
+# Unique (parent, mirror_of) index of Folio Transaction (see folio_transaction.on_doctype_update)
+MIRROR_CONSTRAINT = "unique_folio_mirror"
+
+# Posting category stamped on every Folio Transaction at insert, so financial reports filter on
+# an indexed (posting_date, category) instead of matching items and descriptions per row.
+# Rules in order: the first match wins. CATEGORY_SQL applies the same rules to stored rows.
+BALANCE_TRANSFER_ITEMS = ("BALANCE-FORWARD", "BALANCE-TRANSFER")
+TRANSFER_ITEMS = ("TRANSFER", "TRANSFER-GROUP")
+PAYMENT_ITEMS = ("PAYMENT", "PAYMENT-CASH", "PAYMENT-CARD")
+PAYMENT_ITEM_GROUP = "Payment"
+
+CATEGORY_SQL = """CASE
+    WHEN IFNULL(ft.mirror_of, '') != '' THEN 'Mirror'
+    WHEN ft.item IN ('BALANCE-FORWARD', 'BALANCE-TRANSFER') THEN 'Balance Transfer'
+    WHEN ft.item IN ('TRANSFER', 'TRANSFER-GROUP') THEN 'Transfer'
+    WHEN ft.item = 'COMPLIMENTARY' THEN 'Complimentary'
+    WHEN ft.item = 'DISCOUNT' THEN 'Discount'
+    WHEN ft.item IN ('PAYMENT', 'PAYMENT-CASH', 'PAYMENT-CARD')
+        OR ft.reference_doctype = 'Payment Entry'
+        OR ft.item IN (SELECT name FROM `tabItem` WHERE item_group = 'Payment') THEN 'Payment'
+    WHEN ft.amount >= 0 THEN 'Charge'
+    WHEN ft.description LIKE '%%Payment%%' THEN 'Payment'
+    WHEN ft.description LIKE '%%Transfer%%' THEN 'Transfer'
+    WHEN ft.description LIKE '%%Complimentary%%' THEN 'Complimentary'
+    ELSE 'Discount'
+END"""
+
+def get_transaction_category(row):
+    """
+    Category of a transaction row or document (see CATEGORY_SQL). Other credits (allowances,
+    manual adjustments) count as discounts unless their description says otherwise.
+    """
+    item = row.get("item")
+    if row.get("mirror_of"):
+        return "Mirror"
+    if item in BALANCE_TRANSFER_ITEMS:
+        return "Balance Transfer"
+    if item in TRANSFER_ITEMS:
+        return "Transfer"
+    if item == "COMPLIMENTARY":
+        return "Complimentary"
+    if item == "DISCOUNT":
+        return "Discount"
+    if item in PAYMENT_ITEMS or row.get("reference_doctype") == "Payment Entry" or (
+        item and frappe.get_cached_value("Item", item, "item_group") == PAYMENT_ITEM_GROUP
+    ):
+        return "Payment"
+    if flt(row.get("amount")) >= 0:
+        return "Charge"
+
+    description = row.get("description") or ""
+    if "Payment" in description:
+        return "Payment"
+    if "Transfer" in description:
+        return "Transfer"
+    if "Complimentary" in description:
+        return "Complimentary"
+    return "Discount"
 
 def sync_folio_balance(doc, method=None):
     """
-    Recalculates Total Charges, Total Payments, and Outstanding Balance.
-    Triggered on: Guest Folio (on_update), Folio Transaction (after_save/on_trash).
+    Full recalculation of Total Charges, Total Payments, and Outstanding Balance.
+    Balances are normally maintained incrementally (see apply_balance_delta); this is
+    kept for explicit repairs and for verify_folio_balances.
     """
     # If called from Child Table event, doc is the child
     if doc.doctype == "Folio Transaction":
@@ -20,10 +89,21 @@ def sync_folio_balance(doc, method=None):
     else:
         folio_name = doc.name
 
+    update_folio_balance(folio_name)
+
+def update_folio_balance(folio_name):
+    """
+    Re-aggregates a single folio by name and writes the totals back.
+    O(number of transactions): only used for verification and repairs.
+    """
+    # The recomputation already includes rows whose deltas are still pending
+    discard_balance_deltas([folio_name])
+    (getattr(frappe.local, "folio_credit_bases", None) or {}).pop(folio_name, None)
+
     # Aggregation Query
     # We filter out void transactions
     totals = frappe.db.sql("""
-        SELECT 
+        SELECT
             SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END) as charges,
             SUM(CASE WHEN amount < 0 THEN ABS(amount) ELSE 0 END) as payments
         FROM `tabFolio Transaction`
@@ -40,61 +120,289 @@ def sync_folio_balance(doc, method=None):
         "total_payments": total_payments,
         "outstanding_balance": outstanding
     })
-    
+
     # Check Credit Limit if linked to Company
     folio_company = frappe.db.get_value("Guest Folio", folio_name, "company")
     if folio_company and outstanding > 0:
         check_credit_limit(folio_company, outstanding)
 
+def get_balance_deltas(rows, sign=1):
+    """
+    Signed contribution of transaction rows to their folios' totals.
+    Returns {folio: [charges, payments]}; void rows contribute nothing.
+    Pass sign=-1 for rows that are being removed from a folio.
+    """
+    deltas = {}
+    for row in rows:
+        if row.is_void or not row.parent:
+            continue
+
+        amount = flt(row.amount)
+        delta = deltas.setdefault(row.parent, [0.0, 0.0])
+        if amount > 0:
+            delta[0] += sign * amount
+        else:
+            delta[1] += sign * abs(amount)
+
+    return deltas
+
+def apply_transaction_deltas(rows, sign=1):
+    """
+    Adds (sign=1) or removes (sign=-1) the contribution of rows to their folios.
+    The deltas are coalesced per folio and written just before commit.
+    """
+    for folio_name, (charges, payments) in get_balance_deltas(rows, sign).items():
+        queue_balance_delta(folio_name, charges, payments)
+
+def queue_balance_delta(folio_name, charges=0.0, payments=0.0):
+    """
+    Records a balance delta for the current request / job. All deltas of a folio are
+    summed and applied with a single UPDATE by flush_balance_deltas, which runs
+    before commit (and is discarded on rollback).
+    """
+    charges, payments = flt(charges), flt(payments)
+    if not charges and not payments:
+        return
+
+    pending = getattr(frappe.local, "folio_balance_deltas", None)
+    if pending is None:
+        pending = frappe.local.folio_balance_deltas = {}
+        frappe.db.before_commit.add(flush_balance_deltas)
+        frappe.db.after_rollback.add(discard_balance_deltas)
+
+    delta = pending.setdefault(folio_name, [0.0, 0.0])
+    delta[0] += charges
+    delta[1] += payments
+
+    # Check Credit Limit if linked to Company (only new charges can breach it)
+    if charges > 0:
+        check_folio_credit(folio_name)
+
+def flush_balance_deltas(folio_names=None):
+    """
+    Writes the pending deltas of the given folios (default: all of them).
+    Call it as a barrier before reading a balance that was posted to in the same request.
+    """
+    pending = getattr(frappe.local, "folio_balance_deltas", None) or {}
+
+    bases = getattr(frappe.local, "folio_credit_bases", None) or {}
+    for folio_name in list(pending if folio_names is None else folio_names):
+        if folio_name in pending:
+            apply_balance_delta(folio_name, *pending.pop(folio_name))
+            # The stored balance now includes the delta
+            bases.pop(folio_name, None)
+
+    if folio_names is None:
+        # before_commit callbacks run once: the next delta registers a new flush, even when a
+        # targeted flush already emptied the dict
+        frappe.local.folio_balance_deltas = None
+
+def discard_balance_deltas(folio_names=None):
+    """
+    Drops pending deltas: all of them after a rollback, or those of folios
+    about to be fully recomputed.
+    """
+    if folio_names is None:
+        # Also the after_rollback callback: reset even if nothing is pending
+        frappe.local.folio_balance_deltas = None
+        frappe.local.folio_credit_bases = {}
+        return
+
+    pending = getattr(frappe.local, "folio_balance_deltas", None) or {}
+    for folio_name in folio_names:
+        pending.pop(folio_name, None)
+
+def get_pending_outstanding(folio_name):
+    pending = getattr(frappe.local, "folio_balance_deltas", None) or {}
+    charges, payments = pending.get(folio_name, (0.0, 0.0))
+    return charges - payments
+
+def check_folio_credit(folio_name):
+    """
+    Credit limit check against the folio's outstanding balance including pending deltas.
+    The stored balance is read once per request; later postings only add their delta.
+    """
+    bases = getattr(frappe.local, "folio_credit_bases", None)
+    if bases is None:
+        bases = frappe.local.folio_credit_bases = {}
+    if folio_name not in bases:
+        bases[folio_name] = frappe.db.get_value("Guest Folio", folio_name, ["company", "outstanding_balance"], as_dict=True)
+
+    folio = bases[folio_name]
+    if not folio or not folio.company:
+        return
+
+    outstanding = flt(folio.outstanding_balance) + get_pending_outstanding(folio_name)
+    if outstanding > 0:
+        check_credit_limit(folio.company, outstanding)
+
+def apply_balance_delta(folio_name, charges=0.0, payments=0.0):
+    """
+    Atomically shifts a folio's totals by a delta: O(1) regardless of folio size.
+    The UPDATE is relative, so concurrent postings to the same folio cannot lose updates.
+    The modified timestamp is left alone, so open forms do not go stale on every posting.
+    """
+    charges, payments = flt(charges), flt(payments)
+    if not charges and not payments:
+        return
+
+    frappe.db.sql("""
+        UPDATE `tabGuest Folio`
+        SET total_charges = IFNULL(total_charges, 0) + %(charges)s,
+            total_payments = IFNULL(total_payments, 0) + %(payments)s,
+            outstanding_balance = IFNULL(outstanding_balance, 0) + %(charges)s - %(payments)s
+        WHERE name = %(folio)s
+    """, {"folio": folio_name, "charges": charges, "payments": payments})
+
+def on_transaction_update(doc, method=None):
+    """
+    Hook: Folio Transaction on_update (fires on insert too).
+    Applies the difference between the saved row and its previous version.
+    """
+    before = doc.get_doc_before_save()
+    invalidate_posting_dates([doc, before] if before else [doc])
+    if before:
+        if (before.parent, flt(before.amount), before.is_void) == (doc.parent, flt(doc.amount), doc.is_void):
+            return
+        apply_transaction_deltas([before], sign=-1)
+
+    apply_transaction_deltas([doc])
+
+def on_transaction_trash(doc, method=None):
+    """
+    Hook: Folio Transaction on_trash.
+    """
+    invalidate_posting_dates([doc])
+    apply_transaction_deltas([doc], sign=-1)
+
+def on_folio_update(doc, method=None):
+    """
+    Hook: Guest Folio on_update.
+    Rows added/removed/edited through the folio form are saved with the parent and do not
+    fire their own hooks, so their net effect is applied here from the in-memory versions.
+    """
+    before = doc.get_doc_before_save()
+    if "Folio Transaction" in (doc.flags.ignore_children_type or []):
+        # Saved without its transactions table (lazy form view): no row was touched
+        return
+
+    invalidate_posting_dates(get_changed_transactions(before, doc))
+    apply_transaction_deltas(before.get("transactions") if before else [], sign=-1)
+    apply_transaction_deltas(doc.get("transactions"))
+
+def get_changed_transactions(before, doc):
+    """
+    Rows added, removed or edited by a folio save. A new room, guest or company changes how
+    every row of the folio is reported.
+    """
+    rows = doc.get("transactions") or []
+    if not before or (before.room, before.guest, before.company) != (doc.room, doc.guest, doc.company):
+        return rows + (before.get("transactions") if before else [])
+
+    fields = ("posting_date", "item", "description", "amount", "is_void")
+    previous = {row.name: row for row in before.get("transactions") or []}
+    changed = [row for row in rows if row.name not in previous or
+        [row.get(f) for f in fields] != [previous[row.name].get(f) for f in fields]]
+
+    names = {row.name for row in rows}
+    return changed + [row for name, row in previous.items() if name not in names]
+
+def verify_folio_balances(repair=True):
+    """
+    Scheduled Job (daily): periodic verification pass for the incrementally maintained balances.
+    Re-aggregates every open folio in one GROUP BY query and compares it with the stored
+    totals. Drifted folios are logged and, with repair=True, recomputed.
+    Returns the names of the folios that were out of sync.
+    """
+    flush_balance_deltas()
+
+    drifted = frappe.db.sql("""
+        SELECT gf.name, gf.total_charges, gf.total_payments,
+            IFNULL(t.charges, 0) as charges, IFNULL(t.payments, 0) as payments
+        FROM `tabGuest Folio` gf
+        LEFT JOIN (
+            SELECT parent,
+                SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END) as charges,
+                SUM(CASE WHEN amount < 0 THEN ABS(amount) ELSE 0 END) as payments
+            FROM `tabFolio Transaction`
+            WHERE is_void = 0
+            GROUP BY parent
+        ) t ON t.parent = gf.name
+        WHERE gf.status = 'Open'
+        AND (
+            ABS(IFNULL(gf.total_charges, 0) - IFNULL(t.charges, 0)) > 0.005
+            OR ABS(IFNULL(gf.total_payments, 0) - IFNULL(t.payments, 0)) > 0.005
+            OR ABS(IFNULL(gf.outstanding_balance, 0) - (IFNULL(t.charges, 0) - IFNULL(t.payments, 0))) > 0.005
+        )
+    """, as_dict=True)
+
+    if not drifted:
+        return []
+
+    frappe.log_error(
+        title=_("Folio balances out of sync"),
+        message="\n".join(
+            f"{d.name}: stored {flt(d.total_charges)} / {flt(d.total_payments)}, actual {flt(d.charges)} / {flt(d.payments)}"
+            for d in drifted
+        )
+    )
+
+    if repair:
+        for d in drifted:
+            update_folio_balance(d.name)
+
+    return [d.name for d in drifted]
+
 def check_credit_limit(customer_id, current_exposure):
     """
     Checks if the Customer has exceeded their Credit Limit including current exposure.
+    Limit and ERP balance come from the credit exposure cache, not from a GL scan.
     """
     try:
-        hotel_company = frappe.defaults.get_user_default("Company")
-        if not hotel_company:
-            hotel_company = frappe.db.get_single_value("Global Defaults", "default_company")
-        
-        if not hotel_company:
+        profile = get_credit_profile(customer_id)
+        if not profile or profile.credit_limit <= 0:
             return
 
-        credit_limit = 0.0
-        
-        # 1. Try Child Table (v15+)
-        if frappe.db.get_value("DocType", "Customer Credit Limit", "name"):
-            credit_limit = frappe.db.get_value("Customer Credit Limit", 
-                {"parent": customer_id, "company": hotel_company}, 
-                "credit_limit"
-            )
-        
-        # 2. Fallback to main field
-        if not credit_limit:
-             credit_limit = frappe.db.get_value("Customer", customer_id, "credit_limit")
-
-        if not credit_limit or flt(credit_limit) <= 0:
-            return
+        total_liability = flt(profile.erp_balance) + flt(current_exposure)
 
-        # Get current ERP Balance for Customer
-        erp_balance = 0.0
-        try:
-            from erpnext.accounts.utils import get_balance_on
-            erp_balance = get_balance_on(party_type="Customer", party=customer_id)
-        except ImportError:
-            erp_balance = frappe.db.get_value("Customer", customer_id, "total_unpaid") or 0.0
-        except Exception:
-            pass
-
-        total_liability = flt(erp_balance) + flt(current_exposure)
-        
-        if total_liability > flt(credit_limit):
+        if total_liability > profile.credit_limit:
             frappe.msgprint(_("Warning: Credit Limit Exceeded for {0}. Limit: {1}, Liability: {2}").format(
-                customer_id, 
-                frappe.format(credit_limit, "Currency"), 
+                customer_id,
+                frappe.format(profile.credit_limit, "Currency"),
                 frappe.format(total_liability, "Currency")
             ), alert=True)
 
     except Exception as e:
-        frappe.log_error(f"Credit Limit Check Failed for {customer_id}: {str(e)}", "Hospitality Core")
+        frappe.log_error(f"Credit Limit Check Failed for {customer_id}: {e!s}", "Hospitality Core")
+
+def get_folio_header(folio_name):
+    """
+    Lightweight read of a Guest Folio: header fields plus the reservation's group and
+    the guest's name, in one query. Never loads the transactions child table, so the
+    cost is the same for a 5-row guest folio and a 20k-row company master.
+    Returns None if the folio does not exist.
+    """
+    return get_folio_headers([folio_name]).get(folio_name)
+
+def get_folio_headers(folio_names):
+    """
+    Bulk version of get_folio_header: {folio: header}.
+    """
+    folio_names = list({f for f in folio_names if f})
+    if not folio_names:
+        return {}
+
+    headers = frappe.db.sql("""
+        SELECT gf.name, gf.guest, gf.company, gf.reservation, gf.room, gf.status,
+            gf.is_company_master, gf.total_charges, gf.total_payments, gf.outstanding_balance,
+            res.group_booking, res.is_company_guest, g.full_name as guest_full_name
+        FROM `tabGuest Folio` gf
+        LEFT JOIN `tabHotel Reservation` res ON res.name = gf.reservation
+        LEFT JOIN `tabGuest` g ON g.name = res.guest
+        WHERE gf.name IN %(folios)s
+    """, {"folios": folio_names}, as_dict=True)
+
+    return {h.name: h for h in headers}
 
 def mirror_to_company_folio(transaction_doc):
     """
@@ -102,129 +410,203 @@ def mirror_to_company_folio(transaction_doc):
     Updates: Ensures description contains Guest/Reservation info.
     """
     # 1. Identify the Company
-    guest_folio = frappe.get_doc("Guest Folio", transaction_doc.parent)
-    company = guest_folio.company
-    
+    guest_folio = get_folio_header(transaction_doc.parent)
+    company = guest_folio.company if guest_folio else None
+
     if not company:
         return
 
-    # 2. Find Master Folio for Company
-    master_folio = frappe.db.get_value("Guest Folio", {
-        "company": company, 
-        "status": "Open",
-        "is_company_master": 1,
-        "name": ["!=", guest_folio.name]
-    }, "name")
+    # 2. Find Master Folio for Company (cached resolver)
+    master_folio = get_company_master(company)
 
     # If no master exists, we skip. It usually should be created at Reservation Check-in.
-    if not master_folio:
-        return
-
-    # 3. Check if already mirrored
-    exists = frappe.db.exists("Folio Transaction", {
-        "parent": master_folio,
-        "reference_name": transaction_doc.name,
-        "reference_doctype": "Folio Transaction"
-    })
-    
-    if exists:
+    if not master_folio or master_folio == guest_folio.name:
         return
 
-    # 4. Create Mirror Transaction
+    # 3. Create Mirror Transaction (ignored if this transaction is already mirrored)
     # Enhanced Description for clarity on Master Bill: "Original Desc [Res: ID (Guest Name)]"
-    ref_info = ""
-    if guest_folio.reservation:
-        ref_info = f"Res: {guest_folio.reservation}"
-        # Fetch guest name if not evident
-        guest_name = frappe.db.get_value("Hotel Reservation", guest_folio.reservation, "guest")
-        if guest_name:
-            guest_full_name = frappe.db.get_value("Guest", guest_name, "full_name")
-            ref_info += f" ({guest_full_name})"
-    else:
-        ref_info = f"Room: {guest_folio.room}"
-    
-    new_txn = frappe.get_doc({
-        "doctype": "Folio Transaction",
-        "parent": master_folio,
-        "parenttype": "Guest Folio",
-        "parentfield": "transactions",
-        "posting_date": transaction_doc.posting_date,
-        "item": transaction_doc.item,
-        "description": f"{transaction_doc.description} [{ref_info}]",
-        "qty": transaction_doc.qty,
-        "amount": transaction_doc.amount,
-        "bill_to": "Company",
-        "reference_doctype": "Folio Transaction",
-        "reference_name": transaction_doc.name,
-        "is_void": 0
-    })
-    new_txn.insert(ignore_permissions=True)
-    
-    # Sync Company Folio Balance
-    sync_folio_balance(frappe.get_doc("Guest Folio", master_folio))
+    guest_full_name = guest_folio.guest_full_name if guest_folio.reservation else None
+    ref_info = get_mirror_reference("Company", guest_folio.reservation, guest_folio.room, guest_full_name)
+
+    insert_mirror_transaction(
+        new_transaction_row(**make_mirror_row(transaction_doc, master_folio, "Company", ref_info))
+    )
 
 def mirror_to_group_folio(transaction_doc):
     """
     If a transaction is Bill To Group, we post a copy to the Group's Master Folio.
     """
     # 1. Identify the Group
-    guest_folio = frappe.get_doc("Guest Folio", transaction_doc.parent)
-    reservation = guest_folio.reservation
-    
+    guest_folio = get_folio_header(transaction_doc.parent)
+    reservation = guest_folio.reservation if guest_folio else None
+
     if not reservation:
         return
 
-    group_booking = frappe.db.get_value("Hotel Reservation", reservation, "group_booking")
+    group_booking = guest_folio.group_booking
     if not group_booking:
         return
 
-    # 2. Find Master Folio for Group
-    master_folio = frappe.db.get_value("Hotel Group Booking", group_booking, "master_folio")
+    # 2. Find Master Folio for Group (cached resolver)
+    master_folio = get_group_master(group_booking)
 
     # If no master exists, we skip.
     if not master_folio or master_folio == guest_folio.name:
         return
 
-    # 3. Check if already mirrored
-    exists = frappe.db.exists("Folio Transaction", {
-        "parent": master_folio,
-        "reference_name": transaction_doc.name,
-        "reference_doctype": "Folio Transaction"
-    })
-    
-    if exists:
-        return
+    # 3. Create Mirror Transaction (ignored if this transaction is already mirrored)
+    ref_info = get_mirror_reference("Group", reservation, guest_folio.room, guest_folio.guest_full_name)
+
+    insert_mirror_transaction(
+        new_transaction_row(**make_mirror_row(transaction_doc, master_folio, "Group", ref_info))
+    )
 
-    # 4. Create Mirror Transaction
-    guest_name = frappe.db.get_value("Hotel Reservation", reservation, "guest")
-    guest_full_name = frappe.db.get_value("Guest", guest_name, "full_name") if guest_name else "Unknown"
-    
-    ref_info = f"Res: {reservation} ({guest_full_name}) | Room: {guest_folio.room}"
-    
-    new_txn = frappe.get_doc({
-        "doctype": "Folio Transaction",
+def get_mirror_reference(bill_to, reservation, room, guest_full_name=None):
+    """
+    Builds the "[...]" suffix appended to a mirrored description on a Master Folio.
+    """
+    if bill_to == "Group":
+        return f"Res: {reservation} ({guest_full_name or 'Unknown'}) | Room: {room}"
+
+    if reservation:
+        return f"Res: {reservation} ({guest_full_name})" if guest_full_name else f"Res: {reservation}"
+
+    return f"Room: {room}"
+
+def make_mirror_row(transaction, master_folio, bill_to, ref_info):
+    """
+    Field values for the copy of a transaction posted to a Company/Group Master Folio.
+    """
+    return {
         "parent": master_folio,
-        "parenttype": "Guest Folio",
-        "parentfield": "transactions",
-        "posting_date": transaction_doc.posting_date,
-        "item": transaction_doc.item,
-        "description": f"{transaction_doc.description} [{ref_info}]",
-        "qty": transaction_doc.qty,
-        "amount": transaction_doc.amount,
-        "bill_to": "Group",
+        "posting_date": transaction.posting_date,
+        "item": transaction.item,
+        "description": f"{transaction.description} [{ref_info}]",
+        "qty": transaction.qty,
+        "amount": transaction.amount,
+        "bill_to": bill_to,
         "reference_doctype": "Folio Transaction",
-        "reference_name": transaction_doc.name,
+        "reference_name": transaction.name,
+        "mirror_of": transaction.name,
         "is_void": 0
+    }
+
+def new_transaction_row(parent, posting_date, item, description, amount, **kwargs):
+    """
+    In-memory Folio Transaction row for bulk_insert_transactions.
+    The name is generated up front so mirrors can reference the row before it is written.
+    """
+    row = frappe._dict({
+        "name": frappe.generate_hash(length=10),
+        "parent": parent,
+        "posting_date": posting_date,
+        "item": item,
+        "description": description,
+        "qty": 1,
+        "amount": amount,
+        "bill_to": "Guest",
+        "is_void": 0,
+        "is_invoiced": 0,
+        "reference_doctype": None,
+        "reference_name": None,
+        "mirror_of": None
     })
-    new_txn.insert(ignore_permissions=True)
-    
-    # Sync Group Folio Balance
-    sync_folio_balance(frappe.get_doc("Guest Folio", master_folio))
+    row.update(kwargs)
+    row.category = row.category or get_transaction_category(row)
+    return row
+
+TRANSACTION_INSERT_FIELDS = [
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "parent", "parenttype", "parentfield", "idx",
+    "posting_date", "item", "description", "qty", "amount", "bill_to",
+    "is_void", "is_invoiced", "reference_doctype", "reference_name", "mirror_of", "category"
+]
+
+def get_transaction_values(rows):
+    now = frappe.utils.now()
+    user = frappe.session.user
+
+    set_transaction_idx(rows)
+    return [
+        (
+            row.name, now, now, user, user, 0,
+            row.parent, "Guest Folio", "transactions", row.idx,
+            row.posting_date, row.item, row.description, row.qty, row.amount, row.bill_to,
+            row.is_void, row.is_invoiced, row.reference_doctype, row.reference_name, row.get("mirror_of"),
+            row.get("category") or get_transaction_category(row)
+        )
+        for row in rows
+    ]
+
+def set_transaction_idx(rows):
+    """
+    Numbers new rows after the last transaction of their folio, in the order given, as
+    Document.append would: the form lists a folio's transactions by idx.
+    One grouped query for all the folios of the batch.
+    """
+    parents = list({row.parent for row in rows if not row.get("idx")})
+    if not parents:
+        return
+
+    last_idx = dict(frappe.db.sql("""
+        SELECT parent, MAX(idx) FROM `tabFolio Transaction`
+        WHERE parent IN %(parents)s AND parenttype = 'Guest Folio'
+        GROUP BY parent
+    """, {"parents": parents}))
+
+    for row in rows:
+        if not row.get("idx"):
+            row.idx = last_idx[row.parent] = cint(last_idx.get(row.parent)) + 1
+
+def bulk_insert_transactions(rows, ignore_duplicates=False):
+    """
+    Writes Folio Transaction rows with a single multi-row INSERT.
+    Document hooks do NOT run: callers are responsible for mirroring and
+    for calling apply_transaction_deltas with the inserted rows.
+    """
+    if not rows:
+        return
+
+    frappe.db.bulk_insert("Folio Transaction",
+        fields=TRANSACTION_INSERT_FIELDS,
+        values=get_transaction_values(rows),
+        ignore_duplicates=ignore_duplicates
+    )
+    invalidate_posting_dates(rows)
+
+def insert_mirror_transaction(row):
+    """
+    Insert of a single mirror row that skips duplicates. The unique (parent, mirror_of) index
+    is the duplicate guard, so concurrent posters (POS bridge, night audit, check-in) can never
+    mirror the same transaction twice, and no exists() probe is needed. Only that index's
+    violation is skipped: any other error (truncation, bad date, NOT NULL) is raised.
+    Applies the balance delta only if the row was actually written. Returns True if it was.
+    """
+    columns = ", ".join(f"`{f}`" for f in TRANSACTION_INSERT_FIELDS)
+    placeholders = ", ".join(["%s"] * len(TRANSACTION_INSERT_FIELDS))
+
+    try:
+        frappe.db.sql(
+            f"INSERT INTO `tabFolio Transaction` ({columns}) VALUES ({placeholders})",
+            get_transaction_values([row])[0]
+        )
+    except Exception as e:
+        # A failed statement does not abort the transaction on MariaDB
+        if frappe.db.is_unique_key_violation(e) and MIRROR_CONSTRAINT in str(e):
+            return False
+        raise
+
+    invalidate_posting_dates([row])
+    apply_transaction_deltas([row])
+    return True
 
 @frappe.whitelist()
 def move_transactions(transaction_names, target_folio):
     """
-    Moves selected transactions from Source Folio to Target Folio.
+    Moves selected transactions from one or more Source Folios to the Target Folio.
+    Set-based: one locking query validates every row, one UPDATE reparents them,
+    one Comment on the Target Folio records the move, and each affected folio's
+    balance is shifted once.
     """
     if isinstance(transaction_names, str):
         import json
@@ -233,53 +615,217 @@ def move_transactions(transaction_names, target_folio):
     if not transaction_names:
         frappe.throw(_("No transactions selected"))
 
-    target_doc = frappe.get_doc("Guest Folio", target_folio)
-    if target_doc.status != "Open":
+    target_doc = get_folio_header(target_folio)
+    if not target_doc or target_doc.status != "Open":
         frappe.throw(_("Target Folio must be Open"))
 
-    source_folio_name = None
-
-    for txn_name in transaction_names:
-        txn = frappe.get_doc("Folio Transaction", txn_name)
-        
-        if txn.is_invoiced:
-            frappe.throw(_("Cannot move invoiced transaction: {0}").format(txn.description))
-            
-        source_folio_name = txn.parent
-        
-        # Move: Update Parent
-        frappe.db.set_value("Folio Transaction", txn.name, "parent", target_folio)
-        
-        # Audit Trail
-        txn.add_comment("Info", _("Moved from Folio {0} to {1}").format(source_folio_name, target_folio))
-
-    # Sync Balances for both
-    if source_folio_name:
-        sync_folio_balance(frappe.get_doc("Guest Folio", source_folio_name))
-    
-    sync_folio_balance(target_doc)
-    
+    # 1. Validate (and lock) all rows in one query
+    transactions = frappe.db.sql("""
+        SELECT ft.name, ft.parent, ft.posting_date, ft.amount, ft.is_void, ft.is_invoiced, ft.description,
+            dup.name as target_mirror
+        FROM `tabFolio Transaction` ft
+        LEFT JOIN `tabFolio Transaction` dup
+            ON dup.parent = %(target)s
+            AND dup.mirror_of = ft.mirror_of
+            AND dup.name != ft.name
+        WHERE ft.name IN %(names)s
+        FOR UPDATE
+    """, {"names": list(set(transaction_names)), "target": target_folio}, as_dict=True)
+
+    missing = set(transaction_names) - {t.name for t in transactions}
+    if missing:
+        frappe.throw(_("Transactions not found: {0}").format(", ".join(sorted(missing))))
+
+    invoiced = [t.description for t in transactions if t.is_invoiced]
+    if invoiced:
+        frappe.throw(_("Cannot move invoiced transaction: {0}").format(", ".join(invoiced)))
+
+    duplicated = [t.description for t in transactions if t.target_mirror]
+    if duplicated:
+        frappe.throw(_("Target Folio already holds a copy of: {0}").format(", ".join(duplicated)))
+
+    moved = [t for t in transactions if t.parent != target_folio]
+    if not moved:
+        return True
+
+    # 2. Move: Update Parent and shift balances
+    reparent_transactions(moved, target_folio)
+
+    # 3. Audit Trail: one entry listing every moved row per source
+    by_source = {}
+    for t in moved:
+        by_source.setdefault(t.parent, []).append(t.name)
+
+    frappe.get_doc({
+        "doctype": "Comment",
+        "comment_type": "Info",
+        "reference_doctype": "Guest Folio",
+        "reference_name": target_folio,
+        "content": "<br>".join(
+            _("Moved {0} transaction(s) from Folio {1} to {2}: {3}").format(len(names), source, target_folio, ", ".join(names))
+            for source, names in by_source.items()
+        )
+    }).insert(ignore_permissions=True)
+
     return True
+
+def reparent_transactions(rows, target_folio):
+    """
+    Moves already validated rows (name, parent, posting_date, amount, is_void) to target_folio
+    with one UPDATE, then shifts each affected folio's balance: out of each source, into the target.
+    """
+    if not rows:
+        return
+
+    frappe.db.sql("""
+        UPDATE `tabFolio Transaction`
+        SET parent = %(target)s, modified = %(now)s, modified_by = %(user)s
+        WHERE name IN %(names)s
+    """, {
+        "target": target_folio,
+        "now": frappe.utils.now(),
+        "user": frappe.session.user,
+        "names": [t.name for t in rows]
+    })
+
+    invalidate_posting_dates(rows)
+    apply_transaction_deltas(rows, sign=-1)
+    apply_transaction_deltas([frappe._dict(t, parent=target_folio) for t in rows])
+
+def is_lazy_folio(folio_name):
+    """
+    True when a folio holds more transactions than the lazy-load threshold.
+    The count stops at threshold + 1 rows, so a 50k-line folio costs the same as a small one.
+    """
+    threshold = cint(frappe.db.get_single_value("Hospitality Settings", "folio_lazy_threshold")) or DEFAULT_LAZY_THRESHOLD
+    count = frappe.db.sql("""
+        SELECT COUNT(*) FROM (
+            SELECT name FROM `tabFolio Transaction`
+            WHERE parent = %s AND parenttype = 'Guest Folio'
+            LIMIT %s
+        ) t
+    """, (folio_name, threshold + 1))[0][0]
+    return count > threshold
+
+@frappe.whitelist()
+def getdoc(doctype, name, user=None):
+    """
+    Override of frappe.desk.form.load.getdoc (hooks: override_whitelisted_methods).
+    Large Guest Folios are loaded and sent without their transactions table, and archived
+    Guest Folios / Hotel Reservations are served read-only from the archive tables;
+    every other document goes through unchanged.
+    """
+    from frappe.desk.form.load import getdoc as load_doc
+
+    if doctype in ("Guest Folio", "Hotel Reservation") and name and not frappe.db.exists(doctype, name):
+        if load_archived_doc(doctype, name):
+            return
+
+    if doctype == "Guest Folio" and name and is_lazy_folio(name):
+        frappe.flags.lazy_folio = name
+
+    return load_doc(doctype, name, user)
+
+@frappe.whitelist()
+def get_folio_transactions(folio, from_date=None, to_date=None, bill_to=None, item=None,
+    is_void=None, is_invoiced=None, start=0, page_length=100, search=None, order="asc"):
+    """
+    One page of a folio's transactions, filtered server-side, in posting order
+    (newest first with order="desc"). search matches the item, description or name.
+    Each row carries the running balance (non-void amounts) up to and including it,
+    computed in SQL over the filtered set. The count and totals of the whole filtered
+    set come back with the page, so the form never needs the full child table.
+    """
+    frappe.has_permission("Guest Folio", "read", folio, throw=True)
+
+    conditions = ["ft.parent = %(folio)s", "ft.parenttype = 'Guest Folio'"]
+    values = {
+        "folio": folio,
+        "start": max(cint(start), 0),
+        "page_length": min(cint(page_length) or 100, MAX_PAGE_LENGTH)
+    }
+
+    if from_date:
+        conditions.append("ft.posting_date >= %(from_date)s")
+        values["from_date"] = getdate(from_date)
+    if to_date:
+        conditions.append("ft.posting_date <= %(to_date)s")
+        values["to_date"] = getdate(to_date)
+    if bill_to:
+        conditions.append("ft.bill_to = %(bill_to)s")
+        values["bill_to"] = bill_to
+    if item:
+        conditions.append("ft.item = %(item)s")
+        values["item"] = item
+    if is_void not in (None, ""):
+        conditions.append("ft.is_void = %(is_void)s")
+        values["is_void"] = cint(is_void)
+    if is_invoiced not in (None, ""):
+        conditions.append("ft.is_invoiced = %(is_invoiced)s")
+        values["is_invoiced"] = cint(is_invoiced)
+    if search:
+        conditions.append("(ft.item LIKE %(search)s OR ft.description LIKE %(search)s OR ft.name LIKE %(search)s)")
+        values["search"] = f"%{search}%"
+
+    where = " AND ".join(conditions)
+    direction = "DESC" if order == "desc" else "ASC"
+
+    # 1. The page, with the running balance over everything before it
+    rows = frappe.db.sql(f"""
+        SELECT * FROM (
+            SELECT ft.name, ft.posting_date, ft.creation, ft.item, ft.description, ft.qty,
+                ft.amount, ft.bill_to, ft.is_void, ft.void_reason, ft.is_invoiced,
+                ft.reference_doctype, ft.reference_name,
+                SUM(CASE WHEN ft.is_void = 0 THEN ft.amount ELSE 0 END) OVER (
+                    ORDER BY ft.posting_date, ft.creation, ft.name
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                ) as running_balance
+            FROM `tabFolio Transaction` ft
+            WHERE {where}
+        ) t
+        ORDER BY t.posting_date {direction}, t.creation {direction}, t.name {direction}
+        LIMIT %(start)s, %(page_length)s
+    """, values, as_dict=True)
+
+    # 2. Count and totals of the filtered set
+    totals = frappe.db.sql(f"""
+        SELECT COUNT(*) as total_count,
+            SUM(CASE WHEN ft.is_void = 0 AND ft.amount > 0 THEN ft.amount ELSE 0 END) as charges,
+            SUM(CASE WHEN ft.is_void = 0 AND ft.amount < 0 THEN ABS(ft.amount) ELSE 0 END) as payments
+        FROM `tabFolio Transaction` ft
+        WHERE {where}
+    """, values, as_dict=True)[0]
+
+    return {
+        "rows": rows,
+        "start": values["start"],
+        "page_length": values["page_length"],
+        "total_count": cint(totals.total_count),
+        "total_charges": flt(totals.charges),
+        "total_payments": flt(totals.payments),
+        "balance": flt(totals.charges) - flt(totals.payments)
+    }
+
 @frappe.whitelist()
 def debug_folio_totals(folio_name):
     """
     Diagnostic tool to see raw SQL vs field values.
     """
     totals = frappe.db.sql("""
-        SELECT 
+        SELECT
             SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END) as charges,
             SUM(CASE WHEN amount < 0 THEN ABS(amount) ELSE 0 END) as payments
         FROM `tabFolio Transaction`
         WHERE parent = %s AND is_void = 0
     """, (folio_name,), as_dict=True)[0]
-    
+
     doc = frappe.get_doc("Guest Folio", folio_name)
-    
-    txns = frappe.db.get_all("Folio Transaction", 
+
+    txns = frappe.db.get_all("Folio Transaction",
         filters={"parent": folio_name, "is_void": 0},
         fields=["name", "item", "description", "amount"]
     )
-    
+
     return {
         "sql_totals": totals,
         "doc_fields": {
@@ -297,7 +843,7 @@ def record_guest_balance(folio_doc):
     """
     if flt(folio_doc.outstanding_balance) < -0.01:
         credit_amount = abs(flt(folio_doc.outstanding_balance))
-        
+
         # Check if already recorded to avoid duplicates
         if not frappe.db.exists("Guest Balance Ledger", {"folio": folio_doc.name}):
             ledger_entry = frappe.new_doc("Guest Balance Ledger")
@@ -306,7 +852,7 @@ def record_guest_balance(folio_doc):
             ledger_entry.amount = credit_amount
             ledger_entry.status = "Available"
             ledger_entry.insert(ignore_permissions=True)
-            
+
             frappe.msgprint(_("Recorded credit balance of {0} for Guest {1} in Balance Ledger.").format(
                 frappe.format(credit_amount, "Currency"), folio_doc.guest
             ))
@@ -318,7 +864,7 @@ def transfer_existing_balances(folio_doc):
     if not folio_doc.guest:
         return
 
-    available_balances = frappe.get_all("Guest Balance Ledger", 
+    available_balances = frappe.get_all("Guest Balance Ledger",
         filters={"guest": folio_doc.guest, "status": "Available"},
         fields=["name", "amount", "folio"]
     )
@@ -341,7 +887,7 @@ def transfer_existing_balances(folio_doc):
             "amount": -1 * flt(balance.amount), # Payment (Credit)
             "is_void": 0
         })
-        
+
         # Ensure BALANCE-TRANSFER item exists
         if not frappe.db.exists("Item", "BALANCE-TRANSFER"):
             item = frappe.new_doc("Item")
@@ -350,19 +896,18 @@ def transfer_existing_balances(folio_doc):
             item.item_group = "Services"
             item.is_stock_item = 0
             item.insert(ignore_permissions=True)
-            
+
         txn.insert(ignore_permissions=True)
-        
+
         # Update Ledger Status
         frappe.db.set_value("Guest Balance Ledger", balance.name, {
             "status": "Transferred",
             "transferred_to_folio": folio_doc.name
         })
-        
+
         total_transferred += flt(balance.amount)
 
     if total_transferred > 0:
-        sync_folio_balance(folio_doc)
         frappe.msgprint(_("Transferred {0} from previous credit balances to this folio.").format(
             frappe.format(total_transferred, "Currency")
         ))
@@ -1,11 +1,14 @@
 import frappe
 from frappe import _
+
+from hospitality_core.hospitality_core.api.master_folio import invalidate_master_folio
 from hospitality_core.hospitality_core.api.reservation import check_bulk_availability
 
+
 @frappe.whitelist()
 def create_master_folio(group_booking_name):
     doc = frappe.get_doc("Hotel Group Booking", group_booking_name)
-    
+
     if doc.master_folio:
         frappe.throw(_("Master Folio already exists: {0}").format(doc.master_folio))
 
@@ -15,7 +18,7 @@ def create_master_folio(group_booking_name):
     # Create a "Dummy" Guest record for the Group if needed, or link to a generic placeholder.
     # Ideally, we create a Guest record representing the Event Organizer.
     # For this implementation, we assume a Guest record exists or we create one on the fly.
-    
+
     organizer_guest = frappe.db.get_value("Guest", {"customer": doc.master_payer}, "name")
     if not organizer_guest:
         # Create a proxy guest for the company
@@ -32,10 +35,11 @@ def create_master_folio(group_booking_name):
     # We don't link a specific room or reservation, but we flag it as a Group Master
     folio.status = "Open"
     folio.save(ignore_permissions=True)
-    
+
     # Link back
     doc.db_set("master_folio", folio.name)
-    
+    invalidate_master_folio("group", {doc.name})
+
     return folio.name
 
 @frappe.whitelist()
@@ -46,7 +50,7 @@ def add_rooms_to_group(group_booking, rooms):
     """
     import json
     room_list = json.loads(rooms)
-    
+
     # room_list might be strings (IDs) or objects depending on client input
     for res_data in room_list:
         res_name = res_data if isinstance(res_data, str) else res_data.get('name') or res_data.get('hotel_reservation')
@@ -55,7 +59,7 @@ def add_rooms_to_group(group_booking, rooms):
                 "group_booking": group_booking,
                 "is_group_guest": 1 # Auto-flag as group guest
             })
-        
+
     return True
 
 @frappe.whitelist()
@@ -63,14 +67,14 @@ def mass_check_in(group_booking):
     """
     Finds all 'Reserved' bookings linked to this group and checks them in.
     """
-    reservations = frappe.get_all("Hotel Reservation", 
+    reservations = frappe.get_all("Hotel Reservation",
         filters={"group_booking": group_booking, "status": "Reserved"},
         fields=["name"]
     )
-    
+
     if not reservations:
         return {"message": _("No reserved bookings found for this group.")}
-        
+
     count = 0
     errors = []
     for r in reservations:
@@ -81,11 +85,11 @@ def mass_check_in(group_booking):
         except Exception as e:
             err_msg = str(e) or _("Unknown error")
             errors.append(f"<b>{r.name}</b>: {err_msg}")
-            
+
     res_msg = _("Successfully Checked In {0} guests.").format(count)
     if errors:
         res_msg += "<br><br>" + _("<b>Failures:</b>") + "<br><ul><li>" + "</li><li>".join(errors) + "</li></ul>"
-        
+
     return {"message": res_msg, "success_count": count, "error_count": len(errors)}
 
 @frappe.whitelist()
@@ -93,14 +97,14 @@ def mass_check_out(group_booking):
     """
     Finds all 'Checked In' bookings linked to this group and checks them out.
     """
-    reservations = frappe.get_all("Hotel Reservation", 
+    reservations = frappe.get_all("Hotel Reservation",
         filters={"group_booking": group_booking, "status": "Checked In"},
         fields=["name"]
     )
-    
+
     if not reservations:
         return {"message": _("No in-house guests found for this group to check out.")}
-        
+
     count = 0
     errors = []
     for r in reservations:
@@ -111,13 +115,13 @@ def mass_check_out(group_booking):
         except Exception as e:
             err_msg = str(e) or _("Unknown error")
             errors.append(f"<b>{r.name}</b>: {err_msg}")
-            
+
     res_msg = _("Successfully Checked Out {0} guests.").format(count)
     if errors:
         res_msg += "<br><br>" + _("<b>Failures:</b>") + "<br><ul><li>" + "</li><li>".join(errors) + "</li></ul>"
-            
+
     return {"message": res_msg, "success_count": count, "error_count": len(errors)}
-    
+
 @frappe.whitelist()
 def bulk_reserve_rooms(group_booking, guest, rooms, arrival_date, departure_date):
     """
@@ -126,15 +130,15 @@ def bulk_reserve_rooms(group_booking, guest, rooms, arrival_date, departure_date
     """
     import json
     room_list = json.loads(rooms)
-    
+
     group_doc = frappe.get_doc("Hotel Group Booking", group_booking)
-    
+
     # Comprehensive Availability Verification
     check_bulk_availability(room_list, arrival_date, departure_date)
 
     created_reservations = []
     errors = []
-    
+
     for room in room_list:
         try:
             # Create Hotel Reservation
@@ -148,15 +152,15 @@ def bulk_reserve_rooms(group_booking, guest, rooms, arrival_date, departure_date
             res.group_booking = group_booking
             res.is_group_guest = 1
             res.company = group_doc.master_payer
-            
+
             # Validation will happen on insert (availability check etc.)
             res.insert()
             created_reservations.append(res.name)
         except Exception as e:
             err_msg = str(e) or _("Unknown error")
             errors.append(f"<b>Room {room}</b>: {err_msg}")
-        
+
     return {
         "created": created_reservations,
         "errors": errors
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,307 @@
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, date_diff, getdate, nowdate
+
+from hospitality_core.hospitality_core.api.stay_counts import count_nights, get_overlapping_stays
+
+# Reservation status -> Room Type Inventory counter its nights count against
+STAY_COLUMNS = {"Reserved": "held", "Checked In": "sold"}
+DEFAULT_HORIZON = 365
+
+def get_stay_state(res, **overrides):
+    """
+    The part of a reservation the inventory depends on.
+    """
+    state = frappe._dict({
+        "room_type": res.get("room_type"),
+        "arrival_date": getdate(res.get("arrival_date")) if res.get("arrival_date") else None,
+        "departure_date": getdate(res.get("departure_date")) if res.get("departure_date") else None,
+        "status": res.get("status")
+    })
+    state.update(overrides)
+    return state
+
+# --- Maintenance (inside the reservation's transaction) ---
+
+def update_stay(before, after):
+    """
+    Moves a reservation's contribution from its before state to its after state
+    (either may be None). Only the nights that actually change are touched.
+    """
+    for room_type, column, from_date, to_date, delta in get_night_deltas(before, after):
+        apply_night_delta(room_type, column, from_date, to_date, delta)
+
+def get_night_deltas(before, after):
+    """
+    [(room_type, column, from_date, to_date, delta)] turning before into after.
+    """
+    def key(state):
+        column = STAY_COLUMNS.get(state.status) if state else None
+        if not column or not state.room_type or not state.arrival_date or not state.departure_date:
+            return None
+        return (state.room_type, column)
+
+    before_key, after_key = key(before), key(after)
+
+    if before_key != after_key:
+        deltas = []
+        if before_key:
+            deltas.append((*before_key, before.arrival_date, before.departure_date, -1))
+        if after_key:
+            deltas.append((*after_key, after.arrival_date, after.departure_date, 1))
+        return deltas
+
+    if not before_key:
+        return []
+
+    # Same counter: only the nights in one range and not the other change
+    deltas = []
+    for (a1, d1), (a2, d2), delta in (
+        ((before.arrival_date, before.departure_date), (after.arrival_date, after.departure_date), -1),
+        ((after.arrival_date, after.departure_date), (before.arrival_date, before.departure_date), 1)
+    ):
+        for from_date, to_date in ((a1, min(d1, a2)), (max(a1, d2), d1)):
+            if from_date < to_date:
+                deltas.append((*before_key, from_date, to_date, delta))
+    return deltas
+
+def apply_night_delta(room_type, column, from_date, to_date, delta):
+    """
+    Adds delta to one counter for the nights [from_date, to_date) with one relative UPDATE.
+    Nights of the maintained window without a row yet are created afterwards from the
+    reservations (which already include this change); nights outside it are not stored.
+    """
+    frappe.db.sql(f"""
+        UPDATE `tabRoom Type Inventory`
+        SET `{column}` = `{column}` + %(delta)s
+        WHERE room_type = %(room_type)s
+        AND inventory_date >= %(from_date)s AND inventory_date < %(to_date)s
+    """, {"delta": delta, "room_type": room_type, "from_date": from_date, "to_date": to_date})
+
+    window = get_window(from_date, add_days(to_date, -1))
+    if window:
+        ensure_inventory_rows([room_type], *window)
+
+def on_reservation_change(doc, method=None):
+    """
+    Hook: Hotel Reservation on_update / on_trash. Status changes written with db_set
+    (check-in, check-out, cancel) go through HotelReservation.set_status instead.
+    """
+    if method == "on_trash":
+        update_stay(get_stay_state(doc), None)
+        return
+
+    before = doc.get_doc_before_save()
+    update_stay(get_stay_state(before) if before else None, get_stay_state(doc))
+
+def on_room_change(doc, method=None):
+    """
+    Hook: Hotel Room on_update / on_trash. Refreshes total / out-of-order counts from today on.
+    """
+    before = doc.get_doc_before_save() if method != "on_trash" else None
+    refresh_room_counts({doc.room_type, before.room_type if before else None})
+
+def refresh_room_counts(room_types):
+    room_types = [rt for rt in room_types if rt]
+    if not room_types:
+        return
+
+    counts = get_room_counts(room_types)
+    for room_type in room_types:
+        total, out_of_order = counts.get(room_type, (0, 0))
+        frappe.db.sql("""
+            UPDATE `tabRoom Type Inventory`
+            SET total_rooms = %(total)s, out_of_order = %(out_of_order)s
+            WHERE room_type = %(room_type)s AND inventory_date >= %(today)s
+        """, {"total": total, "out_of_order": out_of_order, "room_type": room_type, "today": nowdate()})
+
+def get_room_counts(room_types=None):
+    """
+    {room_type: (enabled rooms, of which Out of Order)} from the current room master.
+    """
+    condition = "AND room_type IN %(room_types)s" if room_types else ""
+    return {
+        row[0]: (cint(row[1]), cint(row[2]))
+        for row in frappe.db.sql(f"""
+            SELECT room_type, COUNT(*), SUM(status = 'Out of Order')
+            FROM `tabHotel Room`
+            WHERE is_enabled = 1 {condition}
+            GROUP BY room_type
+        """, {"room_types": room_types})
+    }
+
+# --- Building rows ---
+
+def ensure_inventory_rows(room_types, from_date, to_date):
+    """
+    Creates the inventory rows missing for room_types over [from_date, to_date],
+    counted from the reservations. Existing rows are left alone.
+    """
+    from_date, to_date = getdate(from_date), getdate(to_date)
+    if not room_types or from_date > to_date:
+        return
+
+    expected = len(room_types) * (date_diff(to_date, from_date) + 1)
+    existing = set(frappe.db.sql("""
+        SELECT room_type, inventory_date FROM `tabRoom Type Inventory`
+        WHERE room_type IN %(room_types)s
+        AND inventory_date BETWEEN %(from_date)s AND %(to_date)s
+    """, {"room_types": list(room_types), "from_date": from_date, "to_date": to_date}))
+
+    if len(existing) >= expected:
+        return
+
+    rows = [
+        row for row in build_inventory_rows(room_types, from_date, to_date)
+        if (row["room_type"], row["inventory_date"]) not in existing
+    ]
+    insert_inventory_rows(rows)
+
+def build_inventory_rows(room_types, from_date, to_date):
+    """
+    Inventory rows for every room type and date in [from_date, to_date], computed rather than
+    stored: room counts from the room master, sold / held from one query over the overlapping
+    reservations, swept into per-night counts (see stay_counts.count_nights).
+    """
+    from_date, to_date = getdate(from_date), getdate(to_date)
+    days = date_diff(to_date, from_date) + 1
+    room_counts = get_room_counts(list(room_types))
+
+    stays = get_overlapping_stays(from_date, to_date, STAY_COLUMNS,
+        ["room_type", "status", "arrival_date", "departure_date"], room_types)
+    counts = count_nights(
+        (((res.room_type, STAY_COLUMNS[res.status]), res.arrival_date, res.departure_date) for res in stays),
+        from_date, to_date
+    )
+    empty = [0] * days
+
+    rows = []
+    for room_type in room_types:
+        total, out_of_order = room_counts.get(room_type, (0, 0))
+        sold = counts.get((room_type, "sold"), empty)
+        held = counts.get((room_type, "held"), empty)
+        for i in range(days):
+            rows.append({
+                "room_type": room_type,
+                "inventory_date": getdate(add_days(from_date, i)),
+                "total_rooms": total,
+                "out_of_order": out_of_order,
+                "sold": sold[i],
+                "held": held[i]
+            })
+    return rows
+
+def insert_inventory_rows(rows):
+    if not rows:
+        return
+
+    now = frappe.utils.now()
+    user = frappe.session.user
+
+    # IGNORE: a concurrent transaction may have created the same rows first
+    frappe.db.bulk_insert("Room Type Inventory",
+        fields=[
+            "name", "creation", "modified", "owner", "modified_by", "docstatus",
+            "room_type", "inventory_date", "total_rooms", "out_of_order", "sold", "held"
+        ],
+        values=[
+            (frappe.generate_hash(length=10), now, now, user, user, 0,
+                row["room_type"], row["inventory_date"], row["total_rooms"],
+                row["out_of_order"], row["sold"], row["held"])
+            for row in rows
+        ],
+        ignore_duplicates=True
+    )
+
+# --- Reading ---
+
+def get_horizon_end():
+    horizon = cint(frappe.db.get_single_value("Hospitality Settings", "inventory_horizon")) or DEFAULT_HORIZON
+    return getdate(add_days(nowdate(), horizon - 1))
+
+def get_window(from_date, to_date):
+    """
+    The part of [from_date, to_date] inside the maintained window (today to the end of the
+    horizon) as (from, to), or None.
+    """
+    from_date = max(getdate(from_date), getdate(nowdate()))
+    to_date = min(getdate(to_date), get_horizon_end())
+    return (from_date, to_date) if from_date <= to_date else None
+
+def get_room_types():
+    return frappe.get_all("Hotel Room Type", pluck="name")
+
+def get_inventory(from_date, to_date, room_types=None):
+    """
+    Inventory of [from_date, to_date] by date and room type. Dates inside the maintained window
+    are one indexed range read of Room Type Inventory; dates before today or past the horizon
+    are computed in one pass by build_inventory_rows. Either way the cost does not grow with
+    a query per day.
+    Each row also carries available = total - out of order - sold - held (never below 0).
+    """
+    from_date, to_date = getdate(from_date), getdate(to_date)
+    room_types = room_types or get_room_types()
+    if not room_types or from_date > to_date:
+        return []
+
+    rows = []
+    window = get_window(from_date, to_date)
+    if window:
+        ensure_inventory_rows(room_types, *window)
+        rows = frappe.db.sql("""
+            SELECT room_type, inventory_date, total_rooms, out_of_order, sold, held
+            FROM `tabRoom Type Inventory`
+            WHERE room_type IN %(room_types)s
+            AND inventory_date BETWEEN %(from_date)s AND %(to_date)s
+        """, {"room_types": list(room_types), "from_date": window[0], "to_date": window[1]}, as_dict=True)
+
+    outside = [(from_date, to_date)] if not window else [
+        (from_date, add_days(window[0], -1)),
+        (add_days(window[1], 1), to_date)
+    ]
+    for start, end in outside:
+        if getdate(start) <= getdate(end):
+            rows += [frappe._dict(row) for row in build_inventory_rows(room_types, start, end)]
+
+    for row in rows:
+        row.inventory_date = getdate(row.inventory_date)
+        row.available = max(row.total_rooms - row.out_of_order - row.sold - row.held, 0)
+
+    return sorted(rows, key=lambda row: (row.inventory_date, row.room_type))
+
+@frappe.whitelist()
+def get_room_type_availability(room_type, arrival_date, departure_date):
+    """
+    Rooms of a type that can still be sold for every night of [arrival_date, departure_date),
+    without choosing a room.
+    """
+    if date_diff(departure_date, arrival_date) <= 0:
+        frappe.throw(_("Departure Date must be after Arrival Date."))
+
+    rows = get_inventory(arrival_date, add_days(departure_date, -1), [room_type])
+    return min(row.available for row in rows) if rows else 0
+
+# --- Scheduled Jobs / Repairs ---
+
+def extend_inventory_horizon():
+    """
+    Scheduled Job (daily): makes sure every room type has rows up to the end of the horizon
+    and drops the rows of past dates (those are computed on read, see get_inventory).
+    """
+    frappe.db.sql("DELETE FROM `tabRoom Type Inventory` WHERE inventory_date < %s", (nowdate(),))
+    ensure_inventory_rows(get_room_types(), nowdate(), get_horizon_end())
+
+@frappe.whitelist()
+def rebuild_room_type_inventory(from_date=None, to_date=None):
+    """
+    Reconciliation: recounts the stored inventory from the reservations and the room master
+    for [from_date, to_date] (default: the whole maintained window).
+    """
+    frappe.only_for("System Manager")
+
+    window = get_window(from_date or nowdate(), to_date or get_horizon_end())
+    if not window:
+        return
+
+    frappe.db.delete("Room Type Inventory", {"inventory_date": ["between", list(window)]})
+    insert_inventory_rows(build_inventory_rows(get_room_types(), *window))
@@ -0,0 +1,122 @@
+import frappe
+
+# Redis hash: "company::<customer>" / "group::<group booking>" -> master folio name ("" = none)
+CACHE_KEY = "hospitality_master_folios"
+
+def get_company_master(company):
+    """
+    Open Company Master Folio for a Customer, or None.
+    """
+    return get_company_masters([company]).get(company) if company else None
+
+def get_group_master(group_booking):
+    """
+    Master Folio of a Hotel Group Booking, or None.
+    """
+    return get_group_masters([group_booking]).get(group_booking) if group_booking else None
+
+def get_company_masters(companies):
+    """
+    {company: open master folio} for the given Customers, served from cache.
+    Companies without an open master are omitted.
+    """
+    return resolve("company", companies, load_company_masters)
+
+def get_group_masters(group_bookings):
+    """
+    {group booking: master folio} for the given Hotel Group Bookings, served from cache.
+    """
+    return resolve("group", group_bookings, load_group_masters)
+
+def resolve(kind, keys, loader):
+    """
+    Lookup order: frappe.local (per request) -> Redis -> one query for everything still missing.
+    Misses are cached as "" so that keys without a master do not query every time either.
+    """
+    keys = {k for k in keys if k}
+    local = getattr(frappe.local, "master_folios", None)
+    if local is None:
+        local = frappe.local.master_folios = {}
+    missing = [k for k in keys if (kind, k) not in local]
+
+    if missing:
+        cache = frappe.cache()
+        not_cached = []
+        for key in missing:
+            master = cache.hget(CACHE_KEY, get_cache_field(kind, key))
+            if master is None:
+                not_cached.append(key)
+            else:
+                local[(kind, key)] = master
+
+        if not_cached:
+            loaded = loader(not_cached)
+            for key in not_cached:
+                master = loaded.get(key) or ""
+                cache.hset(CACHE_KEY, get_cache_field(kind, key), master)
+                local[(kind, key)] = master
+
+    return {k: local[(kind, k)] for k in keys if local[(kind, k)]}
+
+def load_company_masters(companies):
+    masters = {}
+    for master in frappe.get_all("Guest Folio",
+        filters={"company": ["in", companies], "status": "Open", "is_company_master": 1},
+        fields=["name", "company"],
+        order_by="creation asc"
+    ):
+        masters.setdefault(master.company, master.name)
+    return masters
+
+def load_group_masters(group_bookings):
+    return dict(frappe.get_all("Hotel Group Booking",
+        filters={"name": ["in", group_bookings]},
+        fields=["name", "master_folio"],
+        as_list=True
+    ))
+
+def get_cache_field(kind, key):
+    return f"{kind}::{key}"
+
+def invalidate_master_folio(kind, keys):
+    """
+    Drops resolver entries now and again after commit, so that a concurrent reader
+    cannot re-cache the old master between the two.
+    """
+    keys = {k for k in keys if k}
+    if not keys:
+        return
+
+    def clear():
+        cache = frappe.cache()
+        for key in keys:
+            cache.hdel(CACHE_KEY, get_cache_field(kind, key))
+        local = getattr(frappe.local, "master_folios", None) or {}
+        for key in keys:
+            local.pop((kind, key), None)
+
+    clear()
+    frappe.db.after_commit.add(clear)
+
+# --- Document Events ---
+
+def on_folio_change(doc, method=None):
+    """
+    Hook: Guest Folio on_update / on_trash.
+    A Company Master Folio that is created, opened, closed or re-pointed changes
+    the company's open master.
+    """
+    before = doc.get_doc_before_save() if method != "on_trash" else None
+    if not doc.is_company_master and not (before and before.is_company_master):
+        return
+
+    if before and all(before.get(f) == doc.get(f) for f in ("status", "company", "is_company_master")):
+        return
+
+    invalidate_master_folio("company", {doc.company, before.company if before else None})
+
+def on_group_booking_change(doc, method=None):
+    """
+    Hook: Hotel Group Booking on_update / on_trash.
+    """
+    invalidate_master_folio("group", {doc.name})
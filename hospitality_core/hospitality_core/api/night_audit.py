@@ -1,7 +1,132 @@
+import json
+import time
+from contextlib import contextmanager
+
 import frappe
 from frappe import _
-from frappe.utils import add_days, nowdate, getdate, flt
-from hospitality_core.hospitality_core.api.folio import sync_folio_balance, mirror_to_company_folio, mirror_to_group_folio
+from frappe.utils import add_days, cint, flt, getdate, now_datetime, nowdate
+
+from hospitality_core.hospitality_core.api import rate_calendar
+from hospitality_core.hospitality_core.api.availability import invalidate_rooms
+from hospitality_core.hospitality_core.api.daily_statistics import record_after_audit
+from hospitality_core.hospitality_core.api.folio import (
+    apply_transaction_deltas,
+    bulk_insert_transactions,
+    flush_balance_deltas,
+    get_folio_headers,
+    get_mirror_reference,
+    make_mirror_row,
+    mirror_to_company_folio,
+    mirror_to_group_folio,
+    new_transaction_row,
+)
+from hospitality_core.hospitality_core.api.inventory import get_stay_state, update_stay
+from hospitality_core.hospitality_core.api.master_folio import get_company_masters, get_group_masters
+from hospitality_core.hospitality_core.api.rate_calendar import get_rate_key, get_rates
+from hospitality_core.hospitality_core.api.report_cache import invalidate_stay
+from hospitality_core.hospitality_core.api.reservation_lock import extend_stay
+
+# Reservation fields needed to price and route a night
+AUDIT_RESERVATION_FIELDS = [
+    "name", "guest", "room", "room_type", "rate_plan",
+    "arrival_date", "departure_date", "company", "folio",
+    "is_complimentary", "discount_type", "discount_value",
+    "is_company_guest", "is_group_guest", "group_booking"
+]
+
+CHUNKED_MODE = "Chunked (Background Workers)"
+CHUNK_TERMINAL_STATUSES = ("Completed", "Failed")
+
+class AuditMetrics:
+    """
+    Counters plus wall time and query count per phase for one audit execution.
+    Serialised into a Night Audit Run (or a Night Audit Chunk in chunked mode).
+    """
+    def __init__(self):
+        self.counters = {"reservations_scanned": 0, "rooms_charged": 0, "overstays_extended": 0}
+        self.phases = {}
+        self.errors = []
+
+    def count(self, counter, value):
+        self.counters[counter] += cint(value)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Times the block and counts every frappe.db.sql call made inside it
+        (get_value, get_all, bulk_insert etc. all go through frappe.db.sql).
+        Phases may nest, also across AuditMetrics: a query is counted once, against the
+        innermost open phase, and a phase re-entered while open is not timed twice.
+        """
+        stack = start_query_count()
+        timing = self.phases.setdefault(name, {"duration": 0.0, "queries": 0})
+        reentered = any(open_timing is timing for open_timing in stack)
+        stack.append(timing)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            stack.pop()
+            if not reentered:
+                timing["duration"] += time.monotonic() - started
+            if not stack:
+                stop_query_count()
+
+    def merge(self, other):
+        """
+        Adds another execution's metrics (dict form) into this one.
+        """
+        for counter, value in other["counters"].items():
+            self.count(counter, value)
+        for name, timing in other["phases"].items():
+            total = self.phases.setdefault(name, {"duration": 0.0, "queries": 0})
+            total["duration"] += timing["duration"]
+            total["queries"] += timing["queries"]
+        self.errors.extend(other["errors"])
+
+    def as_dict(self):
+        return {"counters": self.counters, "phases": self.phases, "errors": self.errors}
+
+def start_query_count():
+    """
+    Wraps frappe.db.sql of the current connection once, however many phases are open,
+    and returns the stack of open phase timings the wrapper adds each query to.
+    State lives on the connection object itself (not the frappe.db proxy), so each
+    thread / worker counts its own queries only.
+    """
+    db = frappe.local.db
+    stack = vars(db).get("audit_phase_stack")
+    if stack is not None:
+        return stack
+
+    stack = db.audit_phase_stack = []
+    sql = db.sql
+
+    def counting_sql(*args, **kwargs):
+        if stack:
+            stack[-1]["queries"] += 1
+        return sql(*args, **kwargs)
+
+    db.audit_previous_sql = vars(db).get("sql")
+    db.sql = counting_sql
+    db.audit_counting_sql = counting_sql
+    return stack
+
+def stop_query_count():
+    """
+    Puts frappe.db.sql back once the last phase is closed. If something else wrapped it
+    in the meantime, the (now idle) wrapper is kept and reused by the next phase.
+    """
+    db = frappe.local.db
+    if vars(db).get("sql") is not vars(db).get("audit_counting_sql"):
+        return
+
+    if db.audit_previous_sql is None:
+        del db.sql
+    else:
+        db.sql = db.audit_previous_sql
+    for attr in ("audit_phase_stack", "audit_counting_sql", "audit_previous_sql"):
+        delattr(db, attr)
 
 def run_daily_audit():
     """
@@ -9,28 +134,688 @@ def run_daily_audit():
     1. Checks for Overstays.
     2. Posts Room Rent + Discounts for all rooms currently Checked In.
     3. SKIPS posting if a Room Rent charge already exists for the current date.
+    All rooms are processed in one set-based pass (see run_batch_audit),
+    or split across background workers when Hospitality Settings selects Chunked mode.
+    Every execution is logged as a Night Audit Run.
     """
     posting_date = nowdate()
-    
-    # 1. Fetch active reservations with Discount settings
-    active_reservations = frappe.get_all("Hotel Reservation", 
-        filters={"status": "Checked In"},
-        fields=[
-            "name", "guest", "room", "room_type", "rate_plan", 
-            "departure_date", "company", "folio",
-            "is_complimentary", "discount_type", "discount_value",
-            "is_company_guest", "is_group_guest", "group_booking"
-        ]
-    )
 
-    count = 0
-    for res in active_reservations:
-        if process_single_reservation(res, posting_date):
-            count += 1
+    if frappe.db.get_single_value("Hospitality Settings", "audit_mode") == CHUNKED_MODE:
+        run_chunked_audit(posting_date)
+        return
+
+    run = start_audit_run(posting_date, "Single Job")
+    metrics = AuditMetrics()
+
+    try:
+        # 1. Fetch active reservations with Discount settings
+        with metrics.phase("Fetch"):
+            active_reservations = get_active_reservations()
+
+        count = run_batch_audit(active_reservations, posting_date, metrics)
+    except Exception:
+        frappe.db.rollback()
+        metrics.errors.append(frappe.get_traceback())
+        run.apply_metrics(metrics.as_dict())
+        run.finish("Failed")
+        frappe.db.commit()
+        raise
+
+    run.apply_metrics(metrics.as_dict())
+    run.finish("Completed")
+    record_after_audit(posting_date)
 
     if count > 0:
         frappe.msgprint(_("Auto-Bill (2 PM): Posted charges for {0} rooms.").format(count))
 
+def start_audit_run(posting_date, mode, chunk_count=0):
+    """
+    Creates and commits a Running Night Audit Run, so it survives a failed audit transaction.
+    """
+    run = frappe.get_doc({
+        "doctype": "Night Audit Run",
+        "posting_date": posting_date,
+        "mode": mode,
+        "status": "Running",
+        "started_at": now_datetime(),
+        "chunk_count": chunk_count
+    }).insert(ignore_permissions=True)
+    frappe.db.commit()
+    return run
+
+def get_active_reservations(filters=None):
+    """
+    Checked In reservations with everything the audit needs to price and route them.
+    """
+    conditions = {"status": "Checked In"}
+    if filters:
+        conditions.update(filters)
+
+    return frappe.get_all("Hotel Reservation",
+        filters=conditions,
+        fields=AUDIT_RESERVATION_FIELDS
+    )
+
+def run_chunked_audit(posting_date=None):
+    """
+    Splits the in-house reservations into chunks and processes each on the long queue.
+    Every chunk is checkpointed as a Night Audit Chunk, which makes the audit resumable:
+    - Completed chunks are never re-run and their reservations are skipped.
+    - Queued/Failed chunks (e.g. a worker crashed) are reset to Queued and enqueued again.
+    - Reservations not covered by any chunk for the date go into new chunks.
+    Safe to call again for the same date. Returns the new Night Audit Run.
+    """
+    posting_date = getdate(posting_date or nowdate())
+
+    covered = set()
+    to_enqueue = []
+    for chunk in frappe.get_all("Night Audit Chunk",
+        filters={"posting_date": posting_date},
+        fields=["name", "status", "reservations"]
+    ):
+        covered.update(json.loads(chunk.reservations or "[]"))
+        if chunk.status != "Completed":
+            to_enqueue.append(chunk.name)
+
+    pending = [r for r in get_active_reservations() if r.name not in covered]
+
+    settings = frappe.db.get_value("Hospitality Settings", None, ["audit_chunk_by", "audit_chunk_size"], as_dict=True) or {}
+    chunks = split_audit_chunks(pending, settings.get("audit_chunk_by"), settings.get("audit_chunk_size"))
+
+    run = start_audit_run(posting_date, CHUNKED_MODE, chunk_count=len(to_enqueue) + len(chunks))
+
+    if to_enqueue:
+        # The stale error and metrics of a failed attempt must not leak into the new run
+        frappe.db.set_value("Night Audit Chunk", {"name": ["in", to_enqueue]}, {
+            "audit_run": run.name,
+            "status": "Queued",
+            "rooms_charged": 0,
+            "overstays_extended": 0,
+            "error": None,
+            "metrics": None
+        })
+
+    for chunk_key, names in chunks.items():
+        chunk = frappe.get_doc({
+            "doctype": "Night Audit Chunk",
+            "posting_date": posting_date,
+            "chunk_key": chunk_key,
+            "audit_run": run.name,
+            "status": "Queued",
+            "reservations": json.dumps(names)
+        }).insert(ignore_permissions=True)
+        to_enqueue.append(chunk.name)
+
+    if not to_enqueue:
+        run.apply_metrics(AuditMetrics().as_dict())
+        run.finish("Completed")
+        return run
+
+    for chunk_name in to_enqueue:
+        frappe.enqueue(
+            "hospitality_core.hospitality_core.api.night_audit.process_audit_chunk",
+            queue="long",
+            chunk_name=chunk_name,
+            enqueue_after_commit=True
+        )
+
+    return run
+
+def split_audit_chunks(reservations, chunk_by=None, chunk_size=None):
+    """
+    Groups reservations into {chunk_key: [reservation names]}.
+    Floor / Room Type groups larger than chunk_size are split further.
+    """
+    chunk_size = cint(chunk_size) or 100
+
+    floors = {}
+    if chunk_by == "Floor" and reservations:
+        floors = dict(frappe.get_all("Hotel Room",
+            filters={"name": ["in", list({r.room for r in reservations})]},
+            fields=["name", "floor"],
+            as_list=True
+        ))
+
+    groups = {}
+    for res in sorted(reservations, key=lambda r: r.room or ""):
+        if chunk_by == "Floor":
+            key = floors.get(res.room) or _("No Floor")
+        elif chunk_by == "Room Type":
+            key = res.room_type or _("No Room Type")
+        else:
+            key = _("Rooms")
+        groups.setdefault(key, []).append(res.name)
+
+    chunks = {}
+    for key, names in groups.items():
+        for start in range(0, len(names), chunk_size):
+            chunks[f"{key} #{start // chunk_size + 1}"] = names[start:start + chunk_size]
+
+    return chunks
+
+def process_audit_chunk(chunk_name):
+    """
+    Background Job (long queue): audits one chunk in a single transaction.
+    The chunk row is locked for the duration, so a duplicate job for the same chunk
+    waits and then sees it Completed. Postings and the checkpoint commit together.
+    """
+    chunk = frappe.db.get_value("Night Audit Chunk", chunk_name,
+        ["status", "posting_date", "reservations", "audit_run"], as_dict=True, for_update=True
+    )
+    if not chunk or chunk.status == "Completed":
+        return
+
+    names = json.loads(chunk.reservations or "[]")
+    metrics = AuditMetrics()
+
+    try:
+        # Guests who checked out since the chunk was created are skipped
+        with metrics.phase("Fetch"):
+            reservations = get_active_reservations({"name": ["in", names]}) if names else []
+
+        count = run_batch_audit(reservations, chunk.posting_date, metrics)
+    except Exception:
+        frappe.db.rollback()
+        metrics.errors.append(frappe.get_traceback())
+        frappe.db.set_value("Night Audit Chunk", chunk_name, {
+            "status": "Failed",
+            "error": metrics.errors[-1],
+            "metrics": json.dumps(metrics.as_dict())
+        })
+        frappe.db.commit()
+        finalize_chunked_run(chunk.audit_run)
+        return
+
+    frappe.db.set_value("Night Audit Chunk", chunk_name, {
+        "status": "Completed",
+        "rooms_charged": count,
+        "overstays_extended": metrics.counters["overstays_extended"],
+        "error": None,
+        "metrics": json.dumps(metrics.as_dict())
+    })
+    frappe.db.commit()
+    finalize_chunked_run(chunk.audit_run)
+
+def finalize_chunked_run(run_name):
+    """
+    Called after each chunk commits. Once every chunk of the run is Completed or Failed,
+    aggregates the chunk metrics into the Night Audit Run and closes it.
+    The run row is locked so that only one worker finalises it.
+    """
+    if not run_name:
+        return
+
+    status = frappe.db.get_value("Night Audit Run", run_name, "status", for_update=True)
+    if status != "Running":
+        frappe.db.commit()
+        return
+
+    chunks = frappe.get_all("Night Audit Chunk",
+        filters={"audit_run": run_name},
+        fields=["status", "metrics"]
+    )
+    if any(c.status not in CHUNK_TERMINAL_STATUSES for c in chunks):
+        frappe.db.commit()
+        return
+
+    metrics = AuditMetrics()
+    for chunk in chunks:
+        if chunk.metrics:
+            metrics.merge(json.loads(chunk.metrics))
+
+    run = frappe.get_doc("Night Audit Run", run_name)
+    run.apply_metrics(metrics.as_dict())
+    run.finish("Completed with Errors" if metrics.errors else "Completed")
+    frappe.db.commit()
+    record_after_audit(run.posting_date)
+
+def run_batch_audit(reservations, posting_date, metrics=None):
+    """
+    Set-based Night Audit.
+    1. Prefetches charged folios, rates, routing rules and mirror targets in a handful of queries.
+    2. Computes every rent/discount posting (and its mirror) in memory.
+    3. Writes them with bulk INSERTs and applies the balance delta of each touched folio once.
+    Returns the number of rooms charged.
+    """
+    metrics = metrics or AuditMetrics()
+    if not reservations:
+        return 0
+
+    posting_date = getdate(posting_date)
+    metrics.count("reservations_scanned", len(reservations))
+
+    with metrics.phase("Overstay Handling"):
+        overstays = [r for r in reservations if getdate(r.departure_date) <= posting_date]
+        extend_overstays(overstays, posting_date)
+        metrics.count("overstays_extended", len(overstays))
+
+    with metrics.phase("Fetch"):
+        context = build_audit_context(reservations, [posting_date])
+        nights = [
+            (res, posting_date) for res in reservations
+            if res.folio and (res.folio, posting_date) not in context.charged
+        ]
+
+    return post_audit_nights(nights, context, metrics)
+
+def post_audit_nights(nights, context, metrics):
+    """
+    Prices and posts a list of (reservation, stay date) nights that are known to be uncharged.
+    Returns the number of nights charged.
+    """
+    with metrics.phase("Rate Lookup"):
+        load_audit_rates(context, nights)
+
+        billable = []
+        for res, stay_date in nights:
+            daily_rate = resolve_rate(context, res.rate_plan, res.room_type, stay_date)
+            if daily_rate > 0:
+                billable.append((res, stay_date, daily_rate))
+
+    with metrics.phase("Posting"):
+        rows = []
+        for res, stay_date, daily_rate in billable:
+            rows.extend(compute_room_postings(res, daily_rate, stay_date, context))
+        write_postings(rows)
+
+    with metrics.phase("Mirroring"):
+        mirrors = compute_mirror_rows(rows, context)
+        write_postings(mirrors)
+
+    with metrics.phase("Balance Sync"):
+        apply_transaction_deltas(rows + mirrors)
+        flush_balance_deltas({row.parent for row in rows + mirrors})
+
+    metrics.count("rooms_charged", len(billable))
+    return len(billable)
+
+@frappe.whitelist()
+def run_catchup_audit(from_date, to_date=None):
+    """
+    Catch-up mode for missed scheduler runs (e.g. workers down over a weekend).
+    Posts every uncharged night between from_date and to_date (default: today)
+    for the guests currently in-house, each at the rate valid on its own date.
+    Already charged nights are skipped, so it is safe to run repeatedly.
+    Guests who checked out in the meantime have a Closed (submitted) folio that takes no
+    new postings: their uncharged nights are listed on the run and in the Error Log instead.
+    """
+    frappe.only_for(["System Manager", "Hospitality Manager"])
+
+    from_date = getdate(from_date)
+    to_date = getdate(to_date or nowdate())
+    if from_date > to_date:
+        frappe.throw(_("From Date cannot be after To Date."))
+    if to_date > getdate(nowdate()):
+        frappe.throw(_("Catch-up audit cannot post nights in the future."))
+
+    run = start_audit_run(to_date, "Catch-Up")
+    run.db_set("from_date", from_date)
+    metrics = AuditMetrics()
+
+    try:
+        count = run_catchup_batch(from_date, to_date, metrics)
+    except Exception:
+        frappe.db.rollback()
+        metrics.errors.append(frappe.get_traceback())
+        run.apply_metrics(metrics.as_dict())
+        run.finish("Failed")
+        frappe.db.commit()
+        raise
+
+    run.apply_metrics(metrics.as_dict())
+    run.finish("Completed")
+    record_after_audit(to_date, add_days(from_date, -1))
+
+    message = _("Catch-up Audit: Posted {0} room nights between {1} and {2}.").format(count, from_date, to_date)
+    if metrics.errors:
+        frappe.log_error(
+            title=_("Catch-up Audit left nights of checked-out guests uncharged"),
+            message="\n\n".join(metrics.errors),
+            reference_doctype=run.doctype,
+            reference_name=run.name
+        )
+        message += " " + _("Some checked-out guests have uncharged nights: see Night Audit Run {0}.").format(run.name)
+
+    frappe.msgprint(message)
+    return run.name
+
+def run_catchup_batch(from_date, to_date, metrics):
+    """
+    Set-based body of run_catchup_audit.
+    """
+    with metrics.phase("Fetch"):
+        missing = get_uncharged_nights(from_date, to_date, ("Checked In", "Checked Out"))
+        checked_out = [m for m in missing if m.status == "Checked Out"]
+        missing = [m for m in missing if m.status == "Checked In"]
+        reservations = get_active_reservations({"name": ["in", list({m.reservation for m in missing})]}) if missing else []
+
+    if checked_out:
+        metrics.errors.append(describe_uncharged_checkouts(checked_out))
+
+    if not reservations:
+        return 0
+
+    metrics.count("reservations_scanned", len(reservations))
+
+    # Guests still in-house past departure are extended up to the last caught-up night
+    with metrics.phase("Overstay Handling"):
+        overstays = [r for r in reservations if getdate(r.departure_date) <= to_date]
+        extend_overstays(overstays, to_date)
+        metrics.count("overstays_extended", len(overstays))
+
+    with metrics.phase("Fetch"):
+        context = build_audit_context(reservations, [])
+        by_name = {r.name: r for r in reservations}
+        nights = [(by_name[m.reservation], getdate(m.stay_date)) for m in missing if m.reservation in by_name]
+
+    return post_audit_nights(nights, context, metrics)
+
+def describe_uncharged_checkouts(nights):
+    """
+    Run log entry for the uncharged nights of guests who have checked out since.
+    """
+    by_reservation = {}
+    for night in nights:
+        by_reservation.setdefault(night.reservation, []).append(str(getdate(night.stay_date)))
+
+    lines = [f"{reservation}: {', '.join(dates)}" for reservation, dates in sorted(by_reservation.items())]
+    return "\n".join([
+        _("Not charged: these guests checked out before the catch-up ran and their folios are Closed. Bill these nights manually."),
+        *lines
+    ])
+
+def get_uncharged_nights(from_date, to_date, statuses=("Checked In",)):
+    """
+    Every (reservation, stay_date) between the two dates for guests in the given statuses that
+    has no Room Rent posting, found with a single anti-join against a derived table of dates.
+    A night counts from the arrival date on, as the audit charges the arrival night too.
+    In-house guests are charged up to the last date (the audit extends overstays); guests who
+    have checked out only for the nights before their departure date.
+    """
+    dates = {f"d{i}": add_days(from_date, i) for i in range((getdate(to_date) - getdate(from_date)).days + 1)}
+    date_table = " UNION ALL ".join(f"SELECT %({key})s AS stay_date" for key in dates)
+
+    return frappe.db.sql(f"""
+        SELECT res.name as reservation, res.status, nights.stay_date
+        FROM `tabHotel Reservation` res
+        INNER JOIN ({date_table}) nights ON nights.stay_date >= res.arrival_date
+        LEFT JOIN `tabFolio Transaction` ft
+            ON ft.parent = res.folio
+            AND ft.posting_date = nights.stay_date
+            AND ft.is_void = 0
+            AND ft.item IN %(items)s
+        WHERE res.status IN %(statuses)s
+        AND (res.status = 'Checked In' OR nights.stay_date < res.departure_date)
+        AND IFNULL(res.folio, '') != ''
+        AND ft.name IS NULL
+        ORDER BY nights.stay_date, res.name
+    """, dict(dates, items=get_room_rent_item_codes() or ["ROOM-RENT"], statuses=list(statuses)), as_dict=True)
+
+@frappe.whitelist()
+def preview_audit(from_date=None, to_date=None):
+    """
+    Dry-run of the Night Audit: projects the postings for every night between from_date
+    (default: today) and to_date (default: from_date) without writing anything.
+    Covers the in-house guests and the Reserved bookings expected to be in-house, using
+    the same pricing, discount and routing rules as post_room_charge.
+    Returns {"rows": [...], "summary": [...], "metrics": {...}}.
+    """
+    frappe.only_for(["System Manager", "Hospitality Manager"])
+
+    today = getdate(nowdate())
+    from_date = getdate(from_date or today)
+    to_date = getdate(to_date or from_date)
+    if from_date > to_date:
+        frappe.throw(_("From Date cannot be after To Date."))
+    if from_date < today:
+        frappe.throw(_("Audit preview starts today at the earliest. Use the reports for past postings."))
+
+    dates = [getdate(add_days(from_date, i)) for i in range((to_date - from_date).days + 1)]
+    metrics = AuditMetrics()
+
+    with metrics.phase("Fetch"):
+        reservations = frappe.get_all("Hotel Reservation",
+            filters={"status": ["in", ["Reserved", "Checked In"]], "arrival_date": ["<=", to_date]},
+            or_filters={"departure_date": [">", from_date], "status": "Checked In"},
+            fields=[*AUDIT_RESERVATION_FIELDS, "status"]
+        )
+        metrics.count("reservations_scanned", len(reservations))
+        context = build_audit_context(reservations, dates)
+
+        nights = []
+        for res in reservations:
+            if not res.folio:
+                continue
+            for stay_date in dates:
+                if (res.folio, stay_date) in context.charged:
+                    continue
+                if stay_date < getdate(res.arrival_date):
+                    continue
+                # In-house guests past departure are extended (and charged) by today's audit
+                if stay_date < getdate(res.departure_date) or (res.status == "Checked In" and stay_date == today):
+                    nights.append((res, stay_date))
+
+    with metrics.phase("Rate Lookup"):
+        load_audit_rates(context, nights)
+
+    rows = []
+    with metrics.phase("Posting"):
+        for res, stay_date in nights:
+            daily_rate = resolve_rate(context, res.rate_plan, res.room_type, stay_date)
+            if daily_rate <= 0:
+                continue
+
+            for row in compute_room_postings(res, daily_rate, stay_date, context):
+                mirror = get_mirror_row(row, context)
+                rows.append(frappe._dict({
+                    "posting_date": stay_date,
+                    "reservation": res.name,
+                    "reservation_status": res.status,
+                    "guest": res.guest,
+                    "room": res.room,
+                    "room_type": res.room_type,
+                    "rate_plan": res.rate_plan,
+                    "folio": row.parent,
+                    "item": row.item,
+                    "description": row.description,
+                    "amount": row.amount,
+                    "bill_to": row.bill_to,
+                    "mirror_folio": mirror.parent if mirror else None
+                }))
+
+        metrics.count("rooms_charged", len({(r.reservation, r.posting_date) for r in rows}))
+
+    return {
+        "rows": rows,
+        "summary": summarize_preview(rows),
+        "metrics": metrics.as_dict()
+    }
+
+def summarize_preview(rows):
+    """
+    Per-date totals of an audit preview: rooms, gross rent, discounts and net revenue.
+    """
+    summary = {}
+    for row in rows:
+        day = summary.setdefault(row.posting_date, frappe._dict({
+            "posting_date": row.posting_date, "rooms": set(), "room_rent": 0.0, "discounts": 0.0
+        }))
+        day.rooms.add(row.reservation)
+        if row.amount > 0:
+            day.room_rent += row.amount
+        else:
+            day.discounts += abs(row.amount)
+
+    result = []
+    for posting_date in sorted(summary):
+        day = summary[posting_date]
+        day.rooms = len(day.rooms)
+        day.net_revenue = day.room_rent - day.discounts
+        result.append(day)
+
+    return result
+
+def build_audit_context(reservations, posting_dates):
+    """
+    Loads the folio-side data the in-house posting engine needs for a set of reservations.
+    One query per concern, regardless of the number of rooms. Rates are loaded separately
+    by load_audit_rates.
+    """
+    folios = list({r.folio for r in reservations if r.folio})
+
+    context = frappe._dict({
+        "charged": get_charged_folio_dates(folios, posting_dates),
+        "rates": {},
+        "routings": {},
+        "rent_item_group": frappe.db.get_value("Item", "ROOM-RENT", "item_group"),
+        "folios": {},
+        "company_masters": {},
+        "group_masters": {}
+    })
+
+    # Routing Instructions
+    for rule in frappe.get_all("Reservation Routing",
+        filters={"parent": ["in", [r.name for r in reservations]], "parenttype": "Hotel Reservation"},
+        fields=["parent", "item_group", "bill_to"],
+        order_by="idx asc"
+    ):
+        context.routings.setdefault(rule.parent, []).append(rule)
+
+    # Folio headers (+ reservation group and guest name for mirror descriptions)
+    context.folios = get_folio_headers(folios)
+
+    # Mirror targets (cached resolver)
+    context.company_masters = get_company_masters(f.company for f in context.folios.values())
+    context.group_masters = get_group_masters(f.group_booking for f in context.folios.values())
+
+    return context
+
+def load_audit_rates(context, nights):
+    """
+    Resolves the rate of every (reservation, stay date) night in one bulk lookup
+    against the Room Rate Calendar.
+    """
+    context.rates = get_rates([(res.rate_plan, res.room_type, d) for res, d in nights])
+
+def get_charged_folio_dates(folios, posting_dates):
+    """
+    Set of (folio, posting_date) pairs that already carry a Room Rent posting.
+    Set-based equivalent of already_charged_today.
+    """
+    if not folios or not posting_dates:
+        return set()
+
+    charged = frappe.db.sql("""
+        SELECT DISTINCT parent, posting_date
+        FROM `tabFolio Transaction`
+        WHERE parent IN %(folios)s
+        AND posting_date IN %(dates)s
+        AND is_void = 0
+        AND item IN %(items)s
+    """, {
+        "folios": folios,
+        "dates": [getdate(d) for d in posting_dates],
+        "items": get_room_rent_item_codes() or ["ROOM-RENT"]
+    }, as_dict=True)
+
+    return {(c.parent, getdate(c.posting_date)) for c in charged}
+
+def resolve_rate(context, rate_plan, room_type, date):
+    """
+    Rate for one night from the rates prefetched by load_audit_rates.
+    """
+    return flt(context.rates.get(get_rate_key(rate_plan, room_type, date)))
+
+def compute_room_postings(res, base_amount, posting_date, context):
+    """
+    In-memory equivalent of post_room_charge (without the mirrors, see compute_mirror_rows).
+    Returns the rent row and, if applicable, the discount row.
+    """
+    bill_to = get_room_charge_bill_to(res, context.routings.get(res.name, []), context.rent_item_group)
+
+    rows = [
+        new_transaction_row(res.folio, posting_date, "ROOM-RENT", f"Room Charge - {res.room}", base_amount, bill_to=bill_to)
+    ]
+
+    discount_item, discount_desc, discount_amount = get_room_discount(res, base_amount)
+    if discount_amount > 0:
+        rows.append(
+            new_transaction_row(res.folio, posting_date, discount_item, discount_desc, -1 * discount_amount, bill_to=bill_to)
+        )
+
+    return rows
+
+def compute_mirror_rows(rows, context):
+    """
+    Master Folio copies of the Company / Group billed rows.
+    """
+    mirrors = [get_mirror_row(row, context) for row in rows]
+    return [m for m in mirrors if m]
+
+def get_mirror_row(row, context):
+    """
+    Resolves the Company/Group Master Folio for an in-memory row and builds its mirror.
+    Same targeting rules as mirror_to_company_folio / mirror_to_group_folio.
+    """
+    if row.bill_to not in ("Company", "Group"):
+        return None
+
+    folio = context.folios.get(row.parent)
+    if not folio:
+        return None
+
+    if row.bill_to == "Company":
+        master_folio = context.company_masters.get(folio.company) if folio.company else None
+    else:
+        master_folio = context.group_masters.get(folio.group_booking) if folio.group_booking else None
+
+    if not master_folio or master_folio == folio.name:
+        return None
+
+    ref_info = get_mirror_reference(row.bill_to, folio.reservation, folio.room, folio.guest_full_name)
+    return new_transaction_row(**make_mirror_row(row, master_folio, row.bill_to, ref_info))
+
+def write_postings(rows):
+    """
+    Persists computed postings with one bulk INSERT.
+    Balances are not touched: callers apply the deltas of all rows once afterwards.
+    """
+    if not rows:
+        return
+
+    item_names = {"ROOM-RENT": "Room Rent"}
+    for row in rows:
+        item_names.setdefault(row.item, row.description)
+    for code in {row.item for row in rows}:
+        ensure_item_exists(code, item_names[code])
+
+    bulk_insert_transactions(rows)
+
+def extend_overstays(reservations, posting_date):
+    """
+    Bulk version of handle_overstay: one UPDATE for every guest still in-house past departure.
+    """
+    if not reservations:
+        return
+
+    new_departure = add_days(posting_date, 1)
+    frappe.db.set_value("Hotel Reservation", {"name": ["in", [r.name for r in reservations]]}, "departure_date", new_departure)
+    invalidate_rooms(r.room for r in reservations)
+
+    for res in reservations:
+        before = get_stay_state(res, status="Checked In")
+        extend_stay(res.name, res.room, res.departure_date, new_departure)
+        invalidate_stay(frappe._dict(arrival_date=res.departure_date, departure_date=new_departure))
+        res.departure_date = new_departure
+        update_stay(before, get_stay_state(res, status="Checked In"))
+        frappe.get_doc({
+            "doctype": "Comment",
+            "comment_type": "Info",
+            "reference_doctype": "Hotel Reservation",
+            "reference_name": res.name,
+            "content": _("Auto-Extended: Guest still in-house at 2 PM.")
+        }).insert(ignore_permissions=True)
+
 def process_single_reservation(res, posting_date):
     if getdate(res.departure_date) <= getdate(posting_date):
         handle_overstay(res)
@@ -40,11 +825,11 @@ def process_single_reservation(res, posting_date):
 
     # Get Base Rate
     daily_rate = get_rate(res.rate_plan, res.room_type, posting_date)
-    
+
     if daily_rate > 0:
         post_room_charge(res, daily_rate, posting_date)
         return True
-        
+
     return False
 
 def already_charged_today(folio_name, date):
@@ -52,7 +837,7 @@ def already_charged_today(folio_name, date):
         "parent": folio_name,
         "posting_date": date,
         "is_void": 0,
-        "item": ["in", get_room_rent_item_codes()] 
+        "item": ["in", get_room_rent_item_codes()]
     })
 
 def get_room_rent_item_codes():
@@ -61,17 +846,18 @@ def get_room_rent_item_codes():
 def handle_overstay(res):
     new_departure = add_days(nowdate(), 1)
     frappe.db.set_value("Hotel Reservation", res.name, "departure_date", new_departure)
+    invalidate_rooms([res.room])
+    update_stay(get_stay_state(res, status="Checked In"), get_stay_state(res, status="Checked In", departure_date=getdate(new_departure)))
+    extend_stay(res.name, res.room, res.departure_date, new_departure)
+    invalidate_stay(frappe._dict(arrival_date=res.departure_date, departure_date=new_departure))
     frappe.get_doc("Hotel Reservation", res.name).add_comment("Info", _("Auto-Extended: Guest still in-house at 2 PM."))
 
 def get_rate(rate_plan, room_type, date):
-    if not rate_plan:
-        return frappe.db.get_value("Hotel Room Type", room_type, "default_rate")
-    
-    plan = frappe.get_doc("Room Rate Plan", rate_plan)
-    if getdate(date) >= getdate(plan.valid_from) and getdate(date) <= getdate(plan.valid_to):
-        return plan.rate
-    else:
-        return frappe.db.get_value("Hotel Room Type", room_type, "default_rate")
+    """
+    Rate Plan rate when the date is inside its validity, otherwise the Room Type default.
+    Served from the Room Rate Calendar (see api/rate_calendar.py).
+    """
+    return rate_calendar.get_rate(rate_plan, room_type, date)
 
 def post_room_charge(res, base_amount, date):
     """
@@ -82,26 +868,11 @@ def post_room_charge(res, base_amount, date):
     folio_name = res.folio
     if not folio_name:
         return
-        
+
     ensure_item_exists("ROOM-RENT", "Room Rent")
 
     # Determine Bill To
-    bill_to = "Guest"
-    
-    # 1. PRIORITY: Check if flagged as Company Guest
-    if res.is_company_guest:
-        bill_to = "Company"
-    # 2. PRIORITY: Check if flagged as Group Guest
-    elif res.get("is_group_guest") and res.get("group_booking"):
-        bill_to = "Group"
-    else:
-        # 3. FALLBACK: Check Routing Instructions
-        rent_item_group = frappe.db.get_value("Item", "ROOM-RENT", "item_group")
-        routings = frappe.get_all("Reservation Routing", filters={"parent": res.name}, fields=["item_group", "bill_to"])
-        for rule in routings:
-            if rule.item_group == rent_item_group:
-                bill_to = rule.bill_to
-                break
+    bill_to = get_room_charge_bill_to(res)
 
     # 1. Post Base Charge
     txn = frappe.get_doc({
@@ -110,7 +881,7 @@ def post_room_charge(res, base_amount, date):
         "parenttype": "Guest Folio",
         "parentfield": "transactions",
         "posting_date": date,
-        "item": "ROOM-RENT", 
+        "item": "ROOM-RENT",
         "description": f"Room Charge - {res.room}",
         "qty": 1,
         "amount": base_amount,
@@ -124,32 +895,18 @@ def post_room_charge(res, base_amount, date):
         mirror_to_group_folio(txn)
 
     # 2. Calculate and Post Discount
-    discount_amount = 0.0
-    discount_desc = ""
-    discount_item = "DISCOUNT"
-
-    if res.is_complimentary:
-        discount_amount = base_amount
-        discount_desc = "Complimentary Adjustment"
-        discount_item = "COMPLIMENTARY"
-    elif res.discount_type == "Percentage":
-        pct = flt(res.discount_value)
-        discount_amount = base_amount * (pct / 100.0)
-        discount_desc = f"Room Discount ({pct}%)"
-    elif res.discount_type == "Amount":
-        discount_amount = flt(res.discount_value)
-        discount_desc = "Room Discount (Fixed)"
+    discount_item, discount_desc, discount_amount = get_room_discount(res, base_amount)
 
     if discount_amount > 0:
         ensure_item_exists(discount_item, discount_desc)
-        
+
         disc_txn = frappe.get_doc({
             "doctype": "Folio Transaction",
             "parent": folio_name,
             "parenttype": "Guest Folio",
             "parentfield": "transactions",
             "posting_date": date,
-            "item": discount_item, 
+            "item": discount_item,
             "description": discount_desc,
             "qty": 1,
             "amount": -1 * discount_amount, # Negative for credit/reduction
@@ -162,8 +919,49 @@ def post_room_charge(res, base_amount, date):
         elif bill_to == "Group":
             mirror_to_group_folio(disc_txn)
 
-    # Sync Balance
-    sync_folio_balance(frappe.get_doc("Guest Folio", folio_name))
+    # Balances are updated by the Folio Transaction on_update hook
+
+def get_room_charge_bill_to(res, routings=None, rent_item_group=None):
+    """
+    Bill To for the nightly room charge.
+    Routing rules and the rent item group are looked up when not supplied by the caller.
+    """
+    # 1. PRIORITY: Check if flagged as Company Guest
+    if res.is_company_guest:
+        return "Company"
+
+    # 2. PRIORITY: Check if flagged as Group Guest
+    if res.get("is_group_guest") and res.get("group_booking"):
+        return "Group"
+
+    # 3. FALLBACK: Check Routing Instructions
+    if rent_item_group is None:
+        rent_item_group = frappe.db.get_value("Item", "ROOM-RENT", "item_group")
+    if routings is None:
+        routings = frappe.get_all("Reservation Routing", filters={"parent": res.name}, fields=["item_group", "bill_to"])
+
+    for rule in routings:
+        if rule.item_group == rent_item_group:
+            return rule.bill_to
+
+    return "Guest"
+
+def get_room_discount(res, base_amount):
+    """
+    Returns (item, description, amount) of the discount to post against a night's rent.
+    Amount is positive; 0 when no discount applies.
+    """
+    if res.is_complimentary:
+        return "COMPLIMENTARY", "Complimentary Adjustment", base_amount
+
+    if res.discount_type == "Percentage":
+        pct = flt(res.discount_value)
+        return "DISCOUNT", f"Room Discount ({pct}%)", base_amount * (pct / 100.0)
+
+    if res.discount_type == "Amount":
+        return "DISCOUNT", "Room Discount (Fixed)", flt(res.discount_value)
+
+    return "DISCOUNT", "", 0.0
 
 def ensure_item_exists(code, name):
     if not frappe.db.exists("Item", code):
@@ -172,4 +970,4 @@ def ensure_item_exists(code, name):
         item.item_name = name
         item.item_group = "Services"
         item.is_stock_item = 0
-        item.insert(ignore_permissions=True)
\ No newline at end of file
+        item.insert(ignore_permissions=True)
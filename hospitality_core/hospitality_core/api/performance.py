@@ -0,0 +1,220 @@
+import frappe
+from frappe.utils import add_days, add_years, date_diff, flt, getdate
+
+from hospitality_core.hospitality_core.api.archive import get_source
+from hospitality_core.hospitality_core.api.daily_statistics import get_daily_statistics
+from hospitality_core.hospitality_core.api.inventory import get_room_counts
+from hospitality_core.hospitality_core.api.night_audit import get_room_rent_item_codes
+from hospitality_core.hospitality_core.api.stay_counts import count_nights, numpy
+
+# A night is occupied by a stay that is in house or has been (history)
+OCCUPIED_STATUSES = ("Checked In", "Checked Out")
+
+SEGMENT_SQL = """CASE
+    WHEN res.is_company_guest = 1 THEN 'Company'
+    WHEN res.is_group_guest = 1 OR IFNULL(res.group_booking, '') != '' THEN 'Group'
+    ELSE 'Transient'
+END"""
+
+# Breakdown -> SQL expression over the reservation (alias res) giving the group of a stay / posting.
+# Never NULL: revenue on a folio without a reservation falls into the '' group
+BREAKDOWNS = {
+    None: "''",
+    "Room Type": "IFNULL(res.room_type, '')",
+    "Segment": SEGMENT_SQL
+}
+
+def get_comparison_start(from_date, to_date, compare_to):
+    from_date = getdate(from_date)
+    if compare_to == "Previous Year":
+        return getdate(add_years(from_date, -1))
+    if compare_to == "Previous Period":
+        return getdate(add_days(from_date, -(date_diff(to_date, from_date) + 1)))
+    return None
+
+def get_performance(from_date, to_date, breakdown=None, compare_to=None, comparison_start=None):
+    """
+    KPI engine: occupancy, ADR and RevPAR per date for [from_date, to_date], per group of the
+    breakdown (None, "Room Type" or "Segment": Company / Group / Transient) and optionally for a
+    comparison window of the same length ("Previous Period" / "Previous Year"; comparison_start
+    overrides where it begins, e.g. for a slice of a longer range).
+    Whole-hotel figures of past dates are read from the Hotel Daily Statistics; everything else
+    comes from one stay query and one revenue query covering the remaining dates of all windows:
+    stays are swept into per-night occupied counts (stay_counts.count_nights) and the KPIs are
+    computed as whole arrays (NumPy when available).
+    Returns [frappe._dict(start, dates, groups={group: kpis}, total=kpis)], the main window first,
+    where kpis = frappe._dict(total_rooms, occupied_rooms, revenue, occupancy_pct, adr, revpar).
+    """
+    from_date, to_date = getdate(from_date), getdate(to_date)
+    days = date_diff(to_date, from_date) + 1
+    if days <= 0:
+        return []
+
+    group_sql = BREAKDOWNS[breakdown]
+    starts = [from_date]
+    comparison_start = getdate(comparison_start) if comparison_start else get_comparison_start(from_date, to_date, compare_to)
+    if comparison_start:
+        starts.append(comparison_start)
+    windows = [(start, getdate(add_days(start, days - 1))) for start in starts]
+
+    # 1. Stored daily statistics (no breakdown only): just the dates they lack are computed live
+    stored = {}
+    live_windows = windows
+    if not breakdown:
+        stored = get_daily_statistics(min(starts), max(end for _start, end in windows))
+        live_windows = get_missing_windows(windows, stored)
+
+    # 2. Stays with a night in any window (archived history included when a window reaches it)
+    stays, revenue_rows = [], []
+    if live_windows:
+        earliest = min(start for start, _end in live_windows)
+        stays = frappe.db.sql(f"""
+            SELECT res.arrival_date, res.departure_date, {group_sql} as grp
+            FROM {get_source("Hotel Reservation", earliest)} res
+            WHERE res.status IN %(statuses)s
+            AND ({get_window_condition("res.arrival_date <= {to} AND res.departure_date > {from}", live_windows)})
+        """, {"statuses": OCCUPIED_STATUSES, **get_window_values(live_windows)}, as_dict=True)
+
+        # 3. Room revenue per date and group (Master Folio mirrors are copies, not revenue)
+        revenue_rows = get_revenue(live_windows, group_sql if breakdown else None, earliest)
+
+    # 4. Supply: enabled rooms per room type, or in total
+    room_counts = get_room_counts()
+    total_rooms = sum(total for total, _out_of_order in room_counts.values())
+
+    result = []
+    for start, end in windows:
+        occupied = count_nights(((stay.grp, stay.arrival_date, stay.departure_date) for stay in stays), start, end)
+
+        revenue = {}
+        for row in revenue_rows:
+            offset = date_diff(row.posting_date, start)
+            if 0 <= offset < days:
+                revenue.setdefault(row.grp, [0.0] * days)[offset] += flt(row.total)
+
+        dates = [getdate(add_days(start, i)) for i in range(days)]
+        groups = {}
+        for group in sorted(set(occupied) | set(revenue) | get_default_groups(breakdown, room_counts)):
+            supply = room_counts.get(group, (0, 0))[0] if breakdown == "Room Type" else total_rooms
+            groups[group] = compute_kpis(
+                [supply] * days,
+                occupied.get(group) or [0] * days,
+                revenue.get(group) or [0.0] * days
+            )
+
+        if stored:
+            groups[""] = apply_stored_statistics(groups[""], dates, stored)
+
+        result.append(frappe._dict({
+            "start": start,
+            "dates": dates,
+            "groups": groups,
+            # Whole hotel, whatever the breakdown
+            "total": compute_kpis(
+                groups[""].total_rooms if not breakdown else [total_rooms] * days,
+                [sum(values) for values in zip(*[kpis.occupied_rooms for kpis in groups.values()], strict=True)] or [0] * days,
+                [sum(values) for values in zip(*[kpis.revenue for kpis in groups.values()], strict=True)] or [0.0] * days
+            )
+        }))
+
+    return result
+
+def get_missing_windows(windows, stored):
+    """
+    Per window, the span of its dates without a stored statistics row (usually just today).
+    """
+    missing_windows = []
+    for start, end in windows:
+        missing = [
+            date for date in (getdate(add_days(start, i)) for i in range(date_diff(end, start) + 1))
+            if date not in stored
+        ]
+        if missing:
+            missing_windows.append((missing[0], missing[-1]))
+    return missing_windows
+
+def apply_stored_statistics(kpis, dates, stored):
+    supply, occupied, revenue = list(kpis.total_rooms), list(kpis.occupied_rooms), list(kpis.revenue)
+    for i, date in enumerate(dates):
+        row = stored.get(date)
+        if row:
+            supply[i], occupied[i], revenue[i] = row.rooms_available, row.occupied_rooms, flt(row.room_revenue)
+    return compute_kpis(supply, occupied, revenue)
+
+def get_default_groups(breakdown, room_counts):
+    if breakdown == "Room Type":
+        return set(room_counts)
+    if breakdown == "Segment":
+        return {"Company", "Group", "Transient"}
+    return {""}
+
+def get_window_condition(template, windows):
+    return " OR ".join(
+        "(" + template.format(**{"from": f"%(from_{i})s", "to": f"%(to_{i})s"}) + ")"
+        for i in range(len(windows))
+    )
+
+def get_window_values(windows):
+    values = {}
+    for i, (start, end) in enumerate(windows):
+        values[f"from_{i}"] = start
+        values[f"to_{i}"] = end
+    return values
+
+def get_revenue(windows, group_sql, earliest):
+    """
+    Non-void room rent postings summed per posting date (and group), one query for all windows.
+    The room rent items are resolved once instead of a tabItem subquery per row.
+    """
+    items = get_room_rent_item_codes()
+    if not items:
+        return []
+
+    joins = ""
+    if group_sql:
+        joins = f"""
+            LEFT JOIN {get_source("Guest Folio", earliest)} gf ON gf.name = ft.parent
+            LEFT JOIN {get_source("Hotel Reservation", earliest)} res ON res.name = gf.reservation
+        """
+
+    return frappe.db.sql(f"""
+        SELECT ft.posting_date, {group_sql or "''"} as grp, SUM(ft.amount) as total
+        FROM {get_source("Folio Transaction", earliest)} ft
+        {joins}
+        WHERE ({get_window_condition("ft.posting_date BETWEEN {from} AND {to}", windows)})
+        AND ft.is_void = 0
+        AND IFNULL(ft.mirror_of, '') = ''
+        AND ft.item IN %(items)s
+        GROUP BY ft.posting_date, grp
+    """, {"items": items, **get_window_values(windows)}, as_dict=True)
+
+def compute_kpis(supply, occupied, revenue):
+    """
+    Occupancy %, ADR and RevPAR for whole per-date arrays (supply, occupied, revenue) at once.
+    """
+    if numpy is not None:
+        occupied_array = numpy.asarray(occupied, dtype=float)
+        revenue_array = numpy.asarray(revenue, dtype=float)
+        supply_array = numpy.asarray(supply, dtype=float)
+
+        return frappe._dict({
+            "total_rooms": [int(value) for value in supply],
+            "occupied_rooms": [int(value) for value in occupied],
+            "revenue": revenue_array.round(2).tolist(),
+            "occupancy_pct": divide(occupied_array * 100, supply_array).round(2).tolist(),
+            "adr": divide(revenue_array, occupied_array).round(2).tolist(),
+            "revpar": divide(revenue_array, supply_array).round(2).tolist()
+        })
+
+    return frappe._dict({
+        "total_rooms": list(supply),
+        "occupied_rooms": list(occupied),
+        "revenue": [flt(value, 2) for value in revenue],
+        "occupancy_pct": [flt(o * 100 / s, 2) if s else 0.0 for o, s in zip(occupied, supply, strict=True)],
+        "adr": [flt(r / o, 2) if o else 0.0 for r, o in zip(revenue, occupied, strict=True)],
+        "revpar": [flt(r / s, 2) if s else 0.0 for r, s in zip(revenue, supply, strict=True)]
+    })
+
+def divide(numerator, denominator):
+    # 0 where the denominator is 0 (no rooms / nothing sold)
+    return numpy.divide(numerator, denominator, out=numpy.zeros_like(numerator), where=denominator != 0)
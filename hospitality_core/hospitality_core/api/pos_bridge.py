@@ -1,20 +1,22 @@
 import frappe
 from frappe import _
 from frappe.utils import flt
-from hospitality_core.hospitality_core.api.folio import mirror_to_company_folio
+
+from hospitality_core.hospitality_core.api.folio import get_folio_header, mirror_to_company_folio
+
 
 def process_room_charge(doc, method=None):
     """
     Hook: POS Invoice (on_submit)
     Logic: Breaks down the POS Invoice and posts EACH item to the Guest Folio.
     """
-    
+
     # 1. Calculate how much of this invoice is being charged to the room
     room_charge_payment = 0
     for pay in doc.payments:
         if pay.mode_of_payment == "Room Charge":
             room_charge_payment += flt(pay.amount)
-            
+
     if room_charge_payment <= 0:
         return
 
@@ -22,11 +24,12 @@ def process_room_charge(doc, method=None):
     if not hasattr(doc, 'hotel_room') or not doc.hotel_room:
         frappe.throw(_("Please select a Hotel Room for the Room Charge."))
 
-    folio_name = frappe.db.get_value("Guest Folio", 
+    folio_name = frappe.db.get_value("Guest Folio",
         {"room": doc.hotel_room, "status": "Open"}, "name"
     )
-    
-    if not folio_name:
+    folio = get_folio_header(folio_name) if folio_name else None
+
+    if not folio:
         frappe.throw(_("No open Folio found for Room {0}.").format(doc.hotel_room))
 
     # 3. Determine the ratio (in case of split payments like half cash / half room charge)
@@ -36,17 +39,14 @@ def process_room_charge(doc, method=None):
 
     # 4. Determine Bill To logic (Company vs Guest)
     bill_to = "Guest"
-    res_name = frappe.db.get_value("Guest Folio", folio_name, "reservation")
-    if res_name:
-        is_corp = frappe.db.get_value("Hotel Reservation", res_name, "is_company_guest")
-        if is_corp:
-            bill_to = "Company"
+    if folio.reservation and folio.is_company_guest:
+        bill_to = "Company"
 
     # 5. POST EACH ITEM INDIVIDUALLY
     for item in doc.items:
         # Calculate the actual price for this item based on the room charge portion
         posted_amount = flt(item.amount) * ratio
-        
+
         txn = frappe.get_doc({
             "doctype": "Folio Transaction",
             "parent": folio_name,
@@ -68,8 +68,6 @@ def process_room_charge(doc, method=None):
         if bill_to == "Company":
             mirror_to_company_folio(txn)
 
-    # 6. Refresh the Folio Balance
-    from hospitality_core.hospitality_core.api.folio import sync_folio_balance
-    sync_folio_balance(frappe.get_doc("Guest Folio", folio_name))
+    # 6. Folio Balance is updated by the Folio Transaction on_update hook
 
-    frappe.msgprint(_("Posted {0} items from POS to Folio {1}").format(len(doc.items), folio_name))
\ No newline at end of file
+    frappe.msgprint(_("Posted {0} items from POS to Folio {1}").format(len(doc.items), folio_name))
@@ -0,0 +1,322 @@
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, date_diff, flt, getdate, nowdate
+
+# Redis hash holding one {stay_date: rate} calendar per rate source
+CACHE_KEY = "hospitality_rate_calendar"
+DEFAULT_HORIZON = 365
+
+def get_rate_key(rate_plan, room_type, date):
+    """
+    Normalised lookup key for get_rates results.
+    """
+    return (rate_plan or None, room_type, getdate(date))
+
+def get_rates(stays):
+    """
+    Resolves nightly rates in bulk.
+    stays: iterable of (rate_plan, room_type, date).
+    Returns {get_rate_key(...): rate} with the same rules as the original get_rate:
+    the Rate Plan rate when the date falls inside its validity, otherwise the
+    Room Type default rate.
+    Served from the per-request / Redis cache of the Room Rate Calendar;
+    dates outside the calendar horizon (or sources not built yet) are priced from the
+    source documents in one pass.
+    """
+    keys = {get_rate_key(*stay) for stay in stays}
+    if not keys:
+        return {}
+
+    sources = {("Hotel Room Type", room_type) for _plan, room_type, _date in keys if room_type}
+    sources.update(("Room Rate Plan", plan) for plan, _room_type, _date in keys if plan)
+    calendars = get_calendars(sources)
+
+    start, end = get_horizon()
+    rates = {}
+    outside = []
+    for key in keys:
+        plan, room_type, date = key
+        default_calendar = calendars.get(("Hotel Room Type", room_type)) or {}
+        plan_calendar = calendars.get(("Room Rate Plan", plan)) or {} if plan else {}
+
+        # An empty calendar means the source was never built (e.g. before the first
+        # roll after install): price it directly rather than returning 0
+        if not start <= date <= end or not default_calendar or (plan and not plan_calendar):
+            outside.append(key)
+            continue
+
+        rate = plan_calendar.get(date)
+        if rate is None:
+            rate = default_calendar.get(date, 0.0)
+        rates[key] = rate
+
+    if outside:
+        rates.update(compute_rates(outside))
+
+    return rates
+
+def get_rate(rate_plan, room_type, date):
+    """
+    Single-night convenience wrapper around get_rates.
+    """
+    key = get_rate_key(rate_plan, room_type, date)
+    return get_rates([key])[key]
+
+@frappe.whitelist()
+def get_stay_quote(room_type, arrival_date, departure_date, rate_plan=None):
+    """
+    Prices every night of a prospective stay with one bulk lookup.
+    Returns the nightly breakdown and the total.
+    """
+    nights = date_diff(departure_date, arrival_date)
+    if nights <= 0:
+        frappe.throw(_("Departure Date must be after Arrival Date."))
+
+    dates = [add_days(arrival_date, i) for i in range(nights)]
+    rates = get_rates([(rate_plan, room_type, d) for d in dates])
+
+    breakdown = [
+        {"date": getdate(d), "rate": flt(rates[get_rate_key(rate_plan, room_type, d)])}
+        for d in dates
+    ]
+
+    return {
+        "nights": breakdown,
+        "total": sum(n["rate"] for n in breakdown)
+    }
+
+def get_horizon():
+    horizon = cint(frappe.db.get_single_value("Hospitality Settings", "rate_calendar_horizon")) or DEFAULT_HORIZON
+    start = getdate(nowdate())
+    return start, getdate(add_days(start, horizon - 1))
+
+def get_calendars(sources):
+    """
+    {(source_type, source): {stay_date: rate}} for the requested rate sources.
+    Lookup order: frappe.local (per request) -> Redis -> one query for everything still missing.
+    """
+    local = getattr(frappe.local, "rate_calendar", None)
+    if local is None:
+        local = frappe.local.rate_calendar = {}
+    missing = [s for s in sources if s not in local]
+
+    if missing:
+        cache = frappe.cache()
+        not_cached = []
+        for source in missing:
+            calendar = cache.hget(CACHE_KEY, get_cache_field(*source))
+            if calendar is None:
+                not_cached.append(source)
+            else:
+                local[source] = calendar
+
+        if not_cached:
+            loaded = {source: {} for source in not_cached}
+            for row in frappe.db.sql("""
+                SELECT rate_source_type, rate_source, stay_date, rate
+                FROM `tabRoom Rate Calendar`
+                WHERE rate_source IN %(sources)s
+            """, {"sources": list({s[1] for s in not_cached})}, as_dict=True):
+                source = (row.rate_source_type, row.rate_source)
+                if source in loaded:
+                    loaded[source][getdate(row.stay_date)] = flt(row.rate)
+
+            for source, calendar in loaded.items():
+                cache.hset(CACHE_KEY, get_cache_field(*source), calendar)
+                local[source] = calendar
+
+    return {s: local[s] for s in sources}
+
+def get_cache_field(source_type, source):
+    return f"{source_type}::{source}"
+
+def compute_rates(keys):
+    """
+    Prices (rate_plan, room_type, date) keys straight from the Rate Plans and Room Types,
+    with one query per doctype. Used where the calendar cannot answer.
+    """
+    plans = {}
+    plan_names = list({k[0] for k in keys if k[0]})
+    if plan_names:
+        for plan in frappe.get_all("Room Rate Plan",
+            filters={"name": ["in", plan_names]},
+            fields=["name", "rate", "valid_from", "valid_to"]
+        ):
+            plans[plan.name] = plan
+
+    default_rates = {}
+    room_types = list({k[1] for k in keys if k[1]})
+    if room_types:
+        default_rates = dict(frappe.get_all("Hotel Room Type",
+            filters={"name": ["in", room_types]},
+            fields=["name", "default_rate"],
+            as_list=True
+        ))
+
+    rates = {}
+    for key in keys:
+        plan_name, room_type, date = key
+        plan = plans.get(plan_name) if plan_name else None
+        if plan and getdate(plan.valid_from) <= date <= getdate(plan.valid_to):
+            rates[key] = flt(plan.rate)
+        else:
+            rates[key] = flt(default_rates.get(room_type))
+
+    return rates
+
+def get_source_rows(source_type, source, from_date, to_date):
+    """
+    Calendar rows (stay_date, rate) for one rate source between two dates.
+    A Room Type covers every date; a Rate Plan only the dates inside its validity.
+    """
+    from_date, to_date = getdate(from_date), getdate(to_date)
+
+    if source_type == "Hotel Room Type":
+        rate = frappe.db.get_value("Hotel Room Type", source, "default_rate")
+        room_type = source
+    else:
+        plan = frappe.db.get_value("Room Rate Plan", source,
+            ["room_type", "rate", "valid_from", "valid_to"], as_dict=True)
+        if not plan:
+            return source, []
+        rate, room_type = plan.rate, plan.room_type
+        from_date = max(from_date, getdate(plan.valid_from))
+        to_date = min(to_date, getdate(plan.valid_to))
+
+    return room_type, [
+        (getdate(add_days(from_date, i)), flt(rate))
+        for i in range(date_diff(to_date, from_date) + 1)
+    ]
+
+def rebuild_rate_source(source_type, source, from_date=None):
+    """
+    Replaces the calendar rows of one rate source from from_date (default: today)
+    to the end of the horizon, then invalidates its cache entry.
+    """
+    start, end = get_horizon()
+    from_date = max(getdate(from_date or start), start)
+
+    frappe.db.delete("Room Rate Calendar", {
+        "rate_source_type": source_type,
+        "rate_source": source,
+        "stay_date": [">=", from_date]
+    })
+
+    room_type, rows = get_source_rows(source_type, source, from_date, end)
+    insert_calendar_rows(source_type, source, room_type, rows)
+    invalidate_rate_cache(source_type, source)
+
+def insert_calendar_rows(source_type, source, room_type, rows):
+    if not rows:
+        return
+
+    now = frappe.utils.now()
+    user = frappe.session.user
+
+    frappe.db.bulk_insert("Room Rate Calendar",
+        fields=[
+            "name", "creation", "modified", "owner", "modified_by", "docstatus",
+            "rate_source_type", "rate_source", "room_type", "stay_date", "rate"
+        ],
+        values=[
+            (frappe.generate_hash(length=10), now, now, user, user, 0,
+                source_type, source, room_type, stay_date, rate)
+            for stay_date, rate in rows
+        ]
+    )
+
+def invalidate_rate_cache(source_type=None, source=None):
+    """
+    Drops a calendar (or all of them) from Redis and from the current request.
+    Repeated after commit so that a concurrent reader cannot re-cache the old rows.
+    """
+    def clear():
+        if source:
+            frappe.cache().hdel(CACHE_KEY, get_cache_field(source_type, source))
+            (getattr(frappe.local, "rate_calendar", None) or {}).pop((source_type, source), None)
+        else:
+            frappe.cache().delete_key(CACHE_KEY)
+            frappe.local.rate_calendar = None
+
+    clear()
+    frappe.db.after_commit.add(clear)
+
+# --- Document Events ---
+
+def on_rate_plan_update(doc, method=None):
+    """
+    Hook: Room Rate Plan on_update. Only the changed plan is rebuilt.
+    """
+    rebuild_rate_source("Room Rate Plan", doc.name)
+
+def on_rate_plan_trash(doc, method=None):
+    frappe.db.delete("Room Rate Calendar", {"rate_source_type": "Room Rate Plan", "rate_source": doc.name})
+    invalidate_rate_cache("Room Rate Plan", doc.name)
+
+def on_rate_plan_rename(doc, method=None, old_name=None, new_name=None, merge=False):
+    """
+    Hook: Room Rate Plan after_rename. The Dynamic Link is renamed by Frappe,
+    only the cache entry for the old name has to go.
+    """
+    invalidate_rate_cache("Room Rate Plan", old_name)
+    rebuild_rate_source("Room Rate Plan", new_name)
+
+def on_room_type_update(doc, method=None):
+    """
+    Hook: Hotel Room Type on_update. Rebuilds only when the default rate changed.
+    """
+    before = doc.get_doc_before_save()
+    if before and flt(before.default_rate) == flt(doc.default_rate):
+        return
+
+    rebuild_rate_source("Hotel Room Type", doc.name)
+
+def on_room_type_trash(doc, method=None):
+    frappe.db.delete("Room Rate Calendar", {"rate_source_type": "Hotel Room Type", "rate_source": doc.name})
+    invalidate_rate_cache("Hotel Room Type", doc.name)
+
+# --- Scheduled Jobs ---
+
+def roll_rate_calendar():
+    """
+    Scheduled Job (daily): drops past dates and extends every rate source
+    to the end of the horizon. Sources are only topped up, not rebuilt.
+    """
+    start, end = get_horizon()
+
+    frappe.db.delete("Room Rate Calendar", {"stay_date": ["<", start]})
+
+    last_dates = {
+        (row.rate_source_type, row.rate_source): getdate(row.last_date)
+        for row in frappe.db.sql("""
+            SELECT rate_source_type, rate_source, MAX(stay_date) as last_date
+            FROM `tabRoom Rate Calendar`
+            GROUP BY rate_source_type, rate_source
+        """, as_dict=True)
+    }
+
+    sources = [("Hotel Room Type", name) for name in frappe.get_all("Hotel Room Type", pluck="name")]
+    sources += [("Room Rate Plan", name) for name in frappe.get_all("Room Rate Plan",
+        filters={"valid_to": [">=", start]}, pluck="name")]
+
+    for source_type, source in sources:
+        last_date = last_dates.get((source_type, source))
+        from_date = add_days(last_date, 1) if last_date else start
+        if getdate(from_date) > end:
+            continue
+
+        room_type, rows = get_source_rows(source_type, source, from_date, end)
+        insert_calendar_rows(source_type, source, room_type, rows)
+
+    invalidate_rate_cache()
+
+@frappe.whitelist()
+def rebuild_rate_calendar():
+    """
+    Full rebuild of the calendar for every Room Type and Rate Plan.
+    Run once after install / migration, or from the console after bulk data fixes.
+    """
+    frappe.only_for("System Manager")
+
+    frappe.db.delete("Room Rate Calendar")
+    roll_rate_calendar()
@@ -0,0 +1,184 @@
+import hashlib
+
+import frappe
+from frappe.utils import add_days, date_diff, get_last_day, getdate, nowdate
+
+from hospitality_core.hospitality_core.api.availability import get_hash
+
+# Result cache for reports over closed business dates. A date is closed once the night audit of a
+# later date has run: what a report shows for it no longer changes, except through a void, a
+# back-dated posting, a moved transaction or a changed stay.
+#   DATE_VERSION_KEY -> Redis hash, field = date: token replaced after every committed change to the date
+#   BASE_VERSION_KEY -> token replaced by clear_report_cache (drops every cached result)
+# The closed part of a report's range is split into calendar-month segments, each cached under
+# the report, its filters and its bounds together with the tokens of its dates: a change only
+# recomputes the segments holding the changed dates. The open tail is always computed live.
+RESULT_KEY = "hospitality_report_result"
+DATE_VERSION_KEY = "hospitality_report_date_version"
+BASE_VERSION_KEY = "hospitality_report_version"
+RESULT_TTL = 7 * 24 * 3600
+
+AUDITED_STATUSES = ("Completed", "Completed with Errors")
+
+def get_report_rows(report, filters, from_date, to_date, compute, offsets=(0,)):
+    """
+    compute(from_date, to_date) -> list of rows for the dates of [from_date, to_date] (the caller
+    adds totals and charts over the combined rows). Its result must depend only on the filters
+    and on data of those dates, or of the dates shifted by offsets (e.g. a comparison window).
+    Segments wholly before the first open date are served from cache, the rest is computed.
+    """
+    from_date, to_date = getdate(from_date), getdate(to_date)
+    if from_date > to_date:
+        return []
+
+    rows = []
+    closed_until = get_closed_until()
+    if closed_until and from_date <= closed_until:
+        closed_end = min(to_date, closed_until)
+        versions = get_hash(DATE_VERSION_KEY)
+        base = frappe.cache().get_value(BASE_VERSION_KEY) or ""
+        filters_key = get_filters_key(filters)
+
+        for start, end in get_segments(from_date, closed_end):
+            rows += get_segment_rows(report, filters_key, start, end, compute, offsets, versions, base)
+
+        from_date = getdate(add_days(closed_end, 1))
+
+    if from_date <= to_date:
+        rows += compute(from_date, to_date)
+
+    return rows
+
+def get_closed_until():
+    """
+    Last closed business date: the day before the latest completed night audit (never today).
+    """
+    last_audit = frappe.db.sql("""
+        SELECT MAX(posting_date) FROM `tabNight Audit Run` WHERE status IN %(statuses)s
+    """, {"statuses": AUDITED_STATUSES})[0][0]
+    if not last_audit:
+        return None
+    return min(getdate(add_days(last_audit, -1)), getdate(add_days(nowdate(), -1)))
+
+def get_segments(from_date, to_date):
+    segments = []
+    start = getdate(from_date)
+    while start <= to_date:
+        end = min(getdate(get_last_day(start)), getdate(to_date))
+        segments.append((start, end))
+        start = getdate(add_days(end, 1))
+    return segments
+
+def get_segment_rows(report, filters_key, start, end, compute, offsets, versions, base):
+    cache = frappe.cache()
+    key = "|".join([RESULT_KEY, report, filters_key, str(start), str(end)])
+    version = get_segment_version(start, end, offsets, versions, base)
+
+    cached = cache.get_value(key)
+    if cached and cached.get("version") == version:
+        return cached["rows"]
+
+    # The tokens were read before the rows: a change committed meanwhile retires this entry
+    rows = compute(start, end)
+    cache.set_value(key, {"version": version, "rows": rows}, expires_in_sec=RESULT_TTL)
+    return rows
+
+def get_segment_version(start, end, offsets, versions, base):
+    tokens = [base]
+    for offset in offsets:
+        for i in range(date_diff(end, start) + 1):
+            tokens.append(versions.get(str(getdate(add_days(start, i + offset)))) or "")
+    return hashlib.sha1("|".join(tokens).encode()).hexdigest()
+
+def get_filters_key(filters):
+    filters = {key: value for key, value in (filters or {}).items() if key not in ("from_date", "to_date")}
+    return hashlib.sha1(frappe.as_json(filters).encode()).hexdigest()
+
+# --- Invalidation ---
+
+def invalidate_dates(dates, statistics=True):
+    """
+    Marks business dates as changed in the current transaction; once it commits, their tokens
+    are replaced and every cached segment holding them is recomputed on next read.
+    Their Hotel Daily Statistics rows are flagged stale too, unless statistics is False (the
+    rows themselves were just rewritten).
+    Open dates (today and later) are never cached and are skipped.
+    """
+    today = getdate(nowdate())
+    dates = {getdate(date) for date in dates if date}
+    dates = {date for date in dates if date < today}
+    if not dates:
+        return
+
+    changed = getattr(frappe.local, "changed_report_dates", None)
+    if changed is None:
+        changed = frappe.local.changed_report_dates = set()
+        frappe.db.after_commit.add(publish_changed_dates)
+        frappe.db.after_rollback.add(discard_changed_dates)
+
+    changed.update(dates)
+
+    if statistics:
+        from hospitality_core.hospitality_core.api.daily_statistics import queue_statistics_refresh
+
+        queue_statistics_refresh(dates)
+
+def invalidate_posting_dates(rows):
+    """
+    Transaction rows (or documents) written, voided, moved or deleted by a posting path.
+    """
+    invalidate_dates(row.get("posting_date") for row in rows)
+
+def invalidate_stay(*stays):
+    """
+    Every date of the given stays (arrival to departure, both counted by the reports).
+    """
+    dates = set()
+    for stay in stays:
+        if stay and stay.get("arrival_date") and stay.get("departure_date"):
+            arrival_date = getdate(stay.arrival_date)
+            last = min(getdate(stay.departure_date), getdate(add_days(nowdate(), -1)))
+            dates.update(getdate(add_days(arrival_date, i)) for i in range(date_diff(last, arrival_date) + 1))
+    invalidate_dates(dates)
+
+def publish_changed_dates():
+    changed = getattr(frappe.local, "changed_report_dates", None) or set()
+    cache = frappe.cache()
+    for date in changed:
+        cache.hset(DATE_VERSION_KEY, str(date), frappe.generate_hash(length=10))
+
+    discard_changed_dates()
+
+def discard_changed_dates():
+    # after_commit / after_rollback callbacks run once: the next change registers them again
+    frappe.local.changed_report_dates = None
+
+def on_reservation_change(doc, method=None):
+    """
+    Hook: Hotel Reservation on_update / on_trash. Back-dated stays, early check-outs and
+    cancellations change the occupancy of past dates.
+    """
+    before = doc.get_doc_before_save() if method != "on_trash" else None
+    if before and (before.status, before.arrival_date, before.departure_date, before.room_type) == (
+        doc.status, doc.arrival_date, doc.departure_date, doc.room_type
+    ):
+        return
+    invalidate_stay(doc, before)
+
+def on_payment_change(doc, method=None):
+    """
+    Hook: Payment Entry on_submit / on_cancel (Daily Payment Collection).
+    """
+    invalidate_dates([doc.posting_date])
+
+@frappe.whitelist()
+def clear_report_cache():
+    """
+    Drops every cached report result (e.g. after renaming Item Groups or changing Hospitality Settings).
+    """
+    frappe.only_for(["System Manager", "Hospitality Manager"])
+    reset_report_cache()
+
+def reset_report_cache():
+    frappe.cache().set_value(BASE_VERSION_KEY, frappe.generate_hash(length=10))
+    frappe.cache().delete_key(DATE_VERSION_KEY)
@@ -1,6 +1,13 @@
 import frappe
 from frappe import _
-from frappe.utils import getdate, date_diff, nowdate
+from frappe.utils import date_diff, getdate, nowdate
+
+from hospitality_core.hospitality_core.api.availability import (
+    get_ranked_free_rooms,
+    get_taken_rooms,
+    is_room_free,
+)
+
 
 def check_availability(room, arrival_date, departure_date, ignore_reservation=None):
     """
@@ -14,19 +21,23 @@ def check_availability(room, arrival_date, departure_date, ignore_reservation=No
     room_status = frappe.db.get_value("Hotel Room", room, ["status", "is_enabled"], as_dict=True)
     if not room_status.is_enabled:
         frappe.throw(_("Room {0} is currently disabled/under maintenance.").format(room))
-    
+
     if room_status.status == "Out of Order":
         frappe.throw(_("Room {0} is marked Out of Order.").format(room))
 
-    # 2. Check Overlapping Reservations
+    # 2. Availability index: a free room needs no reservation scan
+    if is_room_free(room, arrival_date, departure_date, ignore_reservation):
+        return True
+
+    # 3. Check Overlapping Reservations (to report the conflict, or where the index cannot answer)
     # Logic: New Arrival < Existing Departure AND New Departure > Existing Arrival
     filters = {
         "room": room,
         "status": ["in", ["Reserved", "Checked In"]],
         "name": ["!=", ignore_reservation] if ignore_reservation else ["is", "set"]
     }
-    
-    existing_bookings = frappe.get_all("Hotel Reservation", 
+
+    existing_bookings = frappe.get_all("Hotel Reservation",
         filters=filters,
         fields=["name", "arrival_date", "departure_date", "guest"]
     )
@@ -40,7 +51,7 @@ def check_availability(room, arrival_date, departure_date, ignore_reservation=No
                     room, booking.guest, booking.arrival_date, booking.departure_date, booking.name
                 )
              )
-    
+
     return True
 
 def check_bulk_availability(rooms, arrival_date, departure_date, ignore_reservation=None):
@@ -54,11 +65,11 @@ def check_bulk_availability(rooms, arrival_date, departure_date, ignore_reservat
     conflicts = []
 
     # 1. Check Room Maintenance Status for all rooms in batch
-    room_data = frappe.get_all("Hotel Room", 
+    room_data = frappe.get_all("Hotel Room",
         filters={"room_number": ["in", rooms]},
         fields=["room_number", "status", "is_enabled"]
     )
-    
+
     room_map = {r.room_number: r for r in room_data}
 
     for room_num in rooms:
@@ -66,22 +77,23 @@ def check_bulk_availability(rooms, arrival_date, departure_date, ignore_reservat
         if not r:
             conflicts.append(_("Room {0} does not exist.").format(room_num))
             continue
-            
+
         if not r.is_enabled:
             conflicts.append(_("Room {0} is currently disabled/under maintenance.").format(room_num))
         elif r.status == "Out of Order":
             conflicts.append(_("Room {0} is marked Out of Order.").format(room_num))
 
-    # 2. Check Overlapping Reservations for all rooms in batch
+    # 2. Check Overlapping Reservations, only for rooms the availability index does not clear
     # Logic: New Arrival < Existing Departure AND New Departure > Existing Arrival
-    existing_bookings = frappe.get_all("Hotel Reservation", 
+    taken = get_taken_rooms([r for r in rooms if r in room_map], arrival_date, departure_date, ignore_reservation)
+    existing_bookings = frappe.get_all("Hotel Reservation",
         filters={
-            "room": ["in", rooms],
+            "room": ["in", taken],
             "status": ["in", ["Reserved", "Checked In"]],
             "name": ["!=", ignore_reservation] if ignore_reservation else ["is", "set"]
         },
         fields=["name", "arrival_date", "departure_date", "guest", "room"]
-    )
+    ) if taken else []
 
     for booking in existing_bookings:
         # Check for date overlap
@@ -130,24 +142,15 @@ def get_available_rooms_for_picker(doctype, txt, searchfield, start, page_len, f
             LIMIT %s, %s
         """, (room_type, room_type, f"%{txt}%", start, page_len))
 
-    # Complex Query: Find rooms that are NOT in the overlapping reservations set
-    return frappe.db.sql("""
-        SELECT name, room_type, status
-        FROM `tabHotel Room`
-        WHERE is_enabled = 1
-        AND status != 'Out of Order'
-        AND (%s IS NULL OR room_type = %s)
-        AND name LIKE %s
-        AND name NOT IN (
-            SELECT room FROM `tabHotel Reservation`
-            WHERE status IN ('Reserved', 'Checked In')
-            AND name != %s
-            AND arrival_date < %s
-            AND departure_date > %s
-        )
-        ORDER BY name ASC
-        LIMIT %s, %s
-    """, (room_type, room_type, f"%{txt}%", ignore or "", departure, arrival, start, page_len))
+    # Free rooms, ranked by floor and room number, computed once per dates / room type
+    # and cached briefly: each keystroke only filters that list in memory
+    txt = (txt or "").lower()
+    rooms = [
+        room[:3]
+        for room in get_ranked_free_rooms(arrival, departure, room_type, ignore)
+        if txt in room[0].lower()
+    ]
+    return rooms[int(start):int(start) + int(page_len)]
 
 def create_folio(reservation_doc):
     """
@@ -163,14 +166,14 @@ def create_folio(reservation_doc):
     folio.status = "Provisional"
     folio.company = reservation_doc.company # If corporate booking
     folio.open_date = nowdate()
-    
+
     # Save the Folio
     folio.insert(ignore_permissions=True)
-    
+
     # Link Folio back to Reservation
     frappe.db.set_value("Hotel Reservation", reservation_doc.name, "folio", folio.name)
     frappe.msgprint(_("Guest Folio {0} created successfully.").format(folio.name))
 
     # Transfer existing balances from the Guest Balance Ledger
     from hospitality_core.hospitality_core.api.folio import transfer_existing_balances
-    transfer_existing_balances(folio)
\ No newline at end of file
+    transfer_existing_balances(folio)
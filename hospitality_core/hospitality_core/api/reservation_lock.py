@@ -0,0 +1,165 @@
+import frappe
+from frappe import _
+from frappe.utils import add_days, date_diff, getdate, now, nowdate
+
+from hospitality_core.hospitality_core.api.availability import ACTIVE_STATUSES
+
+# One `tabRoom Night Lock` row per (room, night), named "<room>|<YYYY-MM-DD>" so that name order
+# is (room, night) order. A booking takes the row locks of its nights in that order (no lock
+# cycles between bookings) and records itself as their holder; rows are unlocked when its
+# transaction ends. Bookings of other rooms or other nights lock other rows and run in parallel.
+
+def get_lock_name(room, night):
+    return f"{room}|{getdate(night).isoformat()}"
+
+def get_nights(arrival_date, departure_date):
+    arrival_date = getdate(arrival_date)
+    return [getdate(add_days(arrival_date, i)) for i in range(max(date_diff(departure_date, arrival_date), 0))]
+
+def lock_room_nights(room_nights):
+    """
+    Locks the rows of the given (room, night) pairs until the end of the transaction, creating
+    missing ones, and returns {name: holder reservation} as last committed.
+    INSERT ... ON DUPLICATE KEY UPDATE takes an exclusive lock on new and existing rows alike,
+    in the order of the (sorted) values. The locking read after it sees the latest committed
+    holders whatever snapshot the transaction started with.
+    """
+    rows = sorted({(get_lock_name(room, night), room, getdate(night)) for room, night in room_nights})
+    if not rows:
+        return {}
+
+    timestamp = now()
+    user = frappe.session.user
+    frappe.db.sql(f"""
+        INSERT INTO `tabRoom Night Lock` (name, room, night_date, creation, modified, owner, modified_by)
+        VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(rows))}
+        ON DUPLICATE KEY UPDATE name = name
+    """, [value for name, room, night in rows for value in (name, room, night, timestamp, timestamp, user, user)])
+
+    return dict(frappe.db.sql("""
+        SELECT name, reservation FROM `tabRoom Night Lock`
+        WHERE name IN %(names)s
+        ORDER BY name
+        FOR UPDATE
+    """, {"names": [row[0] for row in rows]}))
+
+def get_held_nights(reservation):
+    # Only the reservation's own transaction changes its claims: a plain read is enough
+    return frappe.db.sql_list("SELECT name FROM `tabRoom Night Lock` WHERE reservation = %s", (reservation,))
+
+def set_holder(names, reservation):
+    if names:
+        frappe.db.sql("""
+            UPDATE `tabRoom Night Lock` SET reservation = %(reservation)s WHERE name IN %(names)s
+        """, {"reservation": reservation, "names": list(names)})
+
+# --- Reservation lifecycle ---
+
+def claim_stay(reservation, room, arrival_date, departure_date):
+    """
+    The double-booking guard of HotelReservation.validate (check_availability reads a snapshot
+    and the availability index, which a parallel booking can get past). Locks the stay's
+    room-nights plus those the reservation holds now, fails if another active reservation holds
+    one of the stay's nights, then holds exactly the stay's nights.
+    An overlapping booking waits here until this transaction ends and then sees its claim.
+    """
+    wanted = {get_lock_name(room, night): (room, night) for night in get_nights(arrival_date, departure_date)}
+    held = get_held_nights(reservation)
+
+    holders = lock_room_nights(list(wanted.values()) + [parse_lock_name(name) for name in held])
+
+    others = {holders.get(name) for name in wanted} - {None, "", reservation}
+    conflicts = get_active_names(others)
+    if conflicts:
+        frappe.throw(
+            _("Room {0} is already booked between {1} and {2} (Reservation: {3})").format(
+                room, arrival_date, departure_date, ", ".join(sorted(conflicts))
+            )
+        )
+
+    set_holder(wanted, reservation)
+    set_holder(set(held) - set(wanted), None)
+
+def extend_stay(reservation, room, from_date, to_date):
+    """
+    Claims the extra nights [from_date, to_date) of an overstay. Nights already held by another
+    active reservation are left to it: the audit extends the stay regardless.
+    """
+    nights = get_nights(from_date, to_date)
+    holders = lock_room_nights((room, night) for night in nights)
+
+    active = get_active_names({holder for holder in holders.values() if holder and holder != reservation})
+    taken = {name for name, holder in holders.items() if holder in active}
+    set_holder(set(holders) - taken, reservation)
+
+def release_stay(reservation):
+    """
+    Frees every night held by the reservation (cancelled, checked out or deleted).
+    """
+    names = get_held_nights(reservation)
+    if names:
+        lock_room_nights(parse_lock_name(name) for name in names)
+        set_holder(names, None)
+
+def parse_lock_name(name):
+    room, night = name.rsplit("|", 1)
+    return room, getdate(night)
+
+def get_active_names(names):
+    """
+    The holders that are still active. A holder this transaction's snapshot cannot see (committed
+    after it started) is looked up again with a locking read, which sees the latest committed
+    rows. A holder that does not exist even then was left behind by a reservation that claimed
+    its nights in validate and then failed to insert (a caller that catches and carries on, e.g.
+    group_booking.bulk_reserve_rooms): like a holder known to be inactive, it is ignored.
+    """
+    if not names:
+        return set()
+
+    query = "SELECT name, status FROM `tabHotel Reservation` WHERE name IN %(names)s"
+    statuses = dict(frappe.db.sql(query, {"names": list(names)}))
+
+    unseen = set(names) - set(statuses)
+    if unseen:
+        statuses.update(frappe.db.sql(query + " LOCK IN SHARE MODE", {"names": list(unseen)}))
+
+    return {name for name, status in statuses.items() if status in ACTIVE_STATUSES}
+
+# --- Maintenance ---
+
+def prune_room_night_locks():
+    """
+    Scheduled Job (daily): drops the lock rows of past nights.
+    """
+    frappe.db.sql("DELETE FROM `tabRoom Night Lock` WHERE night_date < %s", (nowdate(),))
+
+@frappe.whitelist()
+def rebuild_room_night_locks():
+    """
+    Repair / initial build: re-derives the holder of every night from today on from the active
+    reservations (rows are locked while they are rewritten).
+    """
+    frappe.only_for("System Manager")
+    sync_room_night_locks()
+
+def sync_room_night_locks():
+    today = getdate(nowdate())
+    stays = frappe.get_all("Hotel Reservation",
+        filters={"status": ["in", list(ACTIVE_STATUSES)], "departure_date": [">", today]},
+        fields=["name", "room", "arrival_date", "departure_date"],
+        order_by="arrival_date asc"
+    )
+
+    holders = {}
+    for stay in stays:
+        for night in get_nights(max(getdate(stay.arrival_date), today), stay.departure_date):
+            holders.setdefault((stay.room, night), stay.name)
+
+    nights_by_reservation = {}
+    for (room, night), reservation in holders.items():
+        nights_by_reservation.setdefault(reservation, []).append(get_lock_name(room, night))
+
+    lock_room_nights(holders)
+    frappe.db.sql("UPDATE `tabRoom Night Lock` SET reservation = NULL WHERE night_date >= %s", (today,))
+    for reservation, names in nights_by_reservation.items():
+        set_holder(names, reservation)
@@ -0,0 +1,199 @@
+import frappe
+from frappe import _
+from frappe.utils import add_days, add_months, cint, flt, get_last_day, getdate, now_datetime, nowdate
+
+from hospitality_core.hospitality_core.api.folio import (
+    apply_transaction_deltas,
+    bulk_insert_transactions,
+    flush_balance_deltas,
+    new_transaction_row,
+    reparent_transactions,
+)
+from hospitality_core.hospitality_core.api.master_folio import invalidate_master_folio
+
+BALANCE_FORWARD_ITEM = "BALANCE-FORWARD"
+
+def roll_master_folios(period_end=None):
+    """
+    Scheduled Job (monthly): seals the previous month of every open Company / Group Master Folio.
+    Each folio is rolled and committed on its own; a failure is logged and does not stop the rest.
+    """
+    if cint(frappe.db.get_single_value("Hospitality Settings", "disable_master_folio_rollover")):
+        return
+
+    period_end = getdate(period_end or get_last_day(add_months(nowdate(), -1)))
+
+    for folio_name in get_master_folios(period_end):
+        try:
+            rollover_master_folio(folio_name, period_end)
+            frappe.db.commit()
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(
+                title=_("Master Folio Rollover Failed"),
+                message=_("Folio {0}, period ending {1}:\n{2}").format(folio_name, period_end, frappe.get_traceback()),
+                reference_doctype="Guest Folio",
+                reference_name=folio_name
+            )
+
+def get_master_folios(period_end):
+    """
+    Open Company Master Folios and Group Master Folios whose period started on or before period_end.
+    Idle folios are skipped: nothing posted up to period_end since they were opened (i.e. since the
+    last statement) and a zero balance would only produce an empty statement and a new folio.
+    """
+    return frappe.db.sql_list("""
+        SELECT gf.name
+        FROM `tabGuest Folio` gf
+        WHERE gf.status = 'Open'
+        AND IFNULL(gf.open_date, DATE(gf.creation)) <= %(period_end)s
+        AND (
+            gf.is_company_master = 1
+            OR EXISTS (SELECT 1 FROM `tabHotel Group Booking` gb WHERE gb.master_folio = gf.name)
+        )
+        AND (
+            ABS(IFNULL(gf.outstanding_balance, 0)) > 0.005
+            OR EXISTS (
+                SELECT 1 FROM `tabFolio Transaction` ft
+                WHERE ft.parent = gf.name AND ft.parenttype = 'Guest Folio'
+                AND ft.posting_date <= %(period_end)s
+            )
+        )
+    """, {"period_end": period_end})
+
+@frappe.whitelist()
+def seal_master_folio(folio_name, period_end=None):
+    """
+    Manual rollover of one Master Folio (default: up to the end of the previous month).
+    """
+    frappe.only_for(["System Manager", "Hospitality Manager"])
+
+    period_end = getdate(period_end or get_last_day(add_months(nowdate(), -1)))
+    if period_end >= getdate(nowdate()):
+        frappe.throw(_("Only a closed period can be sealed. Period End must be before today."))
+
+    return rollover_master_folio(folio_name, period_end)
+
+def rollover_master_folio(folio_name, period_end):
+    """
+    Seals a Master Folio up to period_end and continues it on a fresh Master Folio:
+    transactions posted after period_end move to the new folio, the period's totals are
+    frozen in a Folio Statement, and the balance is carried forward as one closing line on
+    the old folio and one opening line on the new one. Routing (company / group master
+    resolver) then points at the new folio, so mirrors and the City Ledger only ever see
+    the current period.
+    Returns the name of the Folio Statement.
+    """
+    period_end = getdate(period_end)
+
+    # 1. Lock the Master Folio and bring its stored balance up to date
+    flush_balance_deltas([folio_name])
+    master = frappe.db.sql("""
+        SELECT name, status, is_company_master, guest, company, open_date, DATE(creation) as created_on
+        FROM `tabGuest Folio`
+        WHERE name = %s
+        FOR UPDATE
+    """, (folio_name,), as_dict=True)
+
+    if not master:
+        frappe.throw(_("Guest Folio {0} not found").format(folio_name))
+    master = master[0]
+
+    if master.status != "Open":
+        frappe.throw(_("Only an Open Master Folio can be rolled over. {0} is {1}.").format(folio_name, master.status))
+
+    group_booking = frappe.db.get_value("Hotel Group Booking", {"master_folio": folio_name}, "name")
+    if not master.is_company_master and not group_booking:
+        frappe.throw(_("{0} is not a Company or Group Master Folio.").format(folio_name))
+
+    period_start = getdate(master.open_date or master.created_on)
+    if period_start > period_end:
+        frappe.throw(_("{0} opened on {1}: there is no period to seal up to {2}.").format(folio_name, period_start, period_end))
+
+    # 2. Open the next period's Master Folio
+    next_folio = frappe.new_doc("Guest Folio")
+    next_folio.is_company_master = master.is_company_master
+    next_folio.guest = master.guest
+    next_folio.company = master.company
+    next_folio.status = "Open"
+    next_folio.open_date = add_days(period_end, 1)
+    next_folio.insert(ignore_permissions=True)
+
+    # 3. Postings dated after the period belong to the new folio
+    later = frappe.db.sql("""
+        SELECT name, parent, posting_date, amount, is_void
+        FROM `tabFolio Transaction`
+        WHERE parent = %s AND parenttype = 'Guest Folio' AND posting_date > %s
+        FOR UPDATE
+    """, (folio_name, period_end), as_dict=True)
+    reparent_transactions(later, next_folio.name)
+    flush_balance_deltas([folio_name])
+
+    # 4. Freeze the period (before the carry-forward line is added)
+    totals = frappe.db.get_value("Guest Folio", folio_name,
+        ["total_charges", "total_payments", "outstanding_balance"], as_dict=True)
+    balance = flt(totals.outstanding_balance)
+
+    statement = frappe.get_doc({
+        "doctype": "Folio Statement",
+        "master_folio": folio_name,
+        "next_folio": next_folio.name,
+        "company": master.company,
+        "group_booking": group_booking,
+        "period_start": period_start,
+        "period_end": period_end,
+        "sealed_on": now_datetime(),
+        "opening_balance": flt(frappe.db.get_value("Folio Statement", {"next_folio": folio_name}, "closing_balance")),
+        "total_charges": flt(totals.total_charges),
+        "total_payments": flt(totals.total_payments),
+        "closing_balance": balance,
+        "transaction_count": frappe.db.count("Folio Transaction", {"parent": folio_name, "parenttype": "Guest Folio"})
+    }).insert(ignore_permissions=True)
+
+    # 5. Carry the balance forward: one line out of the old folio, one into the new one.
+    # Both are flagged as invoiced: they move an existing receivable, they are not revenue.
+    if abs(balance) > 0.005:
+        ensure_balance_forward_item()
+        bill_to = "Company" if master.is_company_master else "Group"
+        carry = [
+            new_transaction_row(folio_name, period_end, BALANCE_FORWARD_ITEM,
+                _("Balance carried forward to {0}").format(next_folio.name), -balance,
+                bill_to=bill_to, is_invoiced=1),
+            new_transaction_row(next_folio.name, next_folio.open_date, BALANCE_FORWARD_ITEM,
+                _("Balance brought forward from {0} ({1})").format(folio_name, statement.name), balance,
+                bill_to=bill_to, is_invoiced=1)
+        ]
+        bulk_insert_transactions(carry)
+        apply_transaction_deltas(carry)
+        flush_balance_deltas([folio_name, next_folio.name])
+
+    # 6. Seal the old folio (direct update: a save would load every transaction)
+    frappe.db.set_value("Guest Folio", folio_name, {"status": "Closed", "close_date": period_end})
+
+    # 7. Route new postings to the new folio
+    if master.is_company_master:
+        invalidate_master_folio("company", {master.company})
+    if group_booking:
+        frappe.db.set_value("Hotel Group Booking", group_booking, "master_folio", next_folio.name)
+        invalidate_master_folio("group", {group_booking})
+
+    frappe.get_doc({
+        "doctype": "Comment",
+        "comment_type": "Info",
+        "reference_doctype": "Guest Folio",
+        "reference_name": folio_name,
+        "content": _("Sealed up to {0} in Folio Statement {1}. Balance {2} carried forward to {3}; {4} later transaction(s) moved.").format(
+            period_end, statement.name, frappe.format(balance, "Currency"), next_folio.name, len(later)
+        )
+    }).insert(ignore_permissions=True)
+
+    return statement.name
+
+def ensure_balance_forward_item():
+    if not frappe.db.exists("Item", BALANCE_FORWARD_ITEM):
+        item = frappe.new_doc("Item")
+        item.item_code = BALANCE_FORWARD_ITEM
+        item.item_name = "Balance Forward"
+        item.item_group = "Services" if frappe.db.exists("Item Group", "Services") else "All Item Groups"
+        item.is_stock_item = 0
+        item.insert(ignore_permissions=True)
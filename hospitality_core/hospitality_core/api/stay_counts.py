@@ -0,0 +1,75 @@
+import frappe
+from frappe.utils import date_diff, getdate
+
+# Optional: NumPy (shipped with most ERPNext benches) vectorizes the sweep; without it the
+# same difference array is summed in plain Python
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def count_nights(stays, from_date, to_date):
+    """
+    Range engine for per-night counts: stays is an iterable of (key, arrival_date, departure_date),
+    e.g. (room_type, ...). Returns {key: [nights counted on from_date, from_date + 1, ..., to_date]}.
+    Each stay adds +1 at its first night in range and -1 after its last one (difference array);
+    a cumulative sum then yields every date's count, so the cost depends on the number of stays,
+    not on the number of days.
+    """
+    from_date, to_date = getdate(from_date), getdate(to_date)
+    days = date_diff(to_date, from_date) + 1
+    if days <= 0:
+        return {}
+
+    origin = from_date.toordinal()
+    bounds = {}
+    for key, arrival_date, departure_date in stays:
+        start = max(getdate(arrival_date).toordinal() - origin, 0)
+        end = min(getdate(departure_date).toordinal() - origin, days)
+        if start < end:
+            starts, ends = bounds.setdefault(key, ([], []))
+            starts.append(start)
+            ends.append(end)
+
+    return {key: sweep(starts, ends, days) for key, (starts, ends) in bounds.items()}
+
+def sweep(starts, ends, days):
+    if numpy is not None:
+        diff = numpy.zeros(days + 1, dtype=numpy.int64)
+        numpy.add.at(diff, starts, 1)
+        numpy.add.at(diff, ends, -1)
+        return numpy.cumsum(diff[:days]).tolist()
+
+    diff = [0] * (days + 1)
+    for start in starts:
+        diff[start] += 1
+    for end in ends:
+        diff[end] -= 1
+
+    counts, running = [], 0
+    for change in diff[:days]:
+        running += change
+        counts.append(running)
+    return counts
+
+def get_overlapping_stays(from_date, to_date, statuses, fields, room_types=None, source="`tabHotel Reservation`"):
+    """
+    One query for every reservation in statuses with at least one night in [from_date, to_date].
+    source lets callers read archived reservations too (see archive.get_source).
+    """
+    conditions = ""
+    if room_types:
+        conditions = "AND room_type IN %(room_types)s"
+
+    return frappe.db.sql(f"""
+        SELECT {", ".join(fields)}
+        FROM {source} res
+        WHERE status IN %(statuses)s
+        AND arrival_date <= %(to_date)s AND departure_date > %(from_date)s
+        {conditions}
+    """, {
+        "statuses": list(statuses),
+        "from_date": getdate(from_date),
+        "to_date": getdate(to_date),
+        "room_types": list(room_types or [])
+    }, as_dict=True)
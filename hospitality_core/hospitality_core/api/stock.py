@@ -1,12 +1,13 @@
 import frappe
 from frappe import _
 
+
 def deduct_inventory(doc, method=None):
     """
     Hook: Guest Folio (on_update) or Folio Transaction (after_insert).
     Logic: If a new transaction is added for a Stock Item, create a Stock Entry (Material Issue).
     """
-    
+
     if doc.doctype != "Folio Transaction":
         return
 
@@ -19,23 +20,24 @@ def deduct_inventory(doc, method=None):
         return
 
     # 2. Get Room Warehouse
-    folio = frappe.get_doc("Guest Folio", doc.parent)
+    from hospitality_core.hospitality_core.api.folio import get_folio_header
+    folio = get_folio_header(doc.parent)
     room_warehouse = frappe.db.get_value("Hotel Room", folio.room, "warehouse")
-    
+
     # Use Company from Folio if available, otherwise User Default
-    # Note: Guest Folio doesn't strictly have a 'Company' field for the Hotel Entity, 
-    # it has 'company' linking to Customer. 
+    # Note: Guest Folio doesn't strictly have a 'Company' field for the Hotel Entity,
+    # it has 'company' linking to Customer.
     # We should rely on System Defaults or the User's Company for the Hotel's side.
     hotel_company = frappe.defaults.get_user_default("Company")
-    
+
     if not room_warehouse:
         # Fallback to Item default or System default
         room_warehouse = item_details.default_warehouse or frappe.db.get_value("Stock Settings", None, "default_warehouse")
-        
+
     if not room_warehouse:
         frappe.log_error(f"Skipping Stock Deduction for {doc.item}. No Warehouse found for Room {folio.room}", "Hotel Stock Error")
         return
-        
+
     # Validate Warehouse belongs to Company
     wh_company = frappe.db.get_value("Warehouse", room_warehouse, "company")
     if wh_company != hotel_company:
@@ -48,7 +50,7 @@ def deduct_inventory(doc, method=None):
     se.purpose = "Material Issue"
     se.posting_date = doc.posting_date
     se.company = hotel_company
-    
+
     # Add Item
     se.append("items", {
         "item_code": doc.item,
@@ -57,17 +59,17 @@ def deduct_inventory(doc, method=None):
         "s_warehouse": room_warehouse,
         "cost_center": frappe.get_cached_value('Company', se.company, 'cost_center')
     })
-    
+
     try:
         se.insert(ignore_permissions=True)
         se.submit()
         frappe.msgprint(_("Consumed {0} from Warehouse {1}").format(doc.item, room_warehouse), alert=True)
-        
+
         # Link Stock Entry to Transaction for reference
         frappe.db.set_value("Folio Transaction", doc.name, {
             "reference_doctype": "Stock Entry",
             "reference_name": se.name
         })
-        
+
     except Exception as e:
-        frappe.log_error(f"Failed to deduct stock for {doc.item}: {str(e)}", "Hotel Stock Error")
\ No newline at end of file
+        frappe.log_error(f"Failed to deduct stock for {doc.item}: {e!s}", "Hotel Stock Error")
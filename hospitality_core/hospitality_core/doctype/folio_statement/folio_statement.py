@@ -0,0 +1,15 @@
+import frappe
+from frappe import _
+from frappe.model.document import Document
+
+
+class FolioStatement(Document):
+    """
+    Sealed period of a Company / Group Master Folio, written by rollover.rollover_master_folio.
+    """
+    def validate(self):
+        if not self.is_new():
+            frappe.throw(_("Folio Statement {0} is sealed and cannot be changed.").format(self.name))
+
+    def on_trash(self):
+        frappe.throw(_("Folio Statement {0} is sealed and cannot be deleted.").format(self.name))
@@ -2,6 +2,9 @@ import frappe
 from frappe import _
 from frappe.model.document import Document
 
+from hospitality_core.hospitality_core.api.folio import MIRROR_CONSTRAINT, get_transaction_category
+
+
 class FolioTransaction(Document):
     def before_insert(self):
         self.validate_parent_status()
@@ -9,6 +12,9 @@ class FolioTransaction(Document):
     def validate(self):
         self.validate_void_status()
         self.fetch_price_if_missing()
+        # A void zeroes the amount: a voided row keeps the category it was posted with
+        if not (self.is_void and self.category):
+            self.category = get_transaction_category(self)
 
     def validate_parent_status(self):
         if self.parent:
@@ -34,18 +40,27 @@ class FolioTransaction(Document):
         """
         if self.item and not self.amount and not self.is_void:
             # 1. Try fetching from Item Price List (Standard Selling)
-            price = frappe.db.get_value("Item Price", 
-                {"item_code": self.item, "price_list": "Standard Selling"}, 
+            price = frappe.db.get_value("Item Price",
+                {"item_code": self.item, "price_list": "Standard Selling"},
                 "price_list_rate"
             )
-            
+
             # 2. Fallback to Item Standard Rate
             if not price:
                 price = frappe.db.get_value("Item", self.item, "standard_rate")
-            
+
             if price:
                 self.amount = float(price) * (self.qty or 1)
-            
+
             # Auto-fetch description if missing
             if not self.description:
-                self.description = frappe.db.get_value("Item", self.item, "item_name")
\ No newline at end of file
+                self.description = frappe.db.get_value("Item", self.item, "item_name")
+
+
+def on_doctype_update():
+    # One mirror per transaction and Master Folio (see folio.insert_mirror_transaction)
+    frappe.db.add_unique("Folio Transaction", ["parent", "mirror_of"], constraint_name=MIRROR_CONSTRAINT)
+    # Paged, date-filtered folio views (see folio.get_folio_transactions)
+    frappe.db.add_index("Folio Transaction", ["parent", "posting_date"])
+    # Financial reports: date range + category (see folio.get_transaction_category)
+    frappe.db.add_index("Folio Transaction", ["posting_date", "category"])
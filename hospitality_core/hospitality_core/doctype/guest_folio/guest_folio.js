@@ -2,6 +2,21 @@ frappe.ui.form.on('Guest Folio', {
     refresh: function (frm) {
         frm.set_read_only();
 
+        // Archived folios are served from the archive tables (api/archive.py): view only
+        if (frm.doc.__onload && frm.doc.__onload.archived) {
+            frm.disable_save();
+            frm.set_intro(__('This folio is archived and can no longer be changed.'), 'blue');
+            return;
+        }
+
+        // Large folios arrive without their transactions table: page through them instead
+        let lazy = frm.doc.__onload && frm.doc.__onload.lazy_transactions;
+        frm.toggle_display('transactions', !lazy);
+        frm.toggle_display('transactions_html', !!lazy);
+        if (lazy) {
+            render_transactions_view(frm);
+        }
+
         // Button: Record Payment
         if (frm.doc.status === 'Open' || frm.doc.status === 'Closed') {
             frm.add_custom_button(__('Record Payment'), function () {
@@ -48,6 +63,34 @@ frappe.ui.form.on('Guest Folio', {
             }, 'Actions');
         }
 
+        // Button: Seal Period (Company Master Folios are otherwise rolled over monthly)
+        if (frm.doc.status === 'Open' && frm.doc.is_company_master
+            && (frappe.user.has_role('System Manager') || frappe.user.has_role('Hospitality Manager'))) {
+            frm.add_custom_button(__('Seal Period'), function () {
+                frappe.prompt({
+                    label: __('Period End'),
+                    fieldname: 'period_end',
+                    fieldtype: 'Date',
+                    default: frappe.datetime.add_days(frappe.datetime.month_start(), -1),
+                    reqd: 1
+                }, function (values) {
+                    frm.call({
+                        method: 'hospitality_core.hospitality_core.api.rollover.seal_master_folio',
+                        args: {
+                            folio_name: frm.doc.name,
+                            period_end: values.period_end
+                        },
+                        freeze: true,
+                        callback: function (r) {
+                            if (!r.exc && r.message) {
+                                frappe.set_route('Form', 'Folio Statement', r.message);
+                            }
+                        }
+                    });
+                }, __('Seal Master Folio Period'), __('Seal'));
+            }, 'Actions');
+        }
+
         // Highlight Balance
         if (frm.doc.outstanding_balance > 0) {
             frm.set_df_property('outstanding_balance', 'read_only', 1);
@@ -99,27 +142,178 @@ frappe.ui.form.on('Folio Transaction', {
     }
 });
 
-function move_transactions_dialog(frm) {
-    // Filter valid transactions (not void, not invoiced)
-    let valid_txns = frm.doc.transactions.filter(t => !t.is_void && !t.is_invoiced).map(t => {
-        return { label: `${t.posting_date}: ${t.description} (${t.amount})`, value: t.name }
-    });
+const PICKER_PAGE_LENGTH = 200;
 
-    if (valid_txns.length === 0) {
-        frappe.msgprint("No movable transactions found.");
-        return;
+function get_open_transactions(frm, filters) {
+    // Transactions that are neither void nor invoiced, newest first: from the form, or
+    // (lazy folios) one page from the server narrowed by the picker's date range / search
+    filters = filters || {};
+    if (!(frm.doc.__onload && frm.doc.__onload.lazy_transactions)) {
+        let search = (filters.search || '').toLowerCase();
+        let rows = (frm.doc.transactions || []).filter(t => !t.is_void && !t.is_invoiced
+            && (!filters.from_date || t.posting_date >= filters.from_date)
+            && (!filters.to_date || t.posting_date <= filters.to_date)
+            && (!search || `${t.name} ${t.item || ''} ${t.description || ''}`.toLowerCase().includes(search))
+        ).reverse();
+        return Promise.resolve({ rows: rows, total_count: rows.length });
     }
 
+    return frappe.call({
+        method: 'hospitality_core.hospitality_core.api.folio.get_folio_transactions',
+        args: {
+            folio: frm.doc.name,
+            is_void: 0,
+            is_invoiced: 0,
+            from_date: filters.from_date,
+            to_date: filters.to_date,
+            search: filters.search,
+            order: 'desc',
+            page_length: PICKER_PAGE_LENGTH
+        }
+    }).then(r => r.message);
+}
+
+function transaction_picker_filters() {
+    return [
+        { label: __('From Date'), fieldname: 'from_date', fieldtype: 'Date' },
+        { fieldtype: 'Column Break' },
+        { label: __('To Date'), fieldname: 'to_date', fieldtype: 'Date' },
+        { fieldtype: 'Column Break' },
+        { label: __('Search'), fieldname: 'search', fieldtype: 'Data', description: __('Item, description or ID') },
+        { fieldtype: 'Section Break' }
+    ];
+}
+
+function bind_transaction_picker(frm, d, fieldname, make_label) {
+    // Reloads the picker's options whenever a filter changes; says when the list is cut off
+    const load = () => {
+        let values = d.get_values(true) || {};
+        return get_open_transactions(frm, values).then(data => {
+            d.set_df_property(fieldname, 'options', data.rows.map(t => ({ label: make_label(t), value: t.name })));
+            d.set_df_property(fieldname, 'description', data.total_count > data.rows.length
+                ? __('Showing the {0} most recent of {1} transactions. Narrow the dates or search to find older ones.',
+                    [data.rows.length, data.total_count])
+                : '');
+            return data;
+        });
+    };
+
+    ['from_date', 'to_date', 'search'].forEach(filter => {
+        d.fields_dict[filter].df.change = load;
+    });
+    return load();
+}
+
+function render_transactions_view(frm) {
+    let wrapper = $(frm.fields_dict['transactions_html'].wrapper).empty();
+    let state = { start: 0, page_length: 100 };
+
+    // Any filter change starts again from the first page
+    const on_filter_change = () => {
+        state.start = 0;
+        load();
+    };
+
+    let filters = new frappe.ui.FieldGroup({
+        fields: [
+            { label: 'From Date', fieldname: 'from_date', fieldtype: 'Date', change: on_filter_change },
+            { fieldtype: 'Column Break' },
+            { label: 'To Date', fieldname: 'to_date', fieldtype: 'Date', change: on_filter_change },
+            { fieldtype: 'Column Break' },
+            { label: 'Bill To', fieldname: 'bill_to', fieldtype: 'Select', options: '\nGuest\nCompany\nGroup', change: on_filter_change },
+            { fieldtype: 'Column Break' },
+            { label: 'Item', fieldname: 'item', fieldtype: 'Link', options: 'Item', change: on_filter_change },
+            { fieldtype: 'Column Break' },
+            { label: 'Status', fieldname: 'status', fieldtype: 'Select', options: '\nActive\nVoid', change: on_filter_change }
+        ],
+        body: $('<div>').appendTo(wrapper)
+    });
+    filters.make();
+
+    let summary = $('<div class="text-muted small mb-2">').appendTo(wrapper);
+    let table = $('<div class="table-responsive">').appendTo(wrapper);
+    let pager = $(`<div class="flex justify-between mt-2">
+        <button class="btn btn-default btn-xs btn-prev">${__('Previous')}</button>
+        <span class="page-info text-muted small"></span>
+        <button class="btn btn-default btn-xs btn-next">${__('Next')}</button>
+    </div>`).appendTo(wrapper);
+
+    const load = () => {
+        let values = filters.get_values(true) || {};
+        frappe.call({
+            method: 'hospitality_core.hospitality_core.api.folio.get_folio_transactions',
+            args: {
+                folio: frm.doc.name,
+                from_date: values.from_date,
+                to_date: values.to_date,
+                bill_to: values.bill_to,
+                item: values.item,
+                is_void: values.status ? (values.status === 'Void' ? 1 : 0) : null,
+                start: state.start,
+                page_length: state.page_length
+            },
+            callback: function (r) {
+                if (r.message) {
+                    render_page(r.message);
+                }
+            }
+        });
+    };
+
+    const render_page = (data) => {
+        summary.html(__('{0} transactions. Charges: {1}, Payments: {2}, Balance: {3}', [
+            data.total_count,
+            format_currency(data.total_charges),
+            format_currency(data.total_payments),
+            format_currency(data.balance)
+        ]));
+
+        let rows = data.rows.map(t => `<tr class="${t.is_void ? 'text-muted' : ''}">
+            <td>${frappe.datetime.str_to_user(t.posting_date)}</td>
+            <td>${frappe.utils.escape_html(t.item || '')}</td>
+            <td>${frappe.utils.escape_html(t.description || '')}${t.is_void ? ' <span class="indicator-pill red">' + __('Void') + '</span>' : ''}</td>
+            <td>${t.bill_to || ''}</td>
+            <td class="text-right">${format_currency(t.amount)}</td>
+            <td class="text-right">${format_currency(t.running_balance)}</td>
+            <td>${t.is_invoiced ? __('Yes') : ''}</td>
+        </tr>`).join('');
+
+        table.html(`<table class="table table-bordered table-sm">
+            <thead><tr>
+                <th>${__('Date')}</th><th>${__('Item')}</th><th>${__('Description')}</th><th>${__('Bill To')}</th>
+                <th class="text-right">${__('Amount')}</th><th class="text-right">${__('Running Balance')}</th><th>${__('Invoiced')}</th>
+            </tr></thead>
+            <tbody>${rows}</tbody>
+        </table>`);
+
+        let last = Math.min(data.start + data.page_length, data.total_count);
+        pager.find('.page-info').text(data.total_count ? `${data.start + 1} - ${last} / ${data.total_count}` : '');
+        pager.find('.btn-prev').prop('disabled', data.start === 0);
+        pager.find('.btn-next').prop('disabled', last >= data.total_count);
+    };
+
+    pager.find('.btn-prev').on('click', () => {
+        state.start = Math.max(state.start - state.page_length, 0);
+        load();
+    });
+    pager.find('.btn-next').on('click', () => {
+        state.start += state.page_length;
+        load();
+    });
+
+    load();
+}
+
+function move_transactions_dialog(frm) {
     var d = new frappe.ui.Dialog({
         title: 'Move Transactions to Another Folio',
-        fields: [
+        fields: transaction_picker_filters().concat([
             {
                 label: 'Select Transactions',
                 fieldname: 'transactions',
                 fieldtype: 'MultiSelect', // Or Table MultiSelect depending on version
-                options: valid_txns,
-                reqd: 1,
-                description: 'Ctrl+Click to select multiple'
+                options: [],
+                reqd: 1
             },
             {
                 label: 'Target Folio',
@@ -136,13 +330,13 @@ function move_transactions_dialog(frm) {
                 },
                 reqd: 1
             }
-        ],
+        ]),
         primary_action_label: 'Move',
         primary_action: function (values) {
             // MultiSelect returns array of values or comma separated string
             let txn_list = values.transactions;
             if (typeof txn_list === 'string') {
-                txn_list = txn_list.split(',').map(s => s.trim());
+                txn_list = txn_list.split(',').map(s => s.trim()).filter(s => s);
             }
 
             frappe.call({
@@ -162,27 +356,25 @@ function move_transactions_dialog(frm) {
             });
         }
     });
-    d.show();
-}
 
-function void_transaction_dialog(frm) {
-    let valid_txns = frm.doc.transactions.filter(t => !t.is_void && !t.is_invoiced).map(t => {
-        return { label: `${t.posting_date} - ${t.description} (${t.amount})`, value: t.name }
+    bind_transaction_picker(frm, d, 'transactions', t => `${t.posting_date}: ${t.description} (${t.amount})`).then(data => {
+        if (!data.total_count) {
+            frappe.msgprint("No movable transactions found.");
+            return;
+        }
+        d.show();
     });
+}
 
-    if (valid_txns.length === 0) {
-        frappe.msgprint("No voidable transactions found.");
-        return;
-    }
-
+function void_transaction_dialog(frm) {
     var d = new frappe.ui.Dialog({
         title: 'Void Transaction',
-        fields: [
+        fields: transaction_picker_filters().concat([
             {
                 label: 'Select Transaction',
                 fieldname: 'transaction',
                 fieldtype: 'Select',
-                options: valid_txns,
+                options: [],
                 reqd: 1
             },
             {
@@ -192,7 +384,7 @@ function void_transaction_dialog(frm) {
                 options: 'Allowance Reason Code',
                 reqd: 1
             }
-        ],
+        ]),
         primary_action_label: 'Void',
         primary_action: function (values) {
             frappe.call({
@@ -211,7 +403,14 @@ function void_transaction_dialog(frm) {
             });
         }
     });
-    d.show();
+
+    bind_transaction_picker(frm, d, 'transaction', t => `${t.posting_date} - ${t.description} (${t.amount})`).then(data => {
+        if (!data.total_count) {
+            frappe.msgprint("No voidable transactions found.");
+            return;
+        }
+        d.show();
+    });
 }
 
 function make_payment_entry(frm) {
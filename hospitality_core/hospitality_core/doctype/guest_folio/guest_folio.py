@@ -3,6 +3,7 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.model.naming import make_autoname
 
+
 class GuestFolio(Document):
     def autoname(self):
         # Different Naming for Company Master Folios
@@ -18,14 +19,69 @@ class GuestFolio(Document):
             else:
                 self.name = make_autoname("FOLIO-.#####")
 
+    def _get_table_fields(self):
+        """
+        While the desk opens a large folio (see folio.getdoc) the transactions table is
+        not loaded at all; the form pages through folio.get_folio_transactions instead.
+        """
+        table_fields = super()._get_table_fields()
+        if frappe.flags.lazy_folio and frappe.flags.lazy_folio == self.name:
+            return [df for df in table_fields if df.fieldname != "transactions"]
+        return table_fields
+
+    def onload(self):
+        # Also after saving a lazy form, so the next save is protected too
+        if self.flags.lazy_transactions or (frappe.flags.lazy_folio and frappe.flags.lazy_folio == self.name):
+            self.set("transactions", [])
+            self.set_onload("lazy_transactions", True)
+
     def validate(self):
+        self.protect_unloaded_transactions()
+        self.load_balance()
         self.validate_status_change()
         self.validate_master_folio()
+        self.set_transaction_categories()
+
+    def protect_unloaded_transactions(self):
+        """
+        A folio opened in the lazy form view comes back with the lazy_transactions flag set by
+        onload and without its transactions: leave the stored rows alone instead of deleting them.
+        A folio loaded in full may still be saved with its rows removed.
+        """
+        if not self.is_new() and (self.get("__onload") or {}).get("lazy_transactions"):
+            self.flags.lazy_transactions = True
+            self.flags.ignore_children_type = (self.flags.ignore_children_type or []) + ["Folio Transaction"]
+
+    def load_balance(self):
+        """
+        Totals are maintained in the database by folio.apply_balance_delta.
+        Refresh them (under a row lock) so saving a stale copy never overwrites them.
+        """
+        if self.is_new():
+            return
+
+        from hospitality_core.hospitality_core.api.folio import flush_balance_deltas
+        flush_balance_deltas([self.name])
+
+        balance = frappe.db.get_value("Guest Folio", self.name,
+            ["total_charges", "total_payments", "outstanding_balance"], as_dict=True, for_update=True
+        )
+        if balance:
+            self.update(balance)
+
+    def set_transaction_categories(self):
+        """
+        Rows added or edited in the form are saved with the folio and skip their own validate.
+        """
+        from hospitality_core.hospitality_core.api.folio import get_transaction_category
+        for row in self.get("transactions") or []:
+            if not (row.is_void and row.category):
+                row.category = get_transaction_category(row)
 
     def validate_master_folio(self):
         if self.is_company_master and not self.company:
             frappe.throw(_("Company is mandatory for a Company Master Folio."))
-        
+
         if not self.is_company_master and not self.reservation:
             # Regular guest folios usually need a reservation
             pass
@@ -36,7 +92,7 @@ class GuestFolio(Document):
             is_company_guest = False
             if self.reservation:
                 is_company_guest = frappe.db.get_value("Hotel Reservation", self.reservation, "is_company_guest")
-            
+
             # If it is NOT a company guest, strict balance enforcement applies.
             # If it IS a company guest, we assume the balance is liable to the company and allow closure.
             if not is_company_guest:
@@ -53,5 +109,5 @@ class GuestFolio(Document):
             record_guest_balance(self)
 
     def on_trash(self):
-        if self.transactions:
-            frappe.throw(_("Cannot delete a Folio that has transactions. Cancel it instead."))
\ No newline at end of file
+        if frappe.db.exists("Folio Transaction", {"parent": self.name, "parenttype": "Guest Folio"}):
+            frappe.throw(_("Cannot delete a Folio that has transactions. Cancel it instead."))
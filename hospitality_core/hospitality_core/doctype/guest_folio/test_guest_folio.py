@@ -0,0 +1,173 @@
+# Copyright (c) 2025, 	Gift Braimah and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import nowdate
+
+from hospitality_core.hospitality_core.api.folio import (
+	CATEGORY_SQL,
+	bulk_insert_transactions,
+	flush_balance_deltas,
+	get_folio_header,
+	get_folio_transactions,
+	getdoc,
+	insert_mirror_transaction,
+	is_lazy_folio,
+	new_transaction_row,
+	queue_balance_delta,
+)
+
+
+def make_folio(transaction_count):
+	folio = frappe.get_doc({
+		"doctype": "Guest Folio",
+		"naming_series": "FOLIO-",
+		"status": "Open",
+		"open_date": nowdate(),
+	}).insert(ignore_permissions=True)
+
+	bulk_insert_transactions([
+		new_transaction_row(folio.name, nowdate(), "ROOM-RENT", f"Benchmark {i}", 100)
+		for i in range(transaction_count)
+	])
+	return folio.name
+
+
+def capture_queries(fn, *args):
+	"""
+	Calls fn and returns the text of every query it sent through frappe.db.sql.
+	Timings live in scripts/benchmark_folio_header.py, outside the unit suite.
+	"""
+	queries = []
+	sql = frappe.db.sql
+
+	def recording_sql(query, *sql_args, **sql_kwargs):
+		queries.append(str(query))
+		return sql(query, *sql_args, **sql_kwargs)
+
+	with patch.object(frappe.db, "sql", recording_sql):
+		fn(*args)
+	return queries
+
+
+def transaction_reads(queries):
+	return [q for q in queries if "tabFolio Transaction" in q and q.lstrip().upper().startswith("SELECT")]
+
+
+class TestGuestFolio(FrappeTestCase):
+	def test_header_query_shape_is_flat_as_folio_grows(self):
+		small = make_folio(10)
+		large = make_folio(5000)
+
+		header_small = capture_queries(get_folio_header, small)
+		header_large = capture_queries(get_folio_header, large)
+
+		# The header never touches the child table: a 500x larger folio sends the same queries
+		self.assertEqual(header_small, header_large)
+		self.assertEqual(transaction_reads(header_large), [])
+		self.assertNotIn("transactions", get_folio_header(large))
+
+	def test_lazy_form_load_never_reads_the_whole_transactions_table(self):
+		large = make_folio(5000)
+		self.assertTrue(is_lazy_folio(large))
+
+		try:
+			queries = capture_queries(getdoc, "Guest Folio", large)
+		finally:
+			frappe.flags.lazy_folio = None
+
+		# Only the bounded size check reads the child table
+		reads = transaction_reads(queries)
+		self.assertTrue(reads)
+		for query in reads:
+			self.assertIn("LIMIT", query.upper())
+		self.assertEqual(frappe.response.docs[-1].get("transactions"), [])
+
+	def test_transaction_pages_carry_running_balance(self):
+		folio = make_folio(250)
+
+		first = get_folio_transactions(folio, start=0, page_length=100)
+		last = get_folio_transactions(folio, start=200, page_length=100)
+
+		self.assertEqual(first["total_count"], 250)
+		self.assertEqual(len(first["rows"]), 100)
+		self.assertEqual(len(last["rows"]), 50)
+		self.assertEqual(first["rows"][-1].running_balance, 100 * 100)
+		self.assertEqual(last["rows"][-1].running_balance, first["balance"])
+		self.assertEqual(get_folio_transactions(folio, is_void=1)["total_count"], 0)
+
+	def test_transaction_picker_reaches_recent_rows(self):
+		folio = make_folio(250)
+
+		oldest_first = get_folio_transactions(folio, page_length=500)["rows"]
+		newest_first = get_folio_transactions(folio, page_length=100, order="desc")
+		self.assertEqual(newest_first["total_count"], 250)
+		self.assertEqual([t.name for t in newest_first["rows"]], [t.name for t in oldest_first[::-1][:100]])
+
+		# Older rows are found by searching instead of paging
+		found = get_folio_transactions(folio, search="Benchmark 24", order="desc")
+		self.assertEqual(found["total_count"], 11)
+		self.assertEqual({t.description for t in found["rows"]}, {"Benchmark 24", *(f"Benchmark 24{i}" for i in range(10))})
+
+	def test_deltas_after_a_targeted_flush_survive_the_commit(self):
+		first, second = make_folio(0), make_folio(0)
+		frappe.db.before_commit.run()
+
+		# A targeted flush empties the pending deltas before the commit's own flush runs
+		queue_balance_delta(first, charges=100)
+		flush_balance_deltas([first])
+		frappe.db.before_commit.run()
+
+		# The next delta must register a new flush instead of landing in an orphaned dict
+		queue_balance_delta(second, charges=40, payments=15)
+		frappe.db.before_commit.run()
+
+		self.assertEqual(frappe.db.get_value("Guest Folio", first, "outstanding_balance"), 100)
+		self.assertEqual(frappe.db.get_value("Guest Folio", second, "outstanding_balance"), 25)
+		self.assertIsNone(frappe.local.folio_balance_deltas)
+
+	def test_mirror_insert_skips_only_duplicate_mirrors(self):
+		master = make_folio(0)
+
+		self.assertTrue(insert_mirror_transaction(new_transaction_row(master, nowdate(), "ROOM-RENT", "Copy", 100, mirror_of="src-1")))
+		# A second copy of the same transaction is skipped, and not added to the balance
+		self.assertFalse(insert_mirror_transaction(new_transaction_row(master, nowdate(), "ROOM-RENT", "Copy", 100, mirror_of="src-1")))
+		flush_balance_deltas()
+		self.assertEqual(frappe.db.get_value("Guest Folio", master, "outstanding_balance"), 100)
+
+		# Any other failure is raised, not swallowed
+		existing = frappe.db.get_value("Folio Transaction", {"parent": master}, "name")
+		with self.assertRaises(Exception) as raised:
+			insert_mirror_transaction(new_transaction_row(master, nowdate(), "ROOM-RENT", "Copy", 100, mirror_of="src-2", name=existing))
+		self.assertTrue(frappe.db.is_primary_key_violation(raised.exception))
+
+	def test_posting_category_matches_backfill_rules(self):
+		folio = make_folio(0)
+		rows = [
+			new_transaction_row(folio, nowdate(), "ROOM-RENT", "Room Charge", 100),
+			new_transaction_row(folio, nowdate(), "DISCOUNT", "Room Discount (10%)", -10),
+			new_transaction_row(folio, nowdate(), "COMPLIMENTARY", "Complimentary Adjustment", -100),
+			new_transaction_row(folio, nowdate(), "PAYMENT", "Payment Entry: PE-1 (Cash)", -50),
+			new_transaction_row(folio, nowdate(), "TRANSFER", "Transfer to Master Folio", -40),
+			new_transaction_row(folio, nowdate(), "BALANCE-FORWARD", "Balance carried forward", -20),
+			new_transaction_row(folio, nowdate(), "ROOM-RENT", "Room Charge [Res: X]", 100, mirror_of="abc"),
+			new_transaction_row(folio, nowdate(), "MINIBAR", "Late checkout waiver", -15),
+		]
+		self.assertEqual([r.category for r in rows], [
+			"Charge", "Discount", "Complimentary", "Payment", "Transfer", "Balance Transfer", "Mirror", "Discount"
+		])
+
+		bulk_insert_transactions(rows)
+		stored = frappe.db.sql(f"""
+			SELECT ft.category, {CATEGORY_SQL} as derived
+			FROM `tabFolio Transaction` ft
+			WHERE ft.parent = %s
+		""", (folio,), as_dict=True)
+
+		# Insert-time stamping and the migration backfill classify alike
+		self.assertEqual(len(stored), len(rows))
+		for row in stored:
+			self.assertEqual(row.category, row.derived)
@@ -0,0 +1,9 @@
+import frappe
+from frappe import _
+from frappe.model.document import Document
+
+
+class HospitalitySettings(Document):
+    def validate(self):
+        if self.audit_chunk_size is not None and self.audit_chunk_size < 1:
+            frappe.throw(_("Max Reservations per Chunk must be at least 1."))
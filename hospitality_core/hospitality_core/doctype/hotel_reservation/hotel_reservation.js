@@ -1,5 +1,13 @@
 frappe.ui.form.on('Hotel Reservation', {
     refresh: function (frm) {
+        // Archived reservations are served from the archive tables (api/archive.py): view only
+        if (frm.doc.__onload && frm.doc.__onload.archived) {
+            frm.set_read_only();
+            frm.disable_save();
+            frm.set_intro(__('This reservation is archived and can no longer be changed.'), 'blue');
+            return;
+        }
+
         // Filter Rooms based on Room Type AND Availability
         frm.set_query('room', function () {
             return {
@@ -1,19 +1,34 @@
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import getdate, nowdate, add_days, flt
-from hospitality_core.hospitality_core.api.reservation import check_availability, create_folio
+from frappe.utils import add_days, flt, getdate, nowdate
+
+from hospitality_core.hospitality_core.api.availability import invalidate_rooms
+from hospitality_core.hospitality_core.api.folio import flush_balance_deltas
+from hospitality_core.hospitality_core.api.inventory import get_stay_state, update_stay
+from hospitality_core.hospitality_core.api.master_folio import get_company_master
+
 # Imports for immediate billing logic
-from hospitality_core.hospitality_core.api.night_audit import post_room_charge, get_rate, already_charged_today
+from hospitality_core.hospitality_core.api.night_audit import (
+    already_charged_today,
+    get_rate,
+    post_room_charge,
+)
+from hospitality_core.hospitality_core.api.report_cache import invalidate_stay
+from hospitality_core.hospitality_core.api.reservation import check_availability, create_folio
+from hospitality_core.hospitality_core.api.reservation_lock import claim_stay, release_stay
+
 
 class HotelReservation(Document):
     def validate(self):
         self.validate_dates()
-        
+
         # Only validate availability if status is Reserved or Checked In
         if self.status in ["Reserved", "Checked In"]:
             self.validate_room_availability()
-        
+        else:
+            release_stay(self.name)
+
         # Requirement: "billing to Company should be set... Folio is opened to the Company"
         # New Requirement: If Is Company Guest is checked, Company is mandatory
         if self.is_company_guest and not self.company:
@@ -28,12 +43,18 @@ class HotelReservation(Document):
 
     def validate_room_availability(self):
         check_availability(
-            room=self.room, 
-            arrival_date=self.arrival_date, 
-            departure_date=self.departure_date, 
+            room=self.room,
+            arrival_date=self.arrival_date,
+            departure_date=self.departure_date,
             ignore_reservation=self.name
         )
 
+        # Serializes parallel bookings of the same room-nights (check_availability alone cannot)
+        claim_stay(self.name, self.room, self.arrival_date, self.departure_date)
+
+    def on_trash(self):
+        release_stay(self.name)
+
     def after_insert(self):
         # Requirement: "And a Folio is also opened for the guest"
         create_folio(self)
@@ -46,17 +67,11 @@ class HotelReservation(Document):
         if not self.company:
             return
 
-        # Check for existing Open Master Folio for this Company
-        exists = frappe.db.exists("Guest Folio", {
-            "company": self.company,
-            "status": "Open",
-            "is_company_master": 1
-        })
-
-        if not exists:
+        # Check for existing Open Master Folio for this Company (cached resolver)
+        if not get_company_master(self.company):
             # Create Master Company Folio
             guest_name = self.get_corporate_guest_name()
-            
+
             folio = frappe.new_doc("Guest Folio")
             folio.is_company_master = 1 # Flag as Company Folio
             folio.guest = guest_name
@@ -92,16 +107,16 @@ class HotelReservation(Document):
         """
         if self.status != "Reserved":
             frappe.throw(_("Only Reserved bookings can be Checked In."))
-        
+
         if getdate(self.arrival_date) > getdate(nowdate()):
             frappe.throw(_("Cannot Check-In before Arrival Date."))
 
         # 1. Update Reservation
-        self.db_set("status", "Checked In")
-        
+        self.set_status("Checked In")
+
         # 2. Update Room Status
         frappe.db.set_value("Hotel Room", self.room, "status", "Occupied")
-        
+
         # 3. Update Folio Status
         if self.folio:
             frappe.db.set_value("Guest Folio", self.folio, "status", "Open")
@@ -134,12 +149,8 @@ class HotelReservation(Document):
         if self.is_group_guest and self.group_booking:
             master_folio = frappe.db.get_value("Hotel Group Booking", self.group_booking, "master_folio")
             if master_folio:
-                # Sync balance to get latest totals
-                master_folio_doc = frappe.get_doc("Guest Folio", master_folio)
-                from hospitality_core.hospitality_core.api.folio import sync_folio_balance
-                sync_folio_balance(master_folio_doc)
-                
-                # Re-fetch balance
+                # Balances are maintained incrementally: write pending deltas, then read
+                flush_balance_deltas([master_folio])
                 master_balance = frappe.db.get_value("Guest Folio", master_folio, "outstanding_balance")
                 if master_balance > 0.01:
                     frappe.throw(_("Cannot Check Out. The Group Master Folio ({0}) has an outstanding balance of {1}. All group charges must be settled first.").format(master_folio, master_balance))
@@ -147,14 +158,14 @@ class HotelReservation(Document):
         # 1. Handle Folio
         if self.folio:
             folio_doc = frappe.get_doc("Guest Folio", self.folio)
-            
+
             # --- START: AUTOMATIC TRANSFER TO CITY LEDGER ---
             if self.company:
                 # Calculate total amount tagged as 'Bill To Company' on this folio
                 company_liability = frappe.db.sql("""
                     SELECT SUM(amount) FROM `tabFolio Transaction`
-                    WHERE parent = %s 
-                    AND bill_to = 'Company' 
+                    WHERE parent = %s
+                    AND bill_to = 'Company'
                     AND is_void = 0
                 """, (self.folio,), as_dict=False)[0][0] or 0.0
 
@@ -168,7 +179,7 @@ class HotelReservation(Document):
                         item.item_group = "Services"
                         item.is_stock_item = 0
                         item.insert(ignore_permissions=True)
-                    
+
                     transfer_exists = frappe.db.exists("Folio Transaction", {
                         "parent": self.folio,
                         "item": transfer_item,
@@ -192,7 +203,7 @@ class HotelReservation(Document):
                             "bill_to": "Company",
                             "is_void": 0
                         }).insert(ignore_permissions=True)
-                        
+
                         frappe.msgprint(_("Transferred {0} to City Ledger.").format(company_liability))
             # --- END: AUTOMATIC TRANSFER ---
 
@@ -200,17 +211,15 @@ class HotelReservation(Document):
             if self.is_group_guest and self.group_booking:
                 # 1. Get Group Master Folio ID
                 group_master_folio = frappe.db.get_value("Hotel Group Booking", self.group_booking, "master_folio")
-                
+
                 if group_master_folio:
                     # 2. Calculate total liability on Guest Folio (excluding existing transfers)
                     # We assume ALL charges go to Group Master if 'Is Group Guest' is checked.
                     # Or we should calculate balance? Let's take the Outstanding Balance.
-                    
-                    # Re-sync balance first
-                    from hospitality_core.hospitality_core.api.folio import sync_folio_balance
-                    sync_folio_balance(folio_doc)
+
+                    flush_balance_deltas([self.folio])
                     current_balance = frappe.db.get_value("Guest Folio", self.folio, "outstanding_balance")
-                    
+
                     if current_balance > 0:
                         transfer_item = "TRANSFER-GROUP"
                         if not frappe.db.exists("Item", transfer_item):
@@ -220,7 +229,7 @@ class HotelReservation(Document):
                             item.item_group = "Services"
                             item.is_stock_item = 0
                             item.insert(ignore_permissions=True)
-                            
+
                         # 3. Credit Guest Folio
                         frappe.get_doc({
                             "doctype": "Folio Transaction",
@@ -235,7 +244,7 @@ class HotelReservation(Document):
                             "bill_to": "Group",
                             "is_void": 0
                         }).insert(ignore_permissions=True)
-                        
+
                         # 4. Debit Group Master Folio
                         frappe.get_doc({
                             "doctype": "Folio Transaction",
@@ -249,43 +258,41 @@ class HotelReservation(Document):
                             "amount": flt(current_balance), # Debit
                             "is_void": 0
                         }).insert(ignore_permissions=True)
-                        
+
                         frappe.msgprint(_("Transferred {0} to Group Master Folio.").format(current_balance))
             # --- END: AUTOMATIC TRANSFER TO GROUP MASTER ---
-            
-            # Recalculate balance to be safe
-            from hospitality_core.hospitality_core.api.folio import sync_folio_balance
-            sync_folio_balance(folio_doc)
-            
-            # Re-fetch values
-            balance = frappe.db.get_value("Guest Folio", self.folio, "outstanding_balance")
-            
+
+            # Re-fetch values (transfers above were posted after folio_doc was loaded)
+            flush_balance_deltas([self.folio])
+            folio_doc.reload()
+            balance = folio_doc.outstanding_balance
+
             # Requirement: "folio once opened cannot be closed until all payments are made... enforced... for private guests"
             # Updated Requirement: Company Guests can check out with balance.
-            
+
             if not self.is_company_guest:
                 if balance > 0.01:
                     frappe.throw(_("Cannot Check Out. Outstanding balance of {0} remains on Folio {1}. Please settle payment.").format(balance, self.folio))
             else:
                 if balance > 0.01:
                     frappe.msgprint(_("Company Guest Checkout: Outstanding balance of {0}. Liability remains on Company Master Folio.").format(balance))
-            
+
             # Close Folio
             folio_doc.status = "Closed"
             folio_doc.close_date = nowdate()
-            
+
             # Requirement: "folio ... should be submitted and immutable"
             # Updated: Document is no longer submittable.
             folio_doc.save()
-            
+
             # Record guest balance if there's a credit balance
             # (after_save hook handles this, but we call it explicitly to ensure it runs)
             from hospitality_core.hospitality_core.api.folio import record_guest_balance
             record_guest_balance(folio_doc)
 
         # 2. Update Reservation
-        self.db_set("status", "Checked Out")
-        
+        self.set_status("Checked Out")
+
         # 3. Update Room Status to Dirty
         frappe.db.set_value("Hotel Room", self.room, "status", "Dirty")
 
@@ -293,25 +300,38 @@ class HotelReservation(Document):
         self.save()
 
         return "Checked Out"
-    
+
     def process_cancel(self):
         """
         Transition: Reserved -> Cancelled
         """
         if self.status != "Reserved":
             frappe.throw(_("Only Reserved bookings can be Cancelled."))
-        
-        self.db_set("status", "Cancelled")
-        
+
+        self.set_status("Cancelled")
+
         # If there's a folio, cancel it as well if it's not already closed
         if self.folio:
             folio_status = frappe.db.get_value("Guest Folio", self.folio, "status")
             if folio_status not in ["Closed", "Cancelled"]:
                 frappe.db.set_value("Guest Folio", self.folio, "status", "Cancelled")
                 frappe.msgprint(_("Linked Guest Folio {0} has been cancelled.").format(self.folio))
-        
+
         return "Cancelled"
 
+    def set_status(self, status):
+        """
+        db_set of the status that keeps the Room Type Inventory, the availability index, the
+        room-night claims and the report cache in step (a db_set does not run the hooks that maintain them).
+        """
+        before = get_stay_state(self)
+        self.db_set("status", status)
+        update_stay(before, get_stay_state(self))
+        invalidate_rooms([self.room])
+        invalidate_stay(self)
+        if status not in ["Reserved", "Checked In"]:
+            release_stay(self.name)
+
 # Whitelisted methods for client-side buttons
 @frappe.whitelist()
 def check_in_guest(name):
@@ -326,4 +346,4 @@ def check_out_guest(name):
 @frappe.whitelist()
 def cancel_reservation(name):
     doc = frappe.get_doc("Hotel Reservation", name)
-    return doc.process_cancel()
\ No newline at end of file
+    return doc.process_cancel()
@@ -1,9 +1,173 @@
 # Copyright (c) 2025, 	Gift Braimah and Contributors
 # See license.txt
 
-# import frappe
+import random
+import threading
+import time
+from itertools import pairwise
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, getdate, nowdate
+
+from hospitality_core.hospitality_core.api.availability import (
+	BITMAP_KEY,
+	VERSION_KEY,
+	invalidate_free_rooms,
+)
+from hospitality_core.hospitality_core.api.reservation_lock import claim_stay
+
+ROOM_TYPE = "_Test Lock Room Type"
+GUEST = "_Test Lock Guest"
+MAX_ATTEMPTS = 10
+
+
+def make_room(room_number):
+	if not frappe.db.exists("Hotel Room", room_number):
+		frappe.get_doc({
+			"doctype": "Hotel Room",
+			"room_number": room_number,
+			"room_type": ROOM_TYPE,
+			"status": "Available",
+			"is_enabled": 1,
+		}).insert(ignore_permissions=True)
+	return room_number
+
+
+def book(site, guest, room, arrival_date, departure_date, barrier, booked):
+	"""
+	One front-desk agent: its own connection and transaction, started together with the others.
+	A transaction that loses a deadlock is retried, as the desk user would; a rejection
+	(room taken) is final.
+	"""
+	frappe.init(site=site)
+	frappe.connect()
+	frappe.set_user("Administrator")
+	try:
+		barrier.wait()
+		for attempt in range(MAX_ATTEMPTS):
+			try:
+				doc = frappe.get_doc({
+					"doctype": "Hotel Reservation",
+					"naming_series": "HR-.YYYY.-",
+					"guest": guest,
+					"room_type": ROOM_TYPE,
+					"room": room,
+					"status": "Reserved",
+					"arrival_date": arrival_date,
+					"departure_date": departure_date,
+				}).insert(ignore_permissions=True)
+				frappe.db.commit()
+				booked.append(doc.name)
+				return
+			except Exception as e:
+				frappe.db.rollback()
+				if not (frappe.db.is_deadlocked(e) or frappe.db.is_timedout(e)) or attempt == MAX_ATTEMPTS - 1:
+					return
+				time.sleep(random.uniform(0.01, 0.1))
+	finally:
+		frappe.destroy()
 
 
 class TestHotelReservation(FrappeTestCase):
-	pass
+	def setUp(self):
+		if not frappe.db.exists("Hotel Room Type", ROOM_TYPE):
+			frappe.get_doc({
+				"doctype": "Hotel Room Type",
+				"room_type_name": ROOM_TYPE,
+				"default_rate": 100,
+			}).insert(ignore_permissions=True)
+
+		self.guest = frappe.db.get_value("Guest", {"full_name": GUEST}) or frappe.get_doc({
+			"doctype": "Guest",
+			"full_name": GUEST,
+		}).insert(ignore_permissions=True).name
+
+		self.rooms = [make_room(f"_T-LOCK-{i}") for i in range(11)]
+		frappe.db.commit()
+
+	def tearDown(self):
+		reservations = frappe.get_all("Hotel Reservation", filters={"room_type": ROOM_TYPE}, pluck="name")
+		if reservations:
+			folios = frappe.get_all("Guest Folio", filters={"reservation": ["in", reservations]}, pluck="name")
+			if folios:
+				frappe.db.delete("Folio Transaction", {"parent": ["in", folios], "parenttype": "Guest Folio"})
+				frappe.db.delete("Guest Folio", {"name": ["in", folios]})
+			frappe.db.delete("Reservation Routing", {"parent": ["in", reservations]})
+			frappe.db.delete("Hotel Reservation", {"name": ["in", reservations]})
+		frappe.db.delete("Room Night Lock", {"room": ["in", self.rooms]})
+		frappe.db.delete("Room Type Inventory", {"room_type": ROOM_TYPE})
+		frappe.db.commit()
+
+		# Availability bitmaps and cached free-room sets of the test rooms
+		cache = frappe.cache()
+		for room in self.rooms:
+			cache.hdel(BITMAP_KEY, room)
+			cache.hdel(VERSION_KEY, room)
+		invalidate_free_rooms()
+
+	def test_parallel_bookings_never_double_book_a_room(self):
+		today = getdate(nowdate())
+		contested = self.rooms[0]
+
+		# 30 agents race for overlapping stays in one room, 10 more book one other room each
+		stays = []
+		for _ in range(30):
+			arrival = add_days(today, random.randint(1, 10))
+			stays.append((contested, arrival, add_days(arrival, random.randint(1, 5))))
+		for room in self.rooms[1:]:
+			stays.append((room, add_days(today, 1), add_days(today, 4)))
+
+		barrier = threading.Barrier(len(stays))
+		booked = []
+		threads = [
+			threading.Thread(target=book, args=(frappe.local.site, self.guest, *stay, barrier, booked))
+			for stay in stays
+		]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+		frappe.db.rollback()
+		reservations = frappe.get_all("Hotel Reservation",
+			filters={"name": ["in", booked or [""]]},
+			fields=["room", "arrival_date", "departure_date"],
+			order_by="room, arrival_date",
+		)
+
+		# Zero double bookings: committed stays of the contested room never overlap
+		stays_of_contested = [r for r in reservations if r.room == contested]
+		self.assertTrue(stays_of_contested)
+		for previous, current in pairwise(stays_of_contested):
+			self.assertLessEqual(previous.departure_date, current.arrival_date)
+
+		# Different rooms do not block each other (lost deadlocks are retried)
+		self.assertEqual({r.room for r in reservations if r.room != contested}, set(self.rooms[1:]))
+
+	def test_claim_left_by_a_failed_insert_does_not_block_the_room(self):
+		room, arrival = self.rooms[1], add_days(nowdate(), 1)
+		departure = add_days(arrival, 3)
+
+		# A reservation claimed its nights in validate, then its insert failed and the caller
+		# carried on: the claim was committed with a holder that does not exist
+		claim_stay("_T-LOCK-GHOST", room, arrival, departure)
+		frappe.db.commit()
+
+		def reserve():
+			return frappe.get_doc({
+				"doctype": "Hotel Reservation",
+				"naming_series": "HR-.YYYY.-",
+				"guest": self.guest,
+				"room_type": ROOM_TYPE,
+				"room": room,
+				"status": "Reserved",
+				"arrival_date": arrival,
+				"departure_date": departure,
+			}).insert(ignore_permissions=True)
+
+		reserve()
+		frappe.db.commit()
+		# A real holder still blocks the room
+		self.assertRaises(frappe.ValidationError, reserve)
+		frappe.db.rollback()
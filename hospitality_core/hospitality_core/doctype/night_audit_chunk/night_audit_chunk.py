@@ -0,0 +1,8 @@
+import json
+
+from frappe.model.document import Document
+
+
+class NightAuditChunk(Document):
+    def get_reservation_names(self):
+        return json.loads(self.reservations or "[]")
@@ -0,0 +1,50 @@
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import cint, flt, now_datetime, time_diff_in_seconds
+
+
+class NightAuditRun(Document):
+    def apply_metrics(self, metrics):
+        """
+        Copies counters, per-phase timings and errors collected by night_audit.AuditMetrics.
+        """
+        for field in ("reservations_scanned", "rooms_charged", "overstays_extended"):
+            self.set(field, cint(metrics["counters"].get(field)))
+
+        self.error_count = len(metrics["errors"])
+        self.errors = "\n\n".join(metrics["errors"]) or None
+
+        self.set("phases", [])
+        for phase, timing in metrics["phases"].items():
+            self.append("phases", {
+                "phase": phase,
+                "duration": flt(timing["duration"], 3),
+                "query_count": cint(timing["queries"])
+            })
+
+    def finish(self, status):
+        self.status = status
+        self.ended_at = now_datetime()
+        self.wall_time = flt(time_diff_in_seconds(self.ended_at, self.started_at), 3)
+        self.check_time_window()
+        self.save(ignore_permissions=True)
+
+    def check_time_window(self):
+        """
+        Flags the run (and raises an Error Log) when the audit took longer than the
+        window configured in Hospitality Settings.
+        """
+        window = cint(frappe.db.get_single_value("Hospitality Settings", "audit_time_window"))
+        if not window or flt(self.wall_time) <= window * 60:
+            return
+
+        self.exceeded_time_window = 1
+        frappe.log_error(
+            title=_("Night Audit exceeded its time window"),
+            message=_("Night Audit Run {0} for {1} took {2}s (window: {3} minutes).").format(
+                self.name, self.posting_date, self.wall_time, window
+            ),
+            reference_doctype=self.doctype,
+            reference_name=self.name
+        )
@@ -0,0 +1,196 @@
+# Copyright (c) 2025, 	Gift Braimah and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, nowdate
+
+from hospitality_core.hospitality_core.api.folio import flush_balance_deltas
+from hospitality_core.hospitality_core.api.master_folio import invalidate_master_folio
+from hospitality_core.hospitality_core.api.night_audit import (
+	AuditMetrics,
+	get_active_reservations,
+	process_single_reservation,
+	run_batch_audit,
+	run_catchup_batch,
+)
+
+ROOM_TYPE = "_Test Audit Room Type"
+COMPANY = "_Test Audit Company"
+MASTER_FOLIO = "_T-AUDIT-MASTER"
+
+# (reservation fields, description) of each pricing / routing case
+CASES = [
+	({"is_company_guest": 1, "company": COMPANY, "discount_type": "Percentage", "discount_value": 10}, "company, % discount"),
+	({"discount_type": "Amount", "discount_value": 15}, "guest, fixed discount"),
+	({"is_company_guest": 1, "company": COMPANY, "is_complimentary": 1}, "company, complimentary"),
+	({}, "guest, no discount"),
+]
+
+ROW_FIELDS = ("item", "description", "amount", "bill_to", "category", "is_void", "is_invoiced")
+
+
+def make_stay(name, fields):
+	"""
+	A Checked In reservation and its folio, inserted raw (no check-in side effects).
+	"""
+	folio = f"{name}-FOLIO"
+	frappe.get_doc({
+		"doctype": "Guest Folio",
+		"name": folio,
+		"naming_series": "FOLIO-",
+		"status": "Open",
+		"open_date": nowdate(),
+		"reservation": name,
+		"room": "_T-AUDIT-101",
+		"company": fields.get("company"),
+	}).db_insert()
+
+	frappe.get_doc(dict({
+		"doctype": "Hotel Reservation",
+		"name": name,
+		"naming_series": "HR-.YYYY.-",
+		"guest": "_Test Audit Guest",
+		"room_type": ROOM_TYPE,
+		"room": "_T-AUDIT-101",
+		"status": "Checked In",
+		"arrival_date": add_days(nowdate(), -1),
+		"departure_date": add_days(nowdate(), 2),
+		"folio": folio,
+	}, **fields)).db_insert()
+	return name
+
+
+def get_rows(folio):
+	return frappe.get_all("Folio Transaction",
+		filters={"parent": folio, "parenttype": "Guest Folio"},
+		fields=["name", "idx", *ROW_FIELDS],
+		order_by="idx asc, creation asc",
+	)
+
+
+def get_mirrors(rows, reservation):
+	"""
+	The Master Folio copies of rows, with the reservation name neutralised in the description.
+	"""
+	mirrors = frappe.get_all("Folio Transaction",
+		filters={"parent": MASTER_FOLIO, "mirror_of": ["in", [row.name for row in rows] or [""]]},
+		fields=["mirror_of", *ROW_FIELDS],
+	)
+	sources = {row.name: row.item for row in rows}
+	return sorted(
+		(sources[m.mirror_of], m.description.replace(reservation, "<res>"), *(m[f] for f in ROW_FIELDS[2:]))
+		for m in mirrors
+	)
+
+
+def get_balance(folio):
+	return frappe.db.get_value("Guest Folio", folio, ["total_charges", "total_payments", "outstanding_balance"])
+
+
+class TestNightAuditRun(FrappeTestCase):
+	def setUp(self):
+		if not frappe.db.exists("Hotel Room Type", ROOM_TYPE):
+			frappe.get_doc({
+				"doctype": "Hotel Room Type",
+				"room_type_name": ROOM_TYPE,
+				"default_rate": 120,
+			}).insert(ignore_permissions=True)
+
+		frappe.get_doc({
+			"doctype": "Guest Folio",
+			"name": MASTER_FOLIO,
+			"naming_series": "FOLIO-",
+			"status": "Open",
+			"open_date": nowdate(),
+			"is_company_master": 1,
+			"company": COMPANY,
+		}).db_insert()
+		invalidate_master_folio("company", {COMPANY})
+
+	def tearDown(self):
+		frappe.db.rollback()
+		invalidate_master_folio("company", {COMPANY})
+
+	def test_batch_audit_writes_the_same_rows_as_post_room_charge(self):
+		posting_date = nowdate()
+		pairs = [
+			(make_stay(f"_T-AUDIT-SINGLE-{i}", fields), make_stay(f"_T-AUDIT-BATCH-{i}", fields), case)
+			for i, (fields, case) in enumerate(CASES)
+		]
+
+		# Former path: one reservation at a time through post_room_charge
+		for res in get_active_reservations({"name": ["in", [single for single, _batch, _case in pairs]]}):
+			self.assertTrue(process_single_reservation(res, posting_date))
+		flush_balance_deltas()
+
+		# Set-based path
+		batch = get_active_reservations({"name": ["in", [batch for _single, batch, _case in pairs]]})
+		self.assertEqual(run_batch_audit(batch, posting_date), len(CASES))
+
+		for single, batch, case in pairs:
+			single_folio, batch_folio = f"{single}-FOLIO", f"{batch}-FOLIO"
+			single_rows, batch_rows = get_rows(single_folio), get_rows(batch_folio)
+
+			# Amounts, discount rows, bill to and posting category
+			self.assertEqual(
+				sorted(tuple(row[f] for f in ROW_FIELDS) for row in single_rows),
+				sorted(tuple(row[f] for f in ROW_FIELDS) for row in batch_rows),
+				case,
+			)
+			# Rent first, then its discount, numbered like appended child rows
+			self.assertEqual([row.idx for row in batch_rows], list(range(1, len(batch_rows) + 1)), case)
+			self.assertEqual(batch_rows[0].item, "ROOM-RENT", case)
+
+			# Master Folio mirrors
+			self.assertEqual(get_mirrors(single_rows, single), get_mirrors(batch_rows, batch), case)
+			if "company" in case:
+				self.assertTrue(get_mirrors(batch_rows, batch), case)
+
+			# Folio balances
+			self.assertEqual(get_balance(single_folio), get_balance(batch_folio), case)
+
+		# Master Folio balance: both paths added the same mirrored amounts
+		master = frappe.db.get_value("Guest Folio", MASTER_FOLIO, "outstanding_balance")
+		mirrored = frappe.db.sql("""
+			SELECT SUM(amount) FROM `tabFolio Transaction` WHERE parent = %s AND is_void = 0
+		""", (MASTER_FOLIO,))[0][0]
+		self.assertEqual(master, mirrored)
+
+	def test_phase_metrics_count_each_query_once(self):
+		outer, inner = AuditMetrics(), AuditMetrics()
+		try:
+			with outer.phase("Fetch"):
+				frappe.db.sql("SELECT 1")
+				with inner.phase("Posting"):
+					frappe.db.sql("SELECT 2")
+					frappe.db.sql("SELECT 3")
+				# Re-entering an open phase neither re-wraps sql nor double counts
+				with outer.phase("Fetch"):
+					frappe.db.sql("SELECT 4")
+				raise ValueError
+		except ValueError:
+			pass
+
+		self.assertEqual(outer.phases["Fetch"]["queries"], 2)
+		self.assertEqual(inner.phases["Posting"]["queries"], 2)
+		# The connection's own sql is back, even after an exception
+		self.assertNotIn("sql", vars(frappe.local.db))
+
+	def test_catchup_reports_nights_of_guests_checked_out_since(self):
+		# Checked out yesterday after an outage: the nights of today-3 and today-2 were never charged
+		name = make_stay("_T-AUDIT-GONE", {})
+		frappe.db.set_value("Hotel Reservation", name, {
+			"status": "Checked Out",
+			"arrival_date": add_days(nowdate(), -3),
+			"departure_date": add_days(nowdate(), -1),
+		})
+		frappe.db.set_value("Guest Folio", f"{name}-FOLIO", "status", "Closed")
+
+		metrics = AuditMetrics()
+		run_catchup_batch(add_days(nowdate(), -5), nowdate(), metrics)
+
+		# Nothing is posted to the Closed folio, and the missed nights are on the run log
+		self.assertEqual(get_rows(f"{name}-FOLIO"), [])
+		report = "\n".join(metrics.errors)
+		self.assertIn(f"{name}: {add_days(nowdate(), -3)}, {add_days(nowdate(), -2)}", report)
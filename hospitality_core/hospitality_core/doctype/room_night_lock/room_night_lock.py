@@ -0,0 +1,9 @@
+import frappe
+from frappe.model.document import Document
+
+
+class RoomNightLock(Document):
+    pass
+
+def on_doctype_update():
+    frappe.db.add_unique("Room Night Lock", ["room", "night_date"], constraint_name="unique_room_night")
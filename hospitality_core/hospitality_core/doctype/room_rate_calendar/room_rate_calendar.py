@@ -0,0 +1,9 @@
+import frappe
+from frappe.model.document import Document
+
+
+class RoomRateCalendar(Document):
+    pass
+
+def on_doctype_update():
+    frappe.db.add_unique("Room Rate Calendar", ["rate_source_type", "rate_source", "stay_date"], constraint_name="unique_rate_source_date")
@@ -0,0 +1,9 @@
+import frappe
+from frappe.model.document import Document
+
+
+class RoomTypeInventory(Document):
+    pass
+
+def on_doctype_update():
+    frappe.db.add_unique("Room Type Inventory", ["room_type", "inventory_date"], constraint_name="unique_room_type_date")
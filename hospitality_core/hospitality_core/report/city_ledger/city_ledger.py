@@ -1,6 +1,7 @@
 import frappe
 from frappe import _
-from frappe.utils import nowdate, date_diff
+from frappe.utils import date_diff, nowdate
+
 
 def execute(filters=None):
     if not filters:
@@ -12,28 +13,33 @@ def execute(filters=None):
         {"label": _("Open Since"), "fieldname": "open_date", "fieldtype": "Date", "width": 100},
         {"label": _("Age (Days)"), "fieldname": "age", "fieldtype": "Int", "width": 80},
         {"label": _("Guest Ref"), "fieldname": "guest_name", "fieldtype": "Data", "width": 150},
+        {"label": _("Brought Forward"), "fieldname": "brought_forward", "fieldtype": "Currency", "width": 120},
         {"label": _("Total Charges"), "fieldname": "total_charges", "fieldtype": "Currency", "width": 120},
         {"label": _("Payments/Credits"), "fieldname": "total_payments", "fieldtype": "Currency", "width": 120},
         {"label": _("Outstanding Balance"), "fieldname": "outstanding_balance", "fieldtype": "Currency", "width": 140}
     ]
 
-    # Logic: 
+    # Logic:
     # City Ledger now strictly contains Master Folios (is_company_master = 1).
-    # Individual guest folios (even if corporate) are part of Guest Ledger until checked out 
+    # Individual guest folios (even if corporate) are part of Guest Ledger until checked out
     # and transferred to the City Ledger (Master Folio).
-    
+
+    # Master Folios are rolled over monthly (api/rollover.py): the open folio only holds the
+    # current period, earlier periods are sealed in Folio Statements and enter as Brought Forward.
+    # Open Since / Age still count from the first sealed period of the company.
     conditions = "gf.status = 'Open' AND gf.is_company_master = 1"
-    
+
     if filters.get("company"):
-        conditions += f" AND gf.company = '{filters.get('company')}'"
+        conditions += " AND gf.company = %(company)s"
 
     sql = f"""
         SELECT
             gf.company,
             gf.name,
-            gf.open_date,
-            DATEDIFF(CURDATE(), gf.open_date) as age,
+            IFNULL(first.period_start, gf.open_date) as open_date,
+            DATEDIFF(CURDATE(), IFNULL(first.period_start, gf.open_date)) as age,
             guest.full_name as guest_name,
+            IFNULL(fs.closing_balance, 0) as brought_forward,
             gf.total_charges,
             gf.total_payments,
             gf.outstanding_balance
@@ -41,15 +47,23 @@ def execute(filters=None):
             `tabGuest Folio` gf
         LEFT JOIN
             `tabGuest` guest ON gf.guest = guest.name
+        LEFT JOIN
+            `tabFolio Statement` fs ON fs.next_folio = gf.name
+        LEFT JOIN (
+            SELECT company, MIN(period_start) as period_start
+            FROM `tabFolio Statement`
+            WHERE IFNULL(group_booking, '') = ''
+            GROUP BY company
+        ) first ON first.company = gf.company
         WHERE
             {conditions}
             AND gf.outstanding_balance != 0
         ORDER BY
-            gf.company, gf.open_date
+            gf.company, open_date
     """
 
-    data = frappe.db.sql(sql, as_dict=True)
-    
+    data = frappe.db.sql(sql, filters, as_dict=True)
+
     # Add Total Row
     if data:
         total = sum(d.outstanding_balance for d in data)
@@ -57,5 +71,5 @@ def execute(filters=None):
             "company": "<b>TOTAL CITY LEDGER</b>",
             "outstanding_balance": total
         })
-    
-    return columns, data
\ No newline at end of file
+
+    return columns, data
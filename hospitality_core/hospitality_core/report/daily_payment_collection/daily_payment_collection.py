@@ -1,6 +1,9 @@
 import frappe
 from frappe import _
 
+from hospitality_core.hospitality_core.api.report_cache import get_report_rows
+
+
 def execute(filters=None):
     if not filters:
         filters = {}
@@ -19,12 +22,27 @@ def execute(filters=None):
     date_from = filters.get("from_date")
     date_to = filters.get("to_date")
 
+    # Closed business dates are served from the report cache (see api/report_cache.py)
+    data = get_report_rows("Daily Payment Collection", filters, date_from, date_to, get_payments)
+    data.sort(key=lambda d: (d.mode_of_payment or "", d.posting_date))
+
+    # Calculate Totals by Mode
+    total_cash = sum(d.paid_amount for d in data if d.mode_of_payment == 'Cash')
+    total_card = sum(d.paid_amount for d in data if d.mode_of_payment != 'Cash')
+
+    if data:
+        data.append({"party_name": "<b>TOTAL CASH</b>", "paid_amount": total_cash})
+        data.append({"party_name": "<b>TOTAL OTHER</b>", "paid_amount": total_card})
+
+    return columns, data
+
+def get_payments(date_from, date_to):
     # SQL Logic:
     # 1. Payment Entry must be Submitted (docstatus=1)
     # 2. Match Date Range
     # 3. Match Reference No to Guest Folio naming conventions (FOLIO-xxxxx or MASTER-xxxxx)
     #    OR checks if the reference_no actually exists in the Guest Folio table for robustness.
-    
+
     sql = """
         SELECT
             pe.name,
@@ -40,8 +58,8 @@ def execute(filters=None):
             pe.docstatus = 1
             AND pe.posting_date BETWEEN %(from_date)s AND %(to_date)s
             AND (
-                pe.reference_no LIKE 'FOLIO%%' 
-                OR pe.reference_no LIKE 'MASTER%%' 
+                pe.reference_no LIKE 'FOLIO%%'
+                OR pe.reference_no LIKE 'MASTER%%'
                 OR pe.remarks LIKE '%%Hotel%%'
                 OR EXISTS (SELECT 1 FROM `tabGuest Folio` gf WHERE gf.name = pe.reference_no)
             )
@@ -49,14 +67,4 @@ def execute(filters=None):
             pe.mode_of_payment, pe.posting_date
     """
 
-    data = frappe.db.sql(sql, {"from_date": date_from, "to_date": date_to}, as_dict=True)
-
-    # Calculate Totals by Mode
-    total_cash = sum(d.paid_amount for d in data if d.mode_of_payment == 'Cash')
-    total_card = sum(d.paid_amount for d in data if d.mode_of_payment != 'Cash')
-    
-    if data:
-        data.append({"party_name": "<b>TOTAL CASH</b>", "paid_amount": total_cash})
-        data.append({"party_name": "<b>TOTAL OTHER</b>", "paid_amount": total_card})
-
-    return columns, data
\ No newline at end of file
+    return frappe.db.sql(sql, {"from_date": date_from, "to_date": date_to}, as_dict=True)
@@ -1,6 +1,10 @@
 import frappe
 from frappe import _
 
+from hospitality_core.hospitality_core.api.archive import get_source
+from hospitality_core.hospitality_core.api.report_cache import get_report_rows
+
+
 def execute(filters=None):
     if not filters:
         filters = {}
@@ -23,8 +27,28 @@ def execute(filters=None):
     # 2. We join `Item` to get the Item Group (Department)
     # 3. We exclude Voided transactions and Payments (Amount < 0)
     #    *Payments are Cash Flow, not Sales Revenue.
-    
-    sql = """
+    # 4. Closed folios older than the archive horizon are read from the archive tables
+    #    only when the range reaches back that far (see api/archive.get_source).
+    # 5. Closed business dates are served from the report cache (see api/report_cache.py),
+    #    only the dates still open are queried.
+    data = get_report_rows("Daily Sales Consumption", filters, date_from, date_to, get_sales)
+
+    # Add Summary Row
+    total_sales = sum([d.amount for d in data])
+    if data:
+        data.append({
+            "posting_date": "",
+            "room": "",
+            "guest_name": "<b>TOTAL</b>",
+            "item_group": "",
+            "description": "",
+            "amount": total_sales
+        })
+
+    return columns, data
+
+def get_sales(date_from, date_to):
+    sql = f"""
         SELECT
             ft.posting_date,
             gf.room,
@@ -33,9 +57,9 @@ def execute(filters=None):
             ft.description,
             ft.amount
         FROM
-            `tabFolio Transaction` ft
+            {get_source('Folio Transaction', date_from)} ft
         INNER JOIN
-            `tabGuest Folio` gf ON ft.parent = gf.name
+            {get_source('Guest Folio', date_from)} gf ON ft.parent = gf.name
         LEFT JOIN
             `tabGuest` guest ON gf.guest = guest.name
         LEFT JOIN
@@ -43,23 +67,9 @@ def execute(filters=None):
         WHERE
             ft.posting_date BETWEEN %(from_date)s AND %(to_date)s
             AND ft.is_void = 0
-            AND ft.amount > 0 
+            AND ft.amount > 0
         ORDER BY
             ft.posting_date, item.item_group
     """
-    
-    data = frappe.db.sql(sql, {"from_date": date_from, "to_date": date_to}, as_dict=True)
-    
-    # Add Summary Row
-    total_sales = sum([d.amount for d in data])
-    if data:
-        data.append({
-            "posting_date": "",
-            "room": "",
-            "guest_name": "<b>TOTAL</b>",
-            "item_group": "",
-            "description": "",
-            "amount": total_sales
-        })
 
-    return columns, data
\ No newline at end of file
+    return frappe.db.sql(sql, {"from_date": date_from, "to_date": date_to}, as_dict=True)
@@ -1,6 +1,9 @@
 import frappe
 from frappe import _
 
+from hospitality_core.hospitality_core.api.report_cache import get_report_rows
+
+
 def execute(filters=None):
     columns = [
         {"label": _("Date"), "fieldname": "posting_date", "fieldtype": "Date", "width": 100},
@@ -17,18 +20,41 @@ def execute(filters=None):
     from_date = filters.get("from_date")
     to_date = filters.get("to_date")
 
+    # Closed business dates are served from the report cache (see api/report_cache.py)
+    data = get_report_rows("Discount and Complimentary Report", filters, from_date, to_date, get_allowances)
+    data.sort(key=lambda d: d['posting_date'], reverse=True)
+
+    # Chart Data
+    comp_total = sum([d['amount'] for d in data if d['type'] == 'Complimentary'])
+    disc_total = sum([d['amount'] for d in data if d['type'] == 'Discount'])
+
+    chart = {
+        "data": {
+            "labels": ["Complimentary", "Discounts"],
+            "datasets": [{"name": "Value Given", "values": [comp_total, disc_total]}]
+        },
+        "type": "bar",
+        "colors": ["#e74c3c", "#f39c12"]
+    }
+
+    if data:
+        data.append({
+            "description": "<b>TOTAL GIVEN</b>",
+            "amount": sum([d['amount'] for d in data])
+        })
+
+    return columns, data, None, chart
+
+def get_allowances(from_date, to_date):
     # Logic:
     # Find transactions where amount < 0 (Credits)
-    # Exclude Payments (Cash, Card, Transfer)
-    # Include Items named 'DISCOUNT', 'COMPLIMENTARY' or Descriptions containing 'Discount'
-    
+    # Posting category Discount or Complimentary (stamped at insert, see folio.get_transaction_category):
+    # payments, transfers and Master Folio mirrors are left out by an indexed (posting_date, category) scan
+
     sql = """
         SELECT
             ft.posting_date,
-            CASE 
-                WHEN ft.item = 'COMPLIMENTARY' OR ft.description LIKE '%%Complimentary%%' THEN 'Complimentary'
-                ELSE 'Discount'
-            END as type,
+            IF(ft.category = 'Complimentary', 'Complimentary', 'Discount') as type,
             gf.room,
             g.full_name as guest_name,
             ft.item,
@@ -40,33 +66,10 @@ def execute(filters=None):
         JOIN `tabGuest Folio` gf ON ft.parent = gf.name
         LEFT JOIN `tabGuest` g ON gf.guest = g.name
         WHERE ft.posting_date BETWEEN %s AND %s
+        AND ft.category IN ('Discount', 'Complimentary')
         AND ft.is_void = 0
         AND ft.amount < 0
-        AND ft.item NOT IN ('PAYMENT', 'PAYMENT-CASH', 'PAYMENT-CARD') -- Adjust based on your payment item codes
-        AND ft.item IN ('DISCOUNT', 'COMPLIMENTARY') 
-        OR (ft.amount < 0 AND ft.description LIKE '%%Discount%%' AND ft.item NOT IN ('PAYMENT'))
         ORDER BY ft.posting_date DESC
     """
-    
-    data = frappe.db.sql(sql, (from_date, to_date), as_dict=True)
-
-    # Chart Data
-    comp_total = sum([d['amount'] for d in data if d['type'] == 'Complimentary'])
-    disc_total = sum([d['amount'] for d in data if d['type'] == 'Discount'])
-
-    chart = {
-        "data": {
-            "labels": ["Complimentary", "Discounts"],
-            "datasets": [{"name": "Value Given", "values": [comp_total, disc_total]}]
-        },
-        "type": "bar",
-        "colors": ["#e74c3c", "#f39c12"]
-    }
-    
-    if data:
-        data.append({
-            "description": "<b>TOTAL GIVEN</b>",
-            "amount": sum([d['amount'] for d in data])
-        })
 
-    return columns, data, None, chart
\ No newline at end of file
+    return frappe.db.sql(sql, (from_date, to_date), as_dict=True)
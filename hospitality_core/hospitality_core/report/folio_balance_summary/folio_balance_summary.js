@@ -8,6 +8,12 @@ frappe.query_reports["Folio Balance Summary"] = {
             "fieldtype": "Link",
             "options": "Company",
             "default": frappe.defaults.get_user_default("Company")
+        },
+        {
+            // Empty: live balances. A past date reads the closing balances recorded by the Night Audit.
+            "fieldname": "as_on_date",
+            "label": __("As On Date"),
+            "fieldtype": "Date"
         }
     ],
     "formatter": function(value, row, column, data, default_formatter) {
@@ -1,5 +1,12 @@
 import frappe
 from frappe import _
+from frappe.utils import getdate, nowdate
+
+from hospitality_core.hospitality_core.api.daily_statistics import (
+    compute_daily_statistics,
+    get_daily_statistics,
+)
+
 
 def execute(filters=None):
     columns = [
@@ -9,6 +16,11 @@ def execute(filters=None):
         {"label": _("Total Receivable"), "fieldname": "balance", "fieldtype": "Currency", "width": 150}
     ]
 
+    # Past date: closing balances from the Hotel Daily Statistics written by the night audit
+    as_on_date = filters.get("as_on_date") if filters else None
+    if as_on_date and getdate(as_on_date) < getdate(nowdate()):
+        return columns, get_stored_summary(as_on_date)
+
     data = []
 
     # 1. Calculate Guest Ledger (In-House Private Guests)
@@ -16,7 +28,7 @@ def execute(filters=None):
     guest_stats = frappe.db.sql("""
         SELECT COUNT(name) as cnt, SUM(outstanding_balance) as bal
         FROM `tabGuest Folio`
-        WHERE status = 'Open' 
+        WHERE status = 'Open'
         AND (company IS NULL OR company = '')
     """, as_dict=True)[0]
 
@@ -28,13 +40,13 @@ def execute(filters=None):
     })
 
     # 2. Calculate City Ledger (Corporate/Direct Bill)
-    # Logic: Status Open, Company IS set. 
+    # Logic: Status Open, Company IS set.
     # This includes the Master Company Folios created by the new logic.
     city_stats = frappe.db.sql("""
         SELECT COUNT(name) as cnt, SUM(outstanding_balance) as bal
         FROM `tabGuest Folio`
-        WHERE status = 'Open' 
-        AND company IS NOT NULL 
+        WHERE status = 'Open'
+        AND company IS NOT NULL
         AND company != ''
     """, as_dict=True)[0]
 
@@ -65,4 +77,16 @@ def execute(filters=None):
         "colors": ["#28a745", "#007bff"]
     }
 
-    return columns, data, None, chart
\ No newline at end of file
+    return columns, data, None, chart
+
+def get_stored_summary(as_on_date):
+    stats = get_daily_statistics(as_on_date, as_on_date).get(getdate(as_on_date))
+    if not stats:
+        # Not recorded yet, or stale until the background refresh rewrites it
+        stats = frappe._dict(compute_daily_statistics(as_on_date, as_on_date)[0])
+
+    return [
+        {"ledger_type": "Guest Ledger", "description": "Private Pay, closing balance of the day", "balance": stats.guest_ledger_balance},
+        {"ledger_type": "City Ledger", "description": "Corporate Accounts, closing balance of the day", "balance": stats.city_ledger_balance},
+        {"ledger_type": "<b>TOTAL</b>", "description": "", "balance": stats.guest_ledger_balance + stats.city_ledger_balance}
+    ]
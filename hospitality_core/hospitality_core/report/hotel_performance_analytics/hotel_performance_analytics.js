@@ -13,6 +13,18 @@ frappe.query_reports["Hotel Performance Analytics"] = {
             "fieldtype": "Date",
             "default": frappe.datetime.now_date(),
             "reqd": 1
+        },
+        {
+            "fieldname": "breakdown",
+            "label": __("Breakdown"),
+            "fieldtype": "Select",
+            "options": "\nRoom Type\nSegment"
+        },
+        {
+            "fieldname": "compare_to",
+            "label": __("Compare To"),
+            "fieldtype": "Select",
+            "options": "\nPrevious Period\nPrevious Year"
         }
     ]
 };
\ No newline at end of file
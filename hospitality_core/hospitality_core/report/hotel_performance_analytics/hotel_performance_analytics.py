@@ -1,13 +1,27 @@
 import frappe
 from frappe import _
-from frappe.utils import add_days, date_diff, getdate, flt
+from frappe.utils import add_days, date_diff, flt
+
+from hospitality_core.hospitality_core.api.performance import get_comparison_start, get_performance
+from hospitality_core.hospitality_core.api.report_cache import get_report_rows
+
 
 def execute(filters=None):
     if not filters:
         filters = {}
 
+    breakdown = filters.get("breakdown") or None
+    compare_to = filters.get("compare_to") or None
+
     columns = [
-        {"label": _("Date"), "fieldname": "date", "fieldtype": "Date", "width": 110},
+        {"label": _("Date"), "fieldname": "date", "fieldtype": "Date", "width": 110}
+    ]
+    if breakdown == "Room Type":
+        columns.append({"label": _("Room Type"), "fieldname": "group", "fieldtype": "Link", "options": "Hotel Room Type", "width": 140})
+    elif breakdown == "Segment":
+        columns.append({"label": _("Segment"), "fieldname": "group", "fieldtype": "Data", "width": 110})
+
+    columns += [
         {"label": _("Total Rooms"), "fieldname": "total_rooms", "fieldtype": "Int", "width": 100},
         {"label": _("Occupied"), "fieldname": "occupied_rooms", "fieldtype": "Int", "width": 100},
         {"label": _("Occupancy %"), "fieldname": "occupancy_pct", "fieldtype": "Percent", "width": 110},
@@ -16,75 +30,100 @@ def execute(filters=None):
         {"label": _("RevPAR"), "fieldname": "revpar", "fieldtype": "Currency", "width": 120, "description": "Revenue Per Available Room"}
     ]
 
-    data = []
-    
-    start_date = getdate(filters.get("from_date"))
-    end_date = getdate(filters.get("to_date"))
-    
-    # 1. Total Inventory (Count of enabled rooms)
-    total_rooms_count = frappe.db.count("Hotel Room", filters={"is_enabled": 1})
-
-    # 2. Fetch all Room Revenue Transactions in range
-    # Grouped by Date
-    revenue_map = {}
-    rev_sql = """
-        SELECT posting_date, SUM(amount) as total
-        FROM `tabFolio Transaction`
-        WHERE posting_date BETWEEN %s AND %s
-        AND is_void = 0
-        AND item IN (SELECT name FROM `tabItem` WHERE item_code='ROOM-RENT' OR item_group='Accommodation')
-        GROUP BY posting_date
-    """
-    rev_data = frappe.db.sql(rev_sql, (start_date, end_date), as_dict=True)
-    for r in rev_data:
-        revenue_map[str(r.posting_date)] = flt(r.total)
-
-    # 3. Loop through dates
-    curr_date = start_date
-    while curr_date <= end_date:
-        str_date = curr_date.strftime("%Y-%m-%d")
-        
-        # Calculate Occupied
-        # Count reservations where Date is within [Arrival, Departure)
-        # We explicitly exclude Checked Out if they left BEFORE this date, 
-        # but the date range check handles that.
-        # Status must be Checked In (for live) or Checked Out (for history).
-        occupied_count = frappe.db.count("Hotel Reservation", {
-            "arrival_date": ["<=", str_date],
-            "departure_date": [">", str_date], 
-            "status": ["in", ["Checked In", "Checked Out"]] 
-        })
+    if compare_to:
+        columns += [
+            {"label": _("Compared Date"), "fieldname": "compare_date", "fieldtype": "Date", "width": 110},
+            {"label": _("Occupancy % (Compared)"), "fieldname": "compare_occupancy_pct", "fieldtype": "Percent", "width": 110},
+            {"label": _("ADR (Compared)"), "fieldname": "compare_adr", "fieldtype": "Currency", "width": 120},
+            {"label": _("RevPAR (Compared)"), "fieldname": "compare_revpar", "fieldtype": "Currency", "width": 120},
+            {"label": _("RevPAR Change %"), "fieldname": "revpar_change", "fieldtype": "Percent", "width": 110}
+        ]
 
-        revenue = revenue_map.get(str_date, 0.0)
-        
-        # Calculations
-        occupancy = (occupied_count / total_rooms_count * 100) if total_rooms_count else 0.0
-        adr = (revenue / occupied_count) if occupied_count else 0.0
-        revpar = (revenue / total_rooms_count) if total_rooms_count else 0.0
-
-        data.append({
-            "date": str_date,
-            "total_rooms": total_rooms_count,
-            "occupied_rooms": occupied_count,
-            "occupancy_pct": flt(occupancy, 2),
-            "revenue": revenue,
-            "adr": flt(adr, 2),
-            "revpar": flt(revpar, 2)
-        })
+    # 1. Per date: one row per group and the whole-hotel KPIs. Closed business dates are served
+    #    from the report cache (see api/report_cache.py), the open tail is computed live. A slice
+    #    is compared with the same slice of the comparison window of the whole range.
+    from_date, to_date = filters.get("from_date"), filters.get("to_date")
+    comparison_start = get_comparison_start(from_date, to_date, compare_to)
+    shift = date_diff(comparison_start, from_date) if comparison_start else 0
+
+    def compute(start, end):
+        return get_daily_kpis(start, end, breakdown, compare_to, add_days(start, shift) if comparison_start else None)
+
+    days = get_report_rows("Hotel Performance Analytics", filters, from_date, to_date, compute,
+        offsets=(0, shift) if comparison_start else (0,))
+    if not days:
+        return columns, []
 
-        curr_date = add_days(curr_date, 1)
+    data = [row for day in days for row in day["rows"]]
 
-    # Chart Configuration
+    # Chart Configuration (whole hotel)
     chart = {
         "data": {
-            "labels": [d["date"] for d in data],
+            "labels": [str(day["date"]) for day in days],
             "datasets": [
-                {"name": "Occupancy %", "values": [d["occupancy_pct"] for d in data]},
-                {"name": "RevPAR", "values": [d["revpar"] for d in data]}
+                {"name": _("Occupancy %"), "values": [day["occupancy_pct"] for day in days]},
+                {"name": _("RevPAR"), "values": [day["revpar"] for day in days]}
             ]
         },
         "type": "line",
-        "colors": ["#7cd6fd", "#743ee2"]
+        "colors": ["#7cd6fd", "#743ee2", "#b8c2cc", "#ffa3ef"]
     }
+    if comparison_start:
+        chart["data"]["datasets"] += [
+            {"name": _("Occupancy % (Compared)"), "values": [day["compare_occupancy_pct"] for day in days]},
+            {"name": _("RevPAR (Compared)"), "values": [day["compare_revpar"] for day in days]}
+        ]
+
+    return columns, data, None, chart
+
+def get_daily_kpis(from_date, to_date, breakdown, compare_to, comparison_start):
+    """
+    All windows, groups and KPIs of [from_date, to_date] in one pass of the engine
+    (see api/performance.py), as one entry per date.
+    """
+    windows = get_performance(from_date, to_date, breakdown, compare_to, comparison_start)
+    if not windows:
+        return []
+
+    current = windows[0]
+    comparison = windows[1] if len(windows) > 1 else None
+
+    days = []
+    for i, date in enumerate(current.dates):
+        rows = []
+        for group, kpis in current.groups.items():
+            row = {
+                "date": date,
+                "group": group,
+                "total_rooms": kpis.total_rooms[i],
+                "occupied_rooms": kpis.occupied_rooms[i],
+                "occupancy_pct": kpis.occupancy_pct[i],
+                "revenue": kpis.revenue[i],
+                "adr": kpis.adr[i],
+                "revpar": kpis.revpar[i]
+            }
+
+            compared = comparison.groups.get(group) if comparison else None
+            if comparison:
+                row["compare_date"] = comparison.dates[i]
+            if compared:
+                row.update({
+                    "compare_occupancy_pct": compared.occupancy_pct[i],
+                    "compare_adr": compared.adr[i],
+                    "compare_revpar": compared.revpar[i],
+                    "revpar_change": flt((kpis.revpar[i] - compared.revpar[i]) / compared.revpar[i] * 100, 2)
+                        if compared.revpar[i] else 0.0
+                })
+
+            rows.append(row)
+
+        days.append({
+            "date": date,
+            "rows": rows,
+            "occupancy_pct": current.total.occupancy_pct[i],
+            "revpar": current.total.revpar[i],
+            "compare_occupancy_pct": comparison.total.occupancy_pct[i] if comparison else None,
+            "compare_revpar": comparison.total.revpar[i] if comparison else None
+        })
 
-    return columns, data, None, chart
\ No newline at end of file
+    return days
@@ -0,0 +1,139 @@
+# Copyright (c) 2025, 	Gift Braimah and Contributors
+# See license.txt
+
+import random
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, flt, getdate, nowdate
+
+from hospitality_core.hospitality_core.api import performance, stay_counts
+from hospitality_core.hospitality_core.api.performance import compute_kpis, get_performance
+from hospitality_core.hospitality_core.api.stay_counts import count_nights
+
+ROOM_TYPES = ("_Test KPI Single", "_Test KPI Double")
+
+
+def each_engine(check):
+	"""
+	Runs check on the NumPy path (when installed), then on the pure-Python fallback.
+	"""
+	check()
+	with patch.object(stay_counts, "numpy", None), patch.object(performance, "numpy", None):
+		check()
+
+
+def old_kpis(occupied, revenue, total_rooms):
+	"""
+	The per-day formulas of the report before the KPI engine.
+	"""
+	return {
+		"occupancy_pct": flt((occupied / total_rooms * 100) if total_rooms else 0.0, 2),
+		"adr": flt((revenue / occupied) if occupied else 0.0, 2),
+		"revpar": flt((revenue / total_rooms) if total_rooms else 0.0, 2),
+	}
+
+
+def old_occupied(date, room_type=None):
+	"""
+	The per-day frappe.db.count of the report before the KPI engine.
+	"""
+	filters = {
+		"arrival_date": ["<=", date],
+		"departure_date": [">", date],
+		"status": ["in", ["Checked In", "Checked Out"]],
+	}
+	if room_type:
+		filters["room_type"] = room_type
+	return frappe.db.count("Hotel Reservation", filters)
+
+
+class TestHotelPerformanceAnalytics(FrappeTestCase):
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_sweep_matches_per_day_count(self):
+		start = getdate("2025-03-01")
+		stays = []
+		for _ in range(300):
+			arrival = add_days(start, random.randint(-20, 40))
+			# Includes zero-night and out-of-range stays, which count nothing
+			stays.append((random.choice(ROOM_TYPES), arrival, add_days(arrival, random.randint(0, 15))))
+		end = add_days(start, 30)
+
+		def check():
+			counts = count_nights(stays, start, end)
+			for room_type in ROOM_TYPES:
+				for i in range(31):
+					date = getdate(add_days(start, i))
+					expected = sum(
+						1 for key, arrival, departure in stays
+						if key == room_type and getdate(arrival) <= date < getdate(departure)
+					)
+					self.assertEqual((counts.get(room_type) or [0] * 31)[i], expected)
+
+		each_engine(check)
+
+	def test_kpis_match_per_day_formulas(self):
+		supply = [random.randint(0, 40) for _ in range(60)]
+		occupied = [random.randint(0, s) for s in supply]
+		revenue = [flt(random.uniform(0, 5000), 2) if o else 0.0 for o in occupied]
+
+		def check():
+			kpis = compute_kpis(supply, occupied, revenue)
+			for i in range(60):
+				expected = old_kpis(occupied[i], revenue[i], supply[i])
+				self.assertEqual(kpis.occupancy_pct[i], expected["occupancy_pct"])
+				self.assertEqual(kpis.adr[i], expected["adr"])
+				self.assertEqual(kpis.revpar[i], expected["revpar"])
+
+		each_engine(check)
+
+	def test_engine_matches_per_day_count(self):
+		today = getdate(nowdate())
+		statuses = ["Checked Out", "Checked Out", "Checked In", "Cancelled", "Reserved"]
+		for i in range(60):
+			arrival = add_days(today, random.randint(-45, -5))
+			frappe.get_doc({
+				"doctype": "Hotel Reservation",
+				"name": f"_T-KPI-{i}",
+				"naming_series": "HR-.YYYY.-",
+				"guest": "_Test KPI Guest",
+				"room_type": random.choice(ROOM_TYPES),
+				"room": f"_T-KPI-ROOM-{i}",
+				"status": random.choice(statuses),
+				"arrival_date": arrival,
+				"departure_date": add_days(arrival, random.randint(1, 10)),
+				"is_company_guest": int(i % 3 == 0),
+			}).db_insert()
+
+		from_date, to_date = add_days(today, -20), add_days(today, -11)
+		total_rooms = frappe.db.count("Hotel Room", {"is_enabled": 1})
+
+		def check():
+			for breakdown in ("Room Type", "Segment"):
+				windows = get_performance(from_date, to_date, breakdown, "Previous Period")
+				# The comparison window is the same number of days right before the range
+				self.assertEqual(windows[1].dates[-1], getdate(add_days(from_date, -1)))
+
+				for window in windows:
+					for i, date in enumerate(window.dates):
+						occupied = old_occupied(date)
+						self.assertEqual(window.total.total_rooms[i], total_rooms)
+						self.assertEqual(window.total.occupied_rooms[i], occupied)
+						self.assertEqual(
+							sum(kpis.occupied_rooms[i] for kpis in window.groups.values()), occupied
+						)
+
+						expected = old_kpis(occupied, window.total.revenue[i], total_rooms)
+						self.assertEqual(window.total.occupancy_pct[i], expected["occupancy_pct"])
+						self.assertEqual(window.total.adr[i], expected["adr"])
+						self.assertEqual(window.total.revpar[i], expected["revpar"])
+
+						if breakdown == "Room Type":
+							for room_type in ROOM_TYPES:
+								kpis = window.groups.get(room_type)
+								self.assertEqual(kpis.occupied_rooms[i] if kpis else 0, old_occupied(date, room_type))
+
+		each_engine(check)
@@ -2,12 +2,15 @@ import frappe
 from frappe import _
 from frappe.utils import getdate, nowdate
 
+from hospitality_core.hospitality_core.api.archive import get_source
+
+
 def execute(filters=None):
     if not filters:
         filters = {}
-        
+
     target_date = filters.get("date") or nowdate()
-    
+
     columns = [
         {"label": _("Room"), "fieldname": "room", "fieldtype": "Link", "options": "Hotel Room", "width": 80},
         {"label": _("Guest Name"), "fieldname": "guest_name", "fieldtype": "Data", "width": 150},
@@ -20,17 +23,18 @@ def execute(filters=None):
         {"label": _("Balance"), "fieldname": "balance", "fieldtype": "Currency", "width": 120}
     ]
 
-    # Logic: 
+    # Logic:
     # House List = Rooms Occupied on Target Date.
     # Logic: Reservation Arrival <= Target AND Reservation Departure > Target
     # We filter for Status = Checked In (if today) or was active (deduced).
-    
+
     # Note: If looking at the past, strictly relying on current 'Checked In' status is wrong.
     # We must rely on dates.
     # However, 'Checked Out' reservations are also valid for the House List of *yesterday*.
-    
-    sql = """
-        SELECT 
+
+    # Departed stays older than the archive horizon live in the archive tables
+    sql = f"""
+        SELECT
             res.room,
             guest.full_name as guest_name,
             res.status,
@@ -40,24 +44,24 @@ def execute(filters=None):
             res.company,
             folio.outstanding_balance as balance
         FROM
-            `tabHotel Reservation` res
+            {get_source('Hotel Reservation', target_date)} res
         LEFT JOIN
             `tabGuest` guest ON res.guest = guest.name
         LEFT JOIN
-            `tabGuest Folio` folio ON res.folio = folio.name
+            {get_source('Guest Folio', target_date)} folio ON res.folio = folio.name
         WHERE
             res.arrival_date <= %(date)s
             AND res.departure_date > %(date)s
-            AND res.status IN ('Checked In', 'Checked Out') 
+            AND res.status IN ('Checked In', 'Checked Out')
     """
-    
-    # Note: We include 'Checked Out' because if I run the report for Yesterday, 
+
+    # Note: We include 'Checked Out' because if I run the report for Yesterday,
     # a guest who checked out Today was "In House" Yesterday.
-    # If I run it for Today, 'Checked Out' guests are gone (Departure > Today would be false), 
+    # If I run it for Today, 'Checked Out' guests are gone (Departure > Today would be false),
     # so they are correctly excluded.
-    
+
     data = frappe.db.sql(sql, {"date": target_date}, as_dict=True)
-    
+
     # Add Total Rooms Occupied count
     report_summary = []
     if data:
@@ -65,4 +69,4 @@ def execute(filters=None):
             {"value": len(data), "label": "Total Occupied Rooms", "datatype": "Int"},
         ]
 
-    return columns, data, None, None, report_summary
\ No newline at end of file
+    return columns, data, None, None, report_summary
@@ -1,6 +1,9 @@
 import frappe
 from frappe import _
-from frappe.utils import add_days, getdate, date_diff, flt
+from frappe.utils import flt, getdate
+
+from hospitality_core.hospitality_core.api.inventory import get_inventory, get_room_counts
+
 
 def execute(filters=None):
     if not filters:
@@ -17,83 +20,38 @@ def execute(filters=None):
     ]
 
     data = []
-    
+
     start_date = getdate(filters.get("from_date"))
     end_date = getdate(filters.get("to_date"))
     filter_type = filters.get("room_type")
 
-    # 1. Get Inventory
-    room_types_filters = {}
+    # 1. Room types with enabled rooms
+    all_types = list(get_room_counts())
     if filter_type:
-        room_types_filters["room_type_name"] = filter_type
-
-    # Get counts of enabled rooms per type
-    inventory = frappe.db.sql("""
-        SELECT room_type, COUNT(name) as cnt 
-        FROM `tabHotel Room` 
-        WHERE is_enabled = 1 
-        GROUP BY room_type
-    """, as_dict=True)
-    
-    inventory_map = {i.room_type: i.cnt for i in inventory}
-    
-    all_types = list(inventory_map.keys())
-    if filter_type and filter_type in all_types:
-        all_types = [filter_type]
-
-    # 2. Iterate Dates
-    curr_date = start_date
-    while curr_date <= end_date:
-        str_date = curr_date.strftime("%Y-%m-%d")
-        
-        # Get OOO Rooms for this specific date (Assuming OOO status is live, not historical in this simplified model)
-        # Note: A proper maintenance module would have OOO logs with dates. 
-        # Here we check current OOO status for "Today", but for future dates this might be inaccurate unless we have OOO Schedule.
-        # For simplicity, we assume current OOO status applies to the forecast range unless expanded.
-        ooo_data = frappe.db.sql("""
-            SELECT room_type, COUNT(name) as cnt 
-            FROM `tabHotel Room` 
-            WHERE status = 'Out of Order'
-            GROUP BY room_type
-        """, as_dict=True)
-        ooo_map = {o.room_type: o.cnt for o in ooo_data}
-
-        # Get Sold Rooms (Reservations covering this date)
-        # Arrival <= Date AND Departure > Date
-        sold_sql = """
-            SELECT room_type, COUNT(name) as cnt
-            FROM `tabHotel Reservation`
-            WHERE status IN ('Reserved', 'Checked In')
-            AND arrival_date <= %s AND departure_date > %s
-            GROUP BY room_type
-        """
-        sold_data = frappe.db.sql(sold_sql, (str_date, str_date), as_dict=True)
-        sold_map = {s.room_type: s.cnt for s in sold_data}
-
-        for rt in all_types:
-            total = inventory_map.get(rt, 0)
-            ooo = ooo_map.get(rt, 0)
-            sold = sold_map.get(rt, 0)
-            
-            # Net Availability
-            avail = total - ooo - sold
-            if avail < 0: avail = 0
-            
-            occ_pct = 0.0
-            net_inventory = total - ooo
-            if net_inventory > 0:
-                occ_pct = (sold / net_inventory) * 100.0
-
-            data.append({
-                "date": str_date,
-                "room_type": rt,
-                "total_rooms": total,
-                "ooo": ooo,
-                "sold": sold,
-                "available": avail,
-                "occupancy_pct": flt(occ_pct, 1)
-            })
-
-        curr_date = add_days(curr_date, 1)
-
-    return columns, data
\ No newline at end of file
+        all_types = [rt for rt in all_types if rt == filter_type]
+
+    # 2. Range engine (sold = Confirmed + Checked In): the stored Room Type Inventory for
+    # today to the horizon, one reservation query swept into per-night counts for any other
+    # dates. A fixed number of queries whatever the number of days.
+    # Out of Order is the current room status: there is no dated OOO schedule.
+    for row in get_inventory(start_date, end_date, all_types):
+        total = row.total_rooms
+        ooo = row.out_of_order
+        sold = row.sold + row.held
+
+        occ_pct = 0.0
+        net_inventory = total - ooo
+        if net_inventory > 0:
+            occ_pct = (sold / net_inventory) * 100.0
+
+        data.append({
+            "date": row.inventory_date,
+            "room_type": row.room_type,
+            "total_rooms": total,
+            "ooo": ooo,
+            "sold": sold,
+            "available": row.available,
+            "occupancy_pct": flt(occ_pct, 1)
+        })
+
+    return columns, data
@@ -0,0 +1,96 @@
+# Copyright (c) 2025, 	Gift Braimah and Contributors
+# See license.txt
+
+import random
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, getdate, nowdate
+
+from hospitality_core.hospitality_core.report.room_availability_report.room_availability_report import execute
+
+ROOM_TYPES = ("_Test Sweep Single", "_Test Sweep Suite")
+# Per room type: 3 rooms in service, 1 Out of Order, 1 disabled (Out of Order but not counted)
+ROOMS = (("Available", 1), ("Available", 1), ("Dirty", 1), ("Out of Order", 1), ("Out of Order", 0))
+
+
+def old_sold(room_type, date):
+	"""
+	The per-day count of the report before the range engine.
+	"""
+	return frappe.db.count("Hotel Reservation", {
+		"room_type": room_type,
+		"status": ["in", ["Reserved", "Checked In"]],
+		"arrival_date": ["<=", date],
+		"departure_date": [">", date],
+	})
+
+
+class TestRoomAvailabilityReport(FrappeTestCase):
+	def setUp(self):
+		for room_type in ROOM_TYPES:
+			if not frappe.db.exists("Hotel Room Type", room_type):
+				frappe.get_doc({
+					"doctype": "Hotel Room Type",
+					"room_type_name": room_type,
+					"default_rate": 100,
+				}).insert(ignore_permissions=True)
+
+			for i, (status, is_enabled) in enumerate(ROOMS):
+				frappe.get_doc({
+					"doctype": "Hotel Room",
+					"room_number": f"{room_type}-{i}",
+					"room_type": room_type,
+					"status": status,
+					"is_enabled": is_enabled,
+				}).insert(ignore_permissions=True)
+
+		# Overlapping stays in every status, inserted raw: the stored rows are then built from
+		# the reservations by the sweep on first read
+		today = getdate(nowdate())
+		statuses = ["Reserved", "Checked In", "Checked Out", "Cancelled"]
+		for i in range(80):
+			arrival = add_days(today, random.randint(-15, 15))
+			frappe.get_doc({
+				"doctype": "Hotel Reservation",
+				"name": f"_T-SWEEP-{i}",
+				"naming_series": "HR-.YYYY.-",
+				"guest": "_Test Sweep Guest",
+				"room_type": random.choice(ROOM_TYPES),
+				"room": f"_T-SWEEP-ROOM-{i}",
+				"status": random.choice(statuses),
+				"arrival_date": arrival,
+				"departure_date": add_days(arrival, random.randint(1, 8)),
+			}).db_insert()
+		frappe.db.delete("Room Type Inventory", {"room_type": ["in", ROOM_TYPES]})
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_sweep_matches_per_day_count(self):
+		# Past dates (computed) and today onwards (stored window) alike
+		from_date = getdate(add_days(nowdate(), -10))
+		_columns, data = execute({"from_date": from_date, "to_date": add_days(from_date, 30)})
+		rows = {(getdate(row["date"]), row["room_type"]): row for row in data}
+
+		for i in range(31):
+			date = getdate(add_days(from_date, i))
+			for room_type in ROOM_TYPES:
+				row = rows[(date, room_type)]
+				sold = old_sold(room_type, date)
+
+				self.assertEqual(row["sold"], sold)
+				# Out of Order counts only enabled rooms
+				self.assertEqual(row["total_rooms"], 4)
+				self.assertEqual(row["ooo"], 1)
+				self.assertEqual(row["available"], max(4 - 1 - sold, 0))
+
+	def test_room_type_filter(self):
+		filters = {"from_date": nowdate(), "to_date": add_days(nowdate(), 3)}
+
+		_columns, data = execute(dict(filters, room_type=ROOM_TYPES[0]))
+		self.assertEqual({row["room_type"] for row in data}, {ROOM_TYPES[0]})
+
+		# An unknown room type yields nothing (it used to fall back to every type)
+		_columns, data = execute(dict(filters, room_type="_Test Sweep Unknown"))
+		self.assertEqual(data, [])
@@ -1,6 +1,10 @@
 import frappe
 from frappe import _
 
+from hospitality_core.hospitality_core.api.archive import get_source
+from hospitality_core.hospitality_core.api.report_cache import get_report_rows
+
+
 def execute(filters=None):
     if not filters:
         filters = {}
@@ -21,11 +25,41 @@ def execute(filters=None):
     from_date = filters.get("from_date")
     to_date = filters.get("to_date")
 
-    data = []
+    # Closed business dates are served from the report cache (see api/report_cache.py)
+    data = get_report_rows("Void and Allowance Report", filters, from_date, to_date, get_voids_and_allowances)
+
+    # Sort by Date
+    data.sort(key=lambda x: x['posting_date'])
+
+    # Chart Data
+    void_total = sum([d['amount'] for d in data if d['type'] == 'Void'])
+    allowance_total = sum([abs(d['amount']) for d in data if d['type'] != 'Void']) # Display positive for chart
+
+    chart = {
+        "data": {
+            "labels": ["Voids", "Discounts/Allowances"],
+            "datasets": [{"name": "Total Impact", "values": [void_total, allowance_total]}]
+        },
+        "type": "donut"
+    }
+
+    # Summary Row
+    if data:
+        data.append({
+            "description": "<b>TOTAL IMPACT</b>",
+            "amount": sum([d['amount'] for d in data])
+        })
+
+    return columns, data, None, chart
+
+def get_voids_and_allowances(from_date, to_date):
+    # Live tables, or live + archive when the range reaches before the archive boundary
+    transactions = get_source("Folio Transaction", from_date)
+    folios = get_source("Guest Folio", from_date)
 
     # 1. Fetch Voids (Logically deleted/reversed transactions)
     # is_void = 1
-    voids = frappe.db.sql("""
+    voids = frappe.db.sql(f"""
         SELECT
             ft.posting_date,
             ft.parent,
@@ -33,72 +67,41 @@ def execute(filters=None):
             g.full_name as guest_name,
             'Void' as type,
             ft.description,
-            ft.amount, 
+            ft.amount,
             ft.void_reason,
             ft.owner
-        FROM `tabFolio Transaction` ft
-        JOIN `tabGuest Folio` gf ON ft.parent = gf.name
+        FROM {transactions} ft
+        JOIN {folios} gf ON ft.parent = gf.name
         LEFT JOIN `tabGuest` g ON gf.guest = g.name
         WHERE ft.posting_date BETWEEN %s AND %s
         AND ft.is_void = 1
     """, (from_date, to_date), as_dict=True)
 
     # 2. Fetch Allowances/Discounts (Negative amounts, not payments)
-    # Exclude Payment Items
-    payment_items = frappe.get_all("Item", filters={"item_group": "Payment"}, pluck="name")
-    # If using specific codes like PAYMENT-CASH, ensure logic covers it.
-    # We look for amounts < 0 AND item NOT IN payment_items
-    
-    # Also check for "Complimentary" in description or specific Reason Codes
-    
-    allowances = frappe.db.sql("""
+    # The posting category (stamped at insert, see folio.get_transaction_category) already
+    # tells payments, transfers and Master Folio mirrors apart: an indexed (posting_date, category) scan
+    allowances = frappe.db.sql(f"""
         SELECT
             ft.posting_date,
             ft.parent,
             gf.room,
             g.full_name as guest_name,
-            CASE 
-                WHEN ft.description LIKE '%%Discount%%' THEN 'Discount'
-                WHEN ft.description LIKE '%%Complimentary%%' THEN 'Complimentary'
-                ELSE 'Allowance' 
+            CASE
+                WHEN ft.category = 'Complimentary' THEN 'Complimentary'
+                WHEN ft.item = 'DISCOUNT' THEN 'Discount'
+                ELSE 'Allowance'
             END as type,
             ft.description,
             ft.amount,
             ft.void_reason,
             ft.owner
-        FROM `tabFolio Transaction` ft
-        JOIN `tabGuest Folio` gf ON ft.parent = gf.name
+        FROM {transactions} ft
+        JOIN {folios} gf ON ft.parent = gf.name
         LEFT JOIN `tabGuest` g ON gf.guest = g.name
         WHERE ft.posting_date BETWEEN %s AND %s
+        AND ft.category IN ('Discount', 'Complimentary')
         AND ft.is_void = 0
         AND ft.amount < 0
-        AND ft.item NOT IN (SELECT name FROM `tabItem` WHERE item_group = 'Payment')
-        AND ft.description NOT LIKE '%%Payment%%'
-        AND ft.description NOT LIKE '%%Transfer%%'
     """, (from_date, to_date), as_dict=True)
 
-    data = voids + allowances
-    
-    # Sort by Date
-    data.sort(key=lambda x: x['posting_date'])
-
-    # Chart Data
-    void_total = sum([d['amount'] for d in voids])
-    allowance_total = sum([abs(d['amount']) for d in allowances]) # Display positive for chart
-    
-    chart = {
-        "data": {
-            "labels": ["Voids", "Discounts/Allowances"],
-            "datasets": [{"name": "Total Impact", "values": [void_total, allowance_total]}]
-        },
-        "type": "donut"
-    }
-    
-    # Summary Row
-    if data:
-        data.append({
-            "description": "<b>TOTAL IMPACT</b>",
-            "amount": sum([d['amount'] for d in data])
-        })
-
-    return columns, data, None, chart
\ No newline at end of file
+    return voids + allowances
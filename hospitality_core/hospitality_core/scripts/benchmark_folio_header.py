@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: folio header and form load latency as a folio grows.
+
+Creates throwaway folios of increasing size, times get_folio_header, a full
+frappe.get_doc and the lazy desk load (folio.getdoc) on each, then rolls everything back.
+Timings depend on the machine, so they are printed, not asserted; the unit tests check
+the query shape instead (test_guest_folio.py).
+
+Usage:
+    bench --site [site-name] execute hospitality_core.hospitality_core.scripts.benchmark_folio_header.run
+    bench --site [site-name] execute hospitality_core.hospitality_core.scripts.benchmark_folio_header.run --kwargs "{'sizes': [10, 50000]}"
+"""
+
+import time
+
+import frappe
+from frappe.utils import nowdate
+
+from hospitality_core.hospitality_core.api.folio import (
+    bulk_insert_transactions,
+    get_folio_header,
+    getdoc,
+    new_transaction_row,
+)
+
+
+def run(sizes=(10, 500, 5000), runs=20):
+    """
+    Prints the average latency (ms) per folio size.
+    """
+    print("\n" + "="*60)
+    print("Folio Header Benchmark")
+    print("="*60 + "\n")
+    print(f"{'Transactions':>12} {'Header':>10} {'get_doc':>10} {'Lazy load':>10}")
+
+    try:
+        for size in sizes:
+            folio_name = make_folio(size)
+            header = time_call(get_folio_header, folio_name, runs)
+            full = time_call(lambda name: frappe.get_doc("Guest Folio", name), folio_name, max(runs // 5, 1))
+            lazy = time_call(load_form, folio_name, max(runs // 5, 1))
+            print(f"{size:>12} {header * 1000:>10.2f} {full * 1000:>10.2f} {lazy * 1000:>10.2f}")
+    finally:
+        frappe.flags.lazy_folio = None
+        frappe.db.rollback()
+
+    print("\n" + "="*60 + "\n")
+
+def make_folio(transaction_count):
+    folio = frappe.get_doc({
+        "doctype": "Guest Folio",
+        "naming_series": "FOLIO-",
+        "status": "Open",
+        "open_date": nowdate()
+    }).insert(ignore_permissions=True)
+
+    bulk_insert_transactions([
+        new_transaction_row(folio.name, nowdate(), "ROOM-RENT", f"Benchmark {i}", 100)
+        for i in range(transaction_count)
+    ])
+    return folio.name
+
+def load_form(folio_name):
+    frappe.local.response = frappe._dict({"docs": []})
+    getdoc("Guest Folio", folio_name)
+    frappe.flags.lazy_folio = None
+
+def time_call(fn, folio_name, runs):
+    started = time.perf_counter()
+    for _ in range(runs):
+        fn(folio_name)
+    return (time.perf_counter() - started) / runs
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,6 @@
+from hospitality_core.hospitality_core.api.daily_statistics import enqueue_backfill
+
+
+def execute():
+    # History can be long: built in background batches rather than inside the migration
+    enqueue_backfill()
@@ -0,0 +1,31 @@
+import frappe
+
+
+def execute():
+    """
+    Stamps mirror_of on existing Master Folio copies so the unique (parent, mirror_of)
+    index covers them. If a transaction was mirrored twice in the past, only the
+    oldest copy is stamped (UPDATE IGNORE skips the rest); those are logged for review.
+    """
+    frappe.db.sql("""
+        UPDATE IGNORE `tabFolio Transaction`
+        SET mirror_of = reference_name
+        WHERE reference_doctype = 'Folio Transaction'
+        AND IFNULL(reference_name, '') != ''
+        AND mirror_of IS NULL
+        ORDER BY creation
+    """)
+
+    duplicates = frappe.db.sql("""
+        SELECT parent, reference_name, COUNT(*) as copies
+        FROM `tabFolio Transaction`
+        WHERE reference_doctype = 'Folio Transaction'
+        GROUP BY parent, reference_name
+        HAVING COUNT(*) > 1
+    """, as_dict=True)
+
+    if duplicates:
+        frappe.log_error(
+            title="Duplicate mirrored transactions",
+            message="\n".join(f"{d.parent}: {d.reference_name} x{d.copies}" for d in duplicates)
+        )
@@ -0,0 +1,38 @@
+import frappe
+
+from hospitality_core.hospitality_core.api.archive import get_archive_table, sync_archive_tables
+from hospitality_core.hospitality_core.api.folio import CATEGORY_SQL
+from hospitality_core.hospitality_core.api.report_cache import reset_report_cache
+
+BATCH_SIZE = 10000
+
+def execute():
+    """
+    Stamps the posting category on existing Folio Transactions, live and archived, walking
+    the primary key in batches of BATCH_SIZE rows committed one at a time.
+    """
+    # Archived rows need the column too (the after_migrate sync runs after the patches)
+    sync_archive_tables()
+
+    for table in ("tabFolio Transaction", get_archive_table("Folio Transaction")):
+        backfill_categories(table)
+
+    # Cached report results were computed with the old classification
+    reset_report_cache()
+
+def backfill_categories(table):
+    last_name = ""
+    while True:
+        names = frappe.db.sql_list(f"""
+            SELECT name FROM `{table}` WHERE name > %s ORDER BY name LIMIT {BATCH_SIZE}
+        """, (last_name,))
+        if not names:
+            break
+
+        frappe.db.sql(f"""
+            UPDATE `{table}` ft
+            SET ft.category = {CATEGORY_SQL}
+            WHERE ft.name IN %(names)s AND IFNULL(ft.category, '') = ''
+        """, {"names": names})
+        frappe.db.commit()
+        last_name = names[-1]
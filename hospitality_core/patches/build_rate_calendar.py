@@ -0,0 +1,5 @@
+from hospitality_core.hospitality_core.api.rate_calendar import roll_rate_calendar
+
+
+def execute():
+    roll_rate_calendar()
@@ -0,0 +1,5 @@
+from hospitality_core.hospitality_core.api.reservation_lock import sync_room_night_locks
+
+
+def execute():
+    sync_room_night_locks()
@@ -0,0 +1,5 @@
+from hospitality_core.hospitality_core.api.inventory import extend_inventory_horizon
+
+
+def execute():
+    extend_inventory_horizon()
@@ -1,6 +1,7 @@
 import frappe
 from frappe import _
 
+
 def after_install():
     create_roles()
     create_custom_fields()
@@ -39,7 +40,7 @@ def create_default_data():
         {"code": "GUEST-SAT", "desc": "Guest Satisfaction / Complaint", "mgr": 1},
         {"code": "MGMT-COMP", "desc": "Management Complementary", "mgr": 1}
     ]
-    
+
     for r in reasons:
         if not frappe.db.exists("Allowance Reason Code", r["code"]):
             frappe.get_doc({
@@ -53,7 +54,8 @@ def create_default_data():
     items = [
         {"code": "ROOM-RENT", "name": "Room Rent"},
         {"code": "POS-CHARGE", "name": "POS Charge"},
-        {"code": "PAYMENT", "name": "Payment Credit"}
+        {"code": "PAYMENT", "name": "Payment Credit"},
+        {"code": "BALANCE-FORWARD", "name": "Balance Forward"}
     ]
     for i in items:
         if not frappe.db.exists("Item", i["code"]):
@@ -62,4 +64,4 @@ def create_default_data():
             item.item_name = i["name"]
             item.item_group = "Services" if frappe.db.exists("Item Group", "Services") else "All Item Groups"
             item.is_stock_item = 0
-            item.insert(ignore_permissions=True)
\ No newline at end of file
+            item.insert(ignore_permissions=True)